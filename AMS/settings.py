@@ -34,6 +34,20 @@ if not FIELD_ENCRYPTION_KEY and os.getenv("DJANGO_ENV") == "production":
         "FIELD_ENCRYPTION_KEY nesmí být prázdný v produkci! "
         "Nastavte proměnnou prostředí FIELD_ENCRYPTION_KEY."
     )
+# Předchozí klíče (čárkou oddělené) — jen pro dešifrování během rotace (rotate_encryption_key)
+FIELD_ENCRYPTION_OLD_KEYS = [
+    key.strip() for key in os.getenv("FIELD_ENCRYPTION_OLD_KEYS", default="").split(",") if key.strip()
+]
+# Klíč blind indexů (viz encryption.py) — při rotaci nastavit na dosavadní FIELD_ENCRYPTION_KEY
+BLIND_INDEX_KEY = os.getenv("BLIND_INDEX_KEY", default="")
+# Cache dešifrovaných hodnot: "request" (zahodí se po requestu) | "process" | "off"
+# "process" drží plaintexty po celý život procesu — i po anonymizaci klienta;
+# hromadné příkazy mají vlastní cache po dobu běhu (decrypt_scope)
+FIELD_DECRYPT_CACHE_SCOPE = os.getenv("FIELD_DECRYPT_CACHE_SCOPE", default="request")
+FIELD_DECRYPT_CACHE_SIZE = int(os.getenv("FIELD_DECRYPT_CACHE_SIZE", default="10000"))
+FIELD_DECRYPT_CACHE_MAX_VALUE = 1024
+# Dešifrovat až při prvním čtení atributu (False = hned při načtení z DB)
+FIELD_DECRYPT_LAZY = True
 
 
 # Nastavení pro produkci: https nastaveni
@@ -123,6 +137,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
     "middleware.gdpr_audit_middleware.GDPRAuditMiddleware",
+    "middleware.decrypt_cache_middleware.DecryptCacheMiddleware",
 ]
 
 ROOT_URLCONF = "AMS.urls"
@@ -165,6 +180,21 @@ DATABASES = {
 #     }
 # }
 
+# --- cache: default per proces (throttling), dashboard sdílený mezi procesy
+# (management commandy mění data mimo webový proces → invalidace musí být vidět)
+# Adresář patří k instalaci (BASE_DIR) — jiné checkouty/nasazení na stejném
+# stroji ho nesdílí. Testy ho přepínají na LocMem (AMS.test_runner).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "dashboard": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("DASHBOARD_CACHE_DIR", str(BASE_DIR / "cache" / "dashboard")),
+    },
+}
+TEST_RUNNER = "AMS.test_runner.TestRunner"
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -194,6 +224,8 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 # --- pro ukladani soubor jako path z databze
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media/"
+# --- výstupní profil PDF protokolů: "standard" (výstup reportlabu) | "flate" (bez ASCII85, ~12 % menší)
+PDF_PROTOCOL_PROFILE = os.getenv("PDF_PROTOCOL_PROFILE", default="standard")
 
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -208,6 +240,8 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
 EMAIL_USE_TLS = True
+# --- timeout SMTP spojení [s] — run_mail_worker jinak visí na nedostupném serveru
+EMAIL_TIMEOUT = 30
 DEFAULT_FROM_EMAIL = "Rhenus HD — AMS <montaze@rhemove.cz>"
 
 # --- logovani chyb do adresare logs
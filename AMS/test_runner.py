@@ -0,0 +1,28 @@
+"""
+Test runner — testy nesmí sdílet souborovou cache dashboardu s instalací
+(ani mezi běhy), celá sada proto běží s LocMem cache přes override_settings.
+"""
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "dashboard": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ams-dashboard-test",
+    },
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches_override = override_settings(CACHES=TEST_CACHES)
+        self._caches_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches_override.disable()
+        super().teardown_test_environment(**kwargs)
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
 
 application = get_wsgi_application()
+
+# --- fonty, logo a šablony protokolů jednou za proces; s `gunicorn --preload`
+# --- se načtou v masteru před forkem a workery je sdílí
+from app_sprava_montazi.OOP_protokols import PdfResources  # noqa: E402
+
+PdfResources.preload()
@@ -0,0 +1,140 @@
+"""
+API v1 Sparse fieldsets — `?fields=` / `?omit=` pro ViewSety.
+
+ - `?fields=id,order_number,client_name` — vrátí jen vyjmenovaná pole
+ - `?omit=notes,profit` — vrátí vše kromě vyjmenovaných polí
+
+SparseFieldsMixin ořeže výstup serializeru, SparseQuerysetMixin podle
+stejných parametrů vynechá nepotřebné select_related / prefetch_related
+a v seznamu načte přes only() jen sloupce, které se opravdu vykreslí
+(např. šifrované sloupce Client se pak vůbec nedešifrují).
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+
+
+def _parse(value: str | None) -> set[str]:
+    return {name.strip() for name in (value or "").split(",") if name.strip()}
+
+
+def requested_fields(request, available) -> set[str] | None:
+    """Pole k vykreslení podle `?fields=` / `?omit=`; None = vše.
+
+    Jen pro čtení — u zápisu by ořezání vyřadilo i zapisovatelná pole.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    if FIELDS_PARAM not in params and OMIT_PARAM not in params:
+        return None
+    keep = set(available)
+    if FIELDS_PARAM in params:
+        keep &= _parse(params.get(FIELDS_PARAM))
+    return keep - _parse(params.get(OMIT_PARAM))
+
+
+class SparseFieldsMixin:
+    """Serializer mixin — vyhodí pole, která klient nechce.
+
+    Působí jen na serializer s `request` v kontextu (tj. ten, který
+    vytvoří ViewSet); vnořené serializery zůstávají kompletní.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = requested_fields(self.context.get("request"), self.fields.keys())
+        if keep is None:
+            return
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    """ViewSet mixin — ořezání querysetu podle vykreslených polí.
+
+    Atributy ViewSetu:
+     - sparse_field_paths: pole serializeru → ORM cesty, které čte
+       (výchozí = stejnojmenné pole modelu)
+     - sparse_select_related / sparse_prefetch_related:
+       relace → pole serializeru, která ji potřebují
+     - sparse_only_actions: akce, kde se sloupce omezí přes only()
+    """
+
+    sparse_actions: tuple[str, ...] = ("list", "retrieve")
+    sparse_only_actions: tuple[str, ...] = ("list",)
+    sparse_field_paths: dict[str, tuple[str, ...]] = {}
+    sparse_select_related: dict[str, tuple[str, ...]] = {}
+    sparse_prefetch_related: dict[str, tuple[str, ...]] = {}
+
+    def rendered_fields(self) -> set[str]:
+        """Jména polí, která serializer pro tento request vykreslí."""
+        if not hasattr(self, "_rendered_fields"):
+            available = self.get_serializer_class()().fields.keys()
+            keep = requested_fields(self.request, available)
+            self._rendered_fields = set(available) if keep is None else keep
+        return self._rendered_fields
+
+    def is_sparse(self) -> bool:
+        return getattr(self, "action", None) in self.sparse_actions
+
+    def wants(self, *names: str) -> bool:
+        """Vykreslí se aspoň jedno z polí? (mimo list/retrieve vždy True)"""
+        if not self.is_sparse():
+            return True
+        return bool(self.rendered_fields() & set(names))
+
+    def _only_paths(self, model, related: list[str]) -> list[str] | None:
+        """Sloupce pro only(); None = nelze bezpečně určit."""
+        paths = {"pk"}
+        for name in self.rendered_fields():
+            if name in self.sparse_field_paths:
+                paths.update(self.sparse_field_paths[name])
+                continue
+            try:
+                model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None  # neznámé pole — radši nic nevynecháme
+            paths.add(name)
+        # --- řadicí pole (kvůli keyset kurzoru) — jen vlastní sloupce
+        for ordering in list(getattr(self, "ordering", None) or []) + list(
+            model._meta.ordering
+        ):
+            name = ordering.lstrip("-")
+            if "__" not in name:
+                paths.add(name)
+        # --- přes relaci jen pokud je v select_related, jinak stačí FK sloupec
+        result = set()
+        for path in paths:
+            head = path.split("__", 1)[0]
+            if "__" in path and head not in related:
+                result.add(head)
+                continue
+            result.add(path)
+            if "__" in path:
+                result.add(head)
+        return sorted(result)
+
+    def sparse_queryset(self, qs):
+        """Aplikuje select_related / prefetch_related / only() podle polí."""
+        related = [
+            path for path, names in self.sparse_select_related.items()
+            if self.wants(*names)
+        ]
+        prefetch = [
+            path for path, names in self.sparse_prefetch_related.items()
+            if self.wants(*names)
+        ]
+        if related:
+            qs = qs.select_related(*related)
+        if prefetch:
+            qs = qs.prefetch_related(*prefetch)
+        if self.is_sparse() and self.action in self.sparse_only_actions:
+            paths = self._only_paths(qs.model, related)
+            if paths is not None:
+                qs = qs.only(*paths)
+        return qs
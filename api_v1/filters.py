@@ -3,9 +3,14 @@ API v1 Filters — filtrovací třídy pro DRF.
 """
 
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 
+from django.core.validators import RegexValidator
 from django.db.models import Q, F
 
+from app_sprava_montazi import search
+from app_sprava_montazi.protocol_batch import week_range
+
 from app_sprava_montazi.models import (
     Order,
     Client,
@@ -19,6 +24,21 @@ from app_sprava_montazi.models import (
 )
 
 
+class OrderSearchFilter(SearchFilter):
+    """`?search=` přes fulltextový index zakázek (prefixy, bez diakritiky).
+
+    Bez indexu (SQLite bez FTS5) klasické `icontains` přes `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip():
+            return queryset
+        if not search.is_available():
+            return super().filter_queryset(request, queryset, view)
+        return search.search_orders(queryset, query)
+
+
 class OrderFilter(filters.FilterSet):
     """Filtrování zakázek pro DataTables i obecné API."""
 
@@ -52,6 +72,11 @@ class OrderFilter(filters.FilterSet):
     montage_to = filters.DateTimeFilter(
         field_name="montage_termin", lookup_expr="lte"
     )
+    # --- ISO týden montáže ("2025-W14")
+    montage_week = filters.CharFilter(
+        method="filter_montage_week",
+        validators=[RegexValidator(r"^\d{4}-[Ww](0[1-9]|[1-4]\d|5[0-3])$")],
+    )
 
     # --- rok/měsíc pro dashboard
     year = filters.NumberFilter(field_name="evidence_termin", lookup_expr="year")
@@ -92,8 +117,9 @@ class OrderFilter(filters.FilterSet):
          - 'all': vše kromě Hidden
         """
         if value == "open":
-            return queryset.exclude(
-                status__in=[Status.HIDDEN, Status.BILLED, Status.CANCELED]
+            # --- výčtem místo exclude → index order_status_type_evid_idx
+            return queryset.filter(
+                status__in=[Status.NEW, Status.ADVICED, Status.REALIZED]
             )
         elif value == "closed":
             return queryset.filter(status__in=[Status.BILLED, Status.CANCELED])
@@ -116,6 +142,14 @@ class OrderFilter(filters.FilterSet):
         cond_inactive = Q(team__active=False)
         return base.filter(cond_mail | cond_soulad | cond_inactive)
 
+    def filter_montage_week(self, queryset, name, value):
+        """Montáž v daném týdnu (rozsah → index na montage_termin)."""
+        try:
+            start, end = week_range(value)
+        except ValueError:  # --- 53. týden v roce, který ho nemá
+            return queryset.none()
+        return queryset.filter(montage_termin__gte=start, montage_termin__lt=end)
+
     def filter_no_montage_term(self, queryset, name, value):
         """Zakázky bez termínu montáže (exclude hidden + closed)."""
         if not value:
@@ -130,11 +164,49 @@ class ClientFilter(filters.FilterSet):
     name = filters.CharFilter(lookup_expr="icontains")
     city = filters.CharFilter(lookup_expr="icontains")
     zip_code = filters.CharFilter(lookup_expr="exact")
+    # --- šifrovaná pole — přes blind index (přesná shoda / tokeny ulice)
+    phone = filters.CharFilter(method="filter_phone")
+    email = filters.CharFilter(method="filter_email")
+    street = filters.CharFilter(method="filter_street")
 
     class Meta:
         model = Client
         fields = ["incomplete", "name", "city", "zip_code"]
 
+    def filter_phone(self, queryset, name, value):
+        return queryset.filter(Client.phone_match(value))
+
+    def filter_email(self, queryset, name, value):
+        return queryset.filter(Client.email_match(value))
+
+    def filter_street(self, queryset, name, value):
+        return queryset.filter(Client.street_match(value))
+
+
+class ClientSearchFilter(SearchFilter):
+    """`?search=` pro zákazníky.
+
+    Nešifrovaná `search_fields` přes `icontains`, šifrovaný telefon,
+    e-mail a ulice přes blind index — každé slovo musí sedět na některé
+    pole, celý dotaz navíc i jako telefon / e-mail ("777 123 456").
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        fields = self.get_search_fields(view, request) or []
+        per_term = Q()
+        for term in terms:
+            condition = (
+                Client.phone_match(term) | Client.email_match(term) | Client.street_match(term)
+            )
+            for field in fields:
+                condition |= Q(**{f"{field}__icontains": term})
+            per_term &= condition
+        whole = " ".join(terms)
+        return queryset.filter(per_term | Client.phone_match(whole) | Client.email_match(whole))
+
 
 class TeamFilter(filters.FilterSet):
     active = filters.BooleanFilter()
@@ -1,8 +1,218 @@
-from rest_framework.pagination import PageNumberPagination
+"""
+API v1 Pagination — stránkování pro ViewSety.
+
+StandardPagination je klasické PageNumberPagination (count + OFFSET).
+S parametrem `?cursor=` se přepne na keyset (seek) režim:
+ - bez COUNT(*) a bez OFFSET — další stránka se hledá podle klíče
+   posledního řádku (aktuální řazení + `id` jako tie-breaker)
+ - funguje s filtry i s `?ordering=` (klíč se odvodí z řazení querysetu)
+ - první stránka: `?cursor=` (prázdná hodnota), další přes `next`/`previous`
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Keyset (cursor) stránkování nad libovolným řazením querysetu."""
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Neplatný kurzor."
+
+    def __init__(self, page_size: int) -> None:
+        self.page_size = page_size
+
+    # --- klíč řazení ------------------------------------------------
+    @staticmethod
+    def _ordering_of(queryset) -> list[str]:
+        """Řazení querysetu jako seznam stringů + `pk` na konci."""
+        ordering = [
+            o for o in (queryset.query.order_by or queryset.model._meta.ordering)
+            if isinstance(o, str)
+        ]
+        ordering = ["-pk" if o == "-id" else "pk" if o == "id" else o for o in ordering]
+        if not any(o.lstrip("-") == "pk" for o in ordering):
+            descending = ordering[0].startswith("-") if ordering else True
+            ordering.append("-pk" if descending else "pk")
+        return ordering
+
+    @staticmethod
+    def _is_nullable(model, path: str) -> bool:
+        """Zjistí, zda pole (i přes FK, např. `client__name`) může být NULL."""
+        nullable = False
+        for part in path.split("__"):
+            if part == "pk":
+                return nullable
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return True
+            nullable = nullable or field.null
+            if field.is_relation and field.related_model:
+                model = field.related_model
+        return nullable
+
+    def _keys(self, queryset) -> list[tuple[str, bool, bool]]:
+        """[(path, descending, nullable), ...]"""
+        return [
+            (o.lstrip("-"), o.startswith("-"), self._is_nullable(queryset.model, o.lstrip("-")))
+            for o in self._ordering_of(queryset)
+        ]
+
+    @staticmethod
+    def _order_expressions(keys, reverse: bool) -> list:
+        """NULL hodnoty vždy na konci (v opačném směru na začátku)."""
+        expressions = []
+        for path, descending, nullable in keys:
+            descending = descending != reverse
+            expr = F(path).desc if descending else F(path).asc
+            if not nullable:
+                expressions.append(expr())
+            elif reverse:
+                expressions.append(expr(nulls_first=True))
+            else:
+                expressions.append(expr(nulls_last=True))
+        return expressions
+
+    # --- seek podmínka ----------------------------------------------
+    @staticmethod
+    def _equal(path: str, value) -> Q:
+        if value is None:
+            return Q(**{f"{path}__isnull": True})
+        return Q(**{path: value})
+
+    @staticmethod
+    def _beyond(path: str, descending: bool, nullable: bool, value, reverse: bool) -> Q:
+        """Řádky striktně za (reverse: před) hodnotou v daném sloupci."""
+        if value is None:
+            # --- NULL skupina je poslední
+            return Q(**{f"{path}__isnull": False}) if reverse else Q(pk__in=[])
+        lookup = "gt" if descending == reverse else "lt"
+        condition = Q(**{f"{path}__{lookup}": value})
+        if nullable and not reverse:
+            condition |= Q(**{f"{path}__isnull": True})
+        return condition
+
+    def _seek(self, keys, values: list, reverse: bool) -> Q:
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for (path, descending, nullable), value in zip(keys, values):
+            condition |= prefix & self._beyond(path, descending, nullable, value, reverse)
+            prefix &= self._equal(path, value)
+        return condition
+
+    # --- kurzor -----------------------------------------------------
+    @staticmethod
+    def _value_of(obj, path: str):
+        for part in path.split("__"):
+            if obj is None:
+                return None
+            obj = getattr(obj, part)
+        if isinstance(obj, (date, datetime)):
+            return obj.isoformat()
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return obj
+
+    def _encode(self, obj, reverse: bool) -> str:
+        position = {
+            "o": self.ordering,
+            "v": [self._value_of(obj, path) for path, _, _ in self.keys],
+            "r": reverse,
+        }
+        raw = json.dumps(position, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def _decode(self, cursor: str) -> dict | None:
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except (ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # --- kurzor z jiného řazení nelze použít
+        if (
+            not isinstance(position, dict)
+            or position.get("o") != self.ordering
+            or len(position.get("v") or []) != len(self.keys)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self._ordering_of(queryset)
+        self.keys = self._keys(queryset)
+
+        position = self._decode(request.query_params.get(self.cursor_query_param, ""))
+        reverse = bool(position and position["r"])
+        if position:
+            queryset = queryset.filter(self._seek(self.keys, position["v"], reverse))
+        queryset = queryset.order_by(*self._order_expressions(self.keys, reverse))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # --- next/previous podle směru, kterým jsme přišli
+        self.has_next = has_more if not reverse else True
+        self.has_previous = (position is not None) if not reverse else has_more
+        self.rows = rows
+        return rows
+
+    def _link(self, obj, reverse: bool) -> str:
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self._encode(obj, reverse))
+
+    def get_next_link(self) -> str | None:
+        if not self.rows or not self.has_next:
+            return None
+        return self._link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.rows or not self.has_previous:
+            return None
+        return self._link(self.rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
 
 
 class StandardPagination(PageNumberPagination):
-    """PageNumberPagination with client-controllable page_size."""
+    """PageNumberPagination with client-controllable page_size.
+
+    `?cursor=` zapíná keyset režim (viz KeysetPagination).
+    """
 
     page_size_query_param = "page_size"
     max_page_size = 200
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination(page_size=self.get_page_size(request))
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
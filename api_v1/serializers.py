@@ -11,15 +11,20 @@ from app_sprava_montazi.models import (
     CallLog,
     Client,
     DistribHub,
+    EmailOutbox,
     FinanceCostItem,
     FinanceRevenueItem,
     Order,
     OrderBackProtocol,
     OrderMontazImage,
     OrderPDFStorage,
+    ProtocolJob,
     Team,
     Upload,
 )
+from app_sprava_montazi.utils import client_created
+
+from .fieldsets import SparseFieldsMixin
 
 User = get_user_model()
 
@@ -167,7 +172,7 @@ class DistribHubSerializer(serializers.ModelSerializer):
 # ──────────────────────────────────────────
 # Team
 # ──────────────────────────────────────────
-class TeamListSerializer(serializers.ModelSerializer):
+class TeamListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Zjednodušený serializátor pro seznam/výběr."""
 
     class Meta:
@@ -185,7 +190,7 @@ class TeamListSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "slug"]
 
 
-class TeamDetailSerializer(serializers.ModelSerializer):
+class TeamDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Plný serializátor s cenami a poznámkami."""
 
     class Meta:
@@ -223,7 +228,7 @@ class TeamDetailSerializer(serializers.ModelSerializer):
 # ──────────────────────────────────────────
 # Client
 # ──────────────────────────────────────────
-class ClientListSerializer(serializers.ModelSerializer):
+class ClientListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     formatted_phone = serializers.SerializerMethodField()
     formatted_psc = serializers.SerializerMethodField()
     phone = serializers.SerializerMethodField()
@@ -399,7 +404,7 @@ class OrderBackProtocolSerializer(serializers.ModelSerializer):
 # ──────────────────────────────────────────
 # Order
 # ──────────────────────────────────────────
-class OrderListSerializer(serializers.ModelSerializer):
+class OrderListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializátor pro seznam zakázek (tabulka)."""
 
     client_name = serializers.CharField(source="client.name", read_only=True, default=None)
@@ -454,13 +459,24 @@ class OrderListSerializer(serializers.ModelSerializer):
     def get_distrib_hub_label(self, obj) -> str:
         return str(obj.distrib_hub) if obj.distrib_hub else ""
 
+    # --- příznaky čteme z anotací (viz views._order_list_queryset),
+    # --- fallback na dotaz jen pro neanotované instance (detail, create)
     def get_has_pdf(self, obj) -> bool:
+        annotated = getattr(obj, "has_pdf", None)
+        if annotated is not None:
+            return bool(annotated)
         return hasattr(obj, "pdf") and obj.pdf is not None
 
     def get_has_back_protocol(self, obj) -> bool:
+        annotated = getattr(obj, "has_back_protocol", None)
+        if annotated is not None:
+            return bool(annotated)
         return hasattr(obj, "back_protocol") and obj.back_protocol is not None
 
     def get_montage_images_count(self, obj) -> int:
+        annotated = getattr(obj, "montage_images_count", None)
+        if annotated is not None:
+            return annotated
         return obj.montage_images.count()
 
     def get_profit(self, obj) -> str:
@@ -594,33 +610,13 @@ class OrderWriteSerializer(serializers.ModelSerializer):
         return data
 
     def _resolve_client(self, validated_data):
-        """Handle client_data → get_or_create, matching Django's client_created()."""
+        """Handle client_data → upsert přes Django's client_created()."""
         client_data = validated_data.pop("client_data", None)
         if client_data and not validated_data.get("client"):
             name = client_data.get("name", "").strip()
             zip_code = client_data.get("zip_code", "").strip()
             if name and zip_code:
-                from django.db import transaction
-                with transaction.atomic():
-                    client, created = Client.objects.get_or_create(
-                        name=name,
-                        zip_code=zip_code,
-                        defaults={
-                            "street": client_data.get("street", ""),
-                            "city": client_data.get("city", ""),
-                            "phone": client_data.get("phone", ""),
-                            "email": client_data.get("email", ""),
-                        },
-                    )
-                    if not created:
-                        updated = False
-                        for field in ["street", "city", "phone", "email"]:
-                            value = client_data.get(field, "")
-                            if value and getattr(client, field) != value:
-                                setattr(client, field, value)
-                                updated = True
-                        if updated:
-                            client.save()
+                client, _ = client_created(name, zip_code, client_data)
                 validated_data["client"] = client
         return validated_data
 
@@ -667,6 +663,72 @@ class UploadSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created"]
 
 
+class ImportJobSerializer(serializers.ModelSerializer):
+    """Stav importu (Upload jako job) — průběh, počítadla, chyba."""
+
+    status = serializers.CharField(source="import_status", read_only=True)
+    progress = serializers.FloatField(read_only=True, allow_null=True)
+    error = serializers.CharField(source="import_error", read_only=True)
+
+    class Meta:
+        model = Upload
+        fields = [
+            "id",
+            "file",
+            "created",
+            "status",
+            "rows_done",
+            "rows_total",
+            "progress",
+            "counters",
+            "error",
+            "updated",
+        ]
+        read_only_fields = fields
+
+
+class ProtocolJobSerializer(serializers.ModelSerializer):
+    """Stav hromadného generování protokolů — průběh, počty, výsledky po zakázkách."""
+
+    progress = serializers.FloatField(read_only=True)
+    summary = serializers.DictField(read_only=True)
+
+    class Meta:
+        model = ProtocolJob
+        fields = [
+            "id",
+            "created",
+            "status",
+            "force",
+            "done",
+            "progress",
+            "summary",
+            "results",
+            "error",
+            "updated",
+        ]
+        read_only_fields = fields
+
+
+class EmailOutboxSerializer(serializers.ModelSerializer):
+    """Stav emailu s protokolem ve frontě — bez odkazu a tokenu zpětného protokolu."""
+
+    class Meta:
+        model = EmailOutbox
+        fields = [
+            "id",
+            "order",
+            "created",
+            "status",
+            "attempts",
+            "next_attempt",
+            "last_error",
+            "recipient",
+            "sent",
+        ]
+        read_only_fields = fields
+
+
 # ──────────────────────────────────────────
 # Dashboard (read-only aggregáty)
 # ──────────────────────────────────────────
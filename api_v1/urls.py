@@ -30,8 +30,19 @@ urlpatterns = [
     path("auth/me/", views.MeView.as_view(), name="me"),
     # ── Dashboard ──
     path("dashboard/", views.DashboardView.as_view(), name="dashboard"),
+    path(
+        "dashboard/cache-stats/",
+        views.DashboardCacheStatsView.as_view(),
+        name="dashboard-cache-stats",
+    ),
     # ── CSV Import ──
     path("import/", views.CSVImportView.as_view(), name="csv-import"),
+    path("import/preview/", views.CSVImportPreviewView.as_view(), name="csv-import-preview"),
+    path("import/<int:pk>/", views.ImportJobView.as_view(), name="csv-import-detail"),
+    # ── Hromadné protokoly ──
+    path("protocol-jobs/<int:pk>/", views.ProtocolJobView.as_view(), name="protocol-job-detail"),
+    # ── Fronta emailů ──
+    path("outbox/<int:pk>/", views.EmailOutboxView.as_view(), name="outbox-detail"),
     # ── Bot Token Info ──
     path("bot-token-info/", views.BotTokenInfoView.as_view(), name="bot-token-info"),
     # ── Health check ──
@@ -3,7 +3,6 @@ API v1 Views — ViewSets a speciální endpointy pro oddělený FE.
 """
 
 import os
-import time
 import io
 import zipfile
 from datetime import timedelta
@@ -11,15 +10,17 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.management import call_command
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import Count, Exists, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
 
 from rest_framework import viewsets, status, permissions, generics, serializers as drf_serializers
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.throttling import ScopedRateThrottle
@@ -32,6 +33,7 @@ from rest_framework_simplejwt.views import (
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 
 from app_sprava_montazi.models import (
@@ -40,21 +42,27 @@ from app_sprava_montazi.models import (
     CallLog,
     Client,
     DistribHub,
+    EmailOutbox,
     FinanceCostItem,
     FinanceRevenueItem,
     Order,
     OrderBackProtocol,
     OrderMontazImage,
     OrderPDFStorage,
+    ProtocolJob,
     Status,
     Team,
     TeamType,
     Upload,
 )
 from app_sprava_montazi.OOP_protokols import SCCZPdfGenerator
-from app_sprava_montazi.OOP_emails import CustomEmail
-from app_sprava_montazi.OOP_dashboard import Dashboard
+from app_sprava_montazi.OOP_dashboard import Dashboard, DashboardCache
 from app_sprava_montazi.OOP_back_protocol import ProtocolUploader
+from app_sprava_montazi.management.commands.import_data import DatasetTools
+from app_sprava_montazi.protocol_batch import (
+    BULK_PROTOCOL_LIMIT,
+    stale_protocols,
+)
 from app_sprava_montazi.utils import update_customers
 
 from .serializers import (
@@ -66,7 +74,10 @@ from .serializers import (
     DashboardSerializer,
     DistribHubSerializer,
     FinanceCostItemSerializer,
+    EmailOutboxSerializer,
     FinanceRevenueItemSerializer,
+    ImportJobSerializer,
+    ProtocolJobSerializer,
     OrderDetailSerializer,
     OrderListSerializer,
     OrderMontazImageSerializer,
@@ -81,11 +92,14 @@ from .serializers import (
 from .filters import (
     CallLogFilter,
     ClientFilter,
+    ClientSearchFilter,
     FinanceCostItemFilter,
     FinanceRevenueItemFilter,
     OrderFilter,
+    OrderSearchFilter,
     TeamFilter,
 )
+from .fieldsets import SparseQuerysetMixin
 from .permissions import IsAdminRole, IsManagerOrAbove
 
 User = get_user_model()
@@ -132,6 +146,38 @@ def _clear_jwt_cookies(response):
     return response
 
 
+def _force(request) -> bool:
+    """?force=true — vygenerovat protokol i když je podle otisku aktuální"""
+    return request.query_params.get("force", "").lower() in ("1", "true", "yes")
+
+
+def _order_list_queryset(qs: QuerySet, fields: set[str] | None = None) -> QuerySet:
+    """Doplní příznaky pro OrderListSerializer jako anotace.
+
+    has_pdf / has_back_protocol přes Exists a počet fotek přes Count
+    v subquery — seznam pak stojí konstantní počet dotazů bez ohledu
+    na velikost stránky (žádné reverse one-to-one dotazy na řádek).
+    `fields` omezí anotace jen na vykreslená pole (sparse fieldsets).
+    """
+    images_count = (
+        OrderMontazImage.objects.filter(order=OuterRef("pk"))
+        .order_by()
+        .values("order")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    annotations = {
+        "has_pdf": Exists(OrderPDFStorage.objects.filter(order=OuterRef("pk"))),
+        "has_back_protocol": Exists(
+            OrderBackProtocol.objects.filter(order=OuterRef("pk"))
+        ),
+        "montage_images_count": Coalesce(Subquery(images_count), Value(0)),
+    }
+    if fields is not None:
+        annotations = {k: v for k, v in annotations.items() if k in fields}
+    return qs.annotate(**annotations)
+
+
 class LoginView(TokenObtainPairView):
     """JWT login — vrací access + refresh token v httpOnly cookies."""
 
@@ -272,7 +318,7 @@ class DistribHubViewSet(viewsets.ReadOnlyModelViewSet):
     update=extend_schema(summary="Upravit tým"),
     destroy=extend_schema(summary="Smazat tým"),
 )
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Team.objects.all()
     filterset_class = TeamFilter
     search_fields = ["name", "city", "region", "email"]
@@ -280,6 +326,9 @@ class TeamViewSet(viewsets.ModelViewSet):
     ordering = ["name"]
     lookup_field = "slug"
 
+    def get_queryset(self) -> QuerySet:
+        return self.sparse_queryset(super().get_queryset())
+
     def get_serializer_class(self):
         if self.action == "list":
             return TeamListSerializer
@@ -302,13 +351,24 @@ class TeamViewSet(viewsets.ModelViewSet):
     list=extend_schema(summary="Seznam zákazníků"),
     retrieve=extend_schema(summary="Detail zákazníka"),
 )
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Client.objects.all()
     filterset_class = ClientFilter
-    search_fields = ["name", "city", "street", "email", "zip_code"]
+    filter_backends = [DjangoFilterBackend, ClientSearchFilter, OrderingFilter]
+    # --- phone/email/street jsou šifrované — hledá se v nich přes blind index
+    search_fields = ["name", "city", "zip_code"]
     ordering_fields = ["name", "city", "incomplete"]
     ordering = ["name"]
     lookup_field = "slug"
+    # --- sparse fieldsets: šifrované sloupce jen pokud se vykreslí
+    sparse_field_paths = {
+        "formatted_phone": ("phone",),
+        "formatted_psc": ("zip_code",),
+    }
+    sparse_prefetch_related = {"calls__user": ("call_logs",)}
+
+    def get_queryset(self) -> QuerySet:
+        return self.sparse_queryset(super().get_queryset())
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -319,8 +379,10 @@ class ClientViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], url_path="orders")
     def orders(self, request, slug=None):
         client = self.get_object()
-        orders = Order.objects.filter(client=client).select_related(
-            "distrib_hub", "team"
+        orders = _order_list_queryset(
+            Order.objects.filter(client=client).select_related(
+                "client", "distrib_hub", "team"
+            )
         )
         serializer = OrderListSerializer(orders, many=True)
         return Response(serializer.data)
@@ -423,8 +485,10 @@ class ClientViewSet(viewsets.ModelViewSet):
     update=extend_schema(summary="Upravit zakázku"),
     destroy=extend_schema(summary="Smazat zakázku"),
 )
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     filterset_class = OrderFilter
+    # --- ?search= přes fulltextový index (search_fields = fallback bez FTS)
+    filter_backends = [DjangoFilterBackend, OrderSearchFilter, OrderingFilter]
     search_fields = [
         "order_number",
         "client__name",
@@ -445,13 +509,35 @@ class OrderViewSet(viewsets.ModelViewSet):
         "team__name",
     ]
     ordering = ["-evidence_termin"]
+    # --- sparse fieldsets: pole serializeru → sloupce / relace, které čte
+    sparse_field_paths = {
+        "status_display": ("status",),
+        "team_type_display": ("team_type",),
+        "distrib_hub_label": ("distrib_hub__code", "distrib_hub__city"),
+        "client_name": ("client__name",),
+        "client_incomplete": ("client__incomplete",),
+        "team_name": ("team__name",),
+        "profit": ("vynos", "naklad"),
+        "has_pdf": (),
+        "has_back_protocol": (),
+        "montage_images_count": (),
+    }
+    sparse_select_related = {
+        "client": ("client_name", "client_incomplete", "client_detail"),
+        "team": ("team_name", "team_detail"),
+        "distrib_hub": ("distrib_hub_label", "distrib_hub_detail"),
+    }
+    sparse_prefetch_related = {
+        "articles": ("articles",),
+        "montage_images": ("montage_images",),
+    }
 
     def get_queryset(self) -> QuerySet:
-        return (
-            Order.objects.select_related("client", "team", "distrib_hub")
-            .prefetch_related("articles", "montage_images")
-            .all()
-        )
+        qs = self.sparse_queryset(Order.objects.all())
+        if self.action == "list":
+            # --- seznam nepotřebuje articles ani fotky, jen příznaky
+            return _order_list_queryset(qs, self.rendered_fields())
+        return qs
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -531,27 +617,106 @@ class OrderViewSet(viewsets.ModelViewSet):
             {"detail": f"Zakázka {order.order_number} přepnuta na realizaci montážníky."}
         )
 
-    @extend_schema(summary="Generovat PDF protokol")
+    @extend_schema(
+        summary="Generovat PDF protokol",
+        description=(
+            "Protokol se stejným otiskem dat (zakázka, zákazník, tým, artikly, "
+            "verze generátoru) se znovu negeneruje; `?force=true` vynutí nový."
+        ),
+    )
     @action(detail=True, methods=["post"], url_path="generate-pdf")
     def generate_pdf(self, request, pk=None):
         order = self.get_object()
         try:
-            from app_sprava_montazi.OOP_protokols import pdf_generator_classes
-
-            mandant = order.mandant
-            generator_class = pdf_generator_classes.get(
-                mandant, pdf_generator_classes["default"]
-            )
-            generator = generator_class()
+            from app_sprava_montazi.OOP_protokols import get_generator_class, get_pdf_profile
+
+            generator_class = get_generator_class(order)
+            profile = get_pdf_profile()
+            fingerprint = generator_class.fingerprint(order, profile)
+            if not _force(request) and generator_class.is_current(order, fingerprint):
+                return Response({"detail": "PDF protokol je aktuální.", "skipped": True})
+            generator = generator_class(profile=profile)
             pdf_io = generator.generate_pdf_protocol(model=order)
-            generator.save_pdf_protocol_to_db(model=order, pdf=pdf_io)
-            return Response({"detail": "PDF protokol vygenerován."})
+            generator.save_pdf_protocol_to_db(
+                model=order, pdf=pdf_io, fingerprint=fingerprint
+            )
+            return Response(
+                {"detail": "PDF protokol vygenerován.", "skipped": False, "size": len(pdf_io)}
+            )
         except Exception as e:
             return Response(
                 {"detail": f"Chyba při generování PDF: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @extend_schema(
+        summary="Hromadně generovat PDF protokoly",
+        description=(
+            "Zakázky vybere stejný filtr jako seznam (např. "
+            "`?status=Adviced&team_id=3&montage_week=2025-W14`) a založí se job; "
+            "protokoly vyrenderuje `run_protocol_worker` v poolu procesů. Aktuální "
+            "protokoly se přeskočí (`force=true` je vygeneruje znovu). Vrací 202 "
+            "a stav jobu — průběh a výsledky po zakázkách na `protocol-jobs/<id>/`."
+        ),
+        responses={202: ProtocolJobSerializer},
+    )
+    @action(detail=False, methods=["post"], url_path="generate-pdfs")
+    def generate_pdfs(self, request):
+        filters = set(self.filterset_class.base_filters) | {"search"}
+        if not filters.intersection(request.query_params):
+            return Response(
+                {"detail": "Zadejte filtr zakázek (např. status, team_id, montage_week)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        orders = self.filter_queryset(Order.objects.all())
+        count = orders.count()
+        if count > BULK_PROTOCOL_LIMIT:
+            return Response(
+                {
+                    "detail": f"Filtru odpovídá {count} zakázek, "
+                    f"najednou lze nejvýše {BULK_PROTOCOL_LIMIT}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        job = ProtocolJob.objects.create(
+            orders=list(orders.values_list("pk", flat=True)),
+            force=_force(request),
+            requested_by=request.user,
+        )
+        location = reverse("api_v1:protocol-job-detail", kwargs={"pk": job.pk})
+        return Response(
+            ProtocolJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": request.build_absolute_uri(location)},
+        )
+
+    @extend_schema(
+        summary="Zastaralé PDF protokoly",
+        description=(
+            "Zakázky (podle filtru seznamu), jejichž uložený protokol už "
+            "neodpovídá aktuálním datům — kandidáti na `generate-pdfs`. "
+            "Otisk se počítá v Pythonu, filtru proto smí odpovídat nejvýše "
+            "tolik zakázek s protokolem jako u `generate-pdfs`, jinak 400."
+        ),
+    )
+    @action(detail=False, methods=["get"], url_path="stale-protocols")
+    def stale_protocols(self, request):
+        orders = self.filter_queryset(Order.objects.all())
+        count = orders.filter(pdf__isnull=False).count()
+        if count > BULK_PROTOCOL_LIMIT:
+            return Response(
+                {
+                    "detail": f"Filtru odpovídá {count} zakázek s protokolem, "
+                    f"najednou lze zkontrolovat nejvýše {BULK_PROTOCOL_LIMIT}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        orders = stale_protocols(orders)
+        rows = orders.order_by("order_number").values(
+            "id", "order_number", "mandant", "team__name", "pdf__created"
+        )
+        return Response({"count": len(rows), "results": list(rows)})
+
     @extend_schema(summary="Stáhnout PDF protokol")
     @action(detail=True, methods=["get"], url_path="download-pdf")
     def download_pdf(self, request, pk=None):
@@ -616,42 +781,46 @@ class OrderViewSet(viewsets.ModelViewSet):
         )
         return response
 
-    @extend_schema(summary="Odeslat email s protokolem")
+    @extend_schema(
+        summary="Odeslat email s protokolem",
+        description=(
+            "Zařadí email do fronty a vrátí 202 s hlavičkou Location; "
+            "stav odeslání (Pending/Sending/Sent/Failed) je na `outbox/<id>/`."
+        ),
+        responses={202: EmailOutboxSerializer},
+    )
     @action(detail=True, methods=["post"], url_path="send-mail")
     def send_mail(self, request, pk=None):
-        import secrets
-        from django.utils import timezone
-        from app_sprava_montazi.models import OrderBackProtocolToken
+        """Zařadí email s protokolem do fronty (EmailOutbox) a vrátí 202.
 
+        Email sestaví a odešle `manage.py run_mail_worker`; datum odeslání
+        i nový token zpětného protokolu se na zakázku zapíšou až po
+        skutečném odeslání.
+        """
         order = self.get_object()
-
-        OrderBackProtocolToken.objects.filter(order=order).delete()
-        new_token = secrets.token_urlsafe(16)
-        token_obj = OrderBackProtocolToken.objects.create(
-            order=order, token=new_token
-        )
-
-        # URL pro zpětný protokol — FE URL (veřejná stránka)
-        fe_base = request.build_absolute_uri("/")
-        back_url = f"{fe_base}back-protocol?token={token_obj.token}"
-
-        email = CustomEmail(pk=order.pk, back_url=back_url, user=request.user)
-        try:
-            email.send_email_with_encrypted_pdf()
-            order.mail_datum_sended = timezone.now()
-            order.mail_team_sended = order.team.name
-            order.save()
+        if order.team is None or not order.team.email:
             return Response(
-                {
-                    "detail": f"Email odeslán týmu {order.team} na {order.team.email}."
-                }
+                {"detail": "Zakázka nemá montážní tým s emailem."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        except Exception as e:
+        if not OrderPDFStorage.objects.filter(order=order).exists():
             return Response(
-                {"detail": f"Chyba odesílání: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                {"detail": "Zakázka nemá vygenerovaný protokol."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # --- odkaz na zpětný protokol vede na FE (veřejná stránka)
+        outbox = EmailOutbox.enqueue(
+            order, request.build_absolute_uri("/"), user=request.user
+        )
+
+        location = reverse("api_v1:outbox-detail", kwargs={"pk": outbox.pk})
+        return Response(
+            EmailOutboxSerializer(outbox).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": request.build_absolute_uri(location)},
+        )
+
     @extend_schema(
         summary="Seznam zatermínovaných dopravních zakázek",
         description="Vrací order_number a evidence_termin pro Adviced + By_delivery_crew (pro bot).",
@@ -955,28 +1124,43 @@ class DashboardView(APIView):
         responses=DashboardSerializer,
     )
     def get(self, request):
-        qs = Order.objects.all()
-
         year = request.query_params.get("year")
         month = request.query_params.get("month")
         mandant = request.query_params.get("mandant")
         distrib_hub = request.query_params.get("distrib_hub")
 
+        filters = {}
         if year:
-            qs = qs.filter(evidence_termin__year=int(year))
+            filters["evidence_termin__year"] = int(year)
         if month:
-            qs = qs.filter(evidence_termin__month=int(month))
+            filters["evidence_termin__month"] = int(month)
         if mandant:
-            qs = qs.filter(mandant=mandant)
+            filters["mandant"] = mandant
         if distrib_hub:
             try:
-                qs = qs.filter(distrib_hub_id=int(distrib_hub))
+                filters["distrib_hub_id"] = int(distrib_hub)
             except (TypeError, ValueError):
                 pass
 
+        key = tuple(
+            filters.get(name)
+            for name in (
+                "evidence_termin__year",
+                "evidence_termin__month",
+                "mandant",
+                "distrib_hub_id",
+            )
+        )
+        data, hit = DashboardCache.get_or_compute(key, lambda: self._payload(filters))
+        response = Response(data)
+        response["X-Dashboard-Cache"] = "hit" if hit else "miss"
+        return response
+
+    @staticmethod
+    def _payload(filters: dict) -> dict:
+        qs = Order.objects.filter(**filters)
         dashboard = Dashboard()
 
-        is_invalid, invalid_count = dashboard.invalid_orders(qs)
         new_issues = dashboard.new_orders_issues(qs)
         customer_r = dashboard.customer_r_orders(qs)
 
@@ -990,36 +1174,42 @@ class DashboardView(APIView):
             reverse=True,
         )
 
-        data = {
-            "open_orders": dashboard.open_orders(qs),
-            "closed_orders": dashboard.closed_orders(qs),
-            "adviced_type_orders": dashboard.adviced_type_orders(qs),
-            "count_all": dashboard.all_orders(qs),
-            "hidden": dashboard.count_hidden(qs),
-            "no_montage_term_count": dashboard.no_montage_term_orders(qs),
-            "no_montage_total_count": dashboard.no_montage_total(qs),
-            "has_no_montage_term": dashboard.no_montage_term_orders(qs) > 0,
-            "is_invalid": is_invalid,
-            "invalid_count": invalid_count,
-            "finance_summary": dashboard.finance_summary(qs),
-            "new_issues_count": new_issues.count(),
-            "customer_r_count": customer_r.count(),
+        return {
+            # --- počítadla + finance z měsíčního rollupu
+            **dashboard.summary(qs, filters),
             # Detail tables (order lists for expandable sections)
-            "new_issues_orders": OrderListSerializer(new_issues[:20], many=True).data,
-            "customer_r_orders": OrderListSerializer(customer_r[:20], many=True).data,
+            "new_issues_orders": OrderListSerializer(
+                _order_list_queryset(new_issues)[:20], many=True
+            ).data,
+            "customer_r_orders": OrderListSerializer(
+                _order_list_queryset(customer_r)[:20], many=True
+            ).data,
             # Dynamic filter options
             "mandant_options": mandants,
             "year_options": years,
         }
 
-        return Response(data)
+
+class DashboardCacheStatsView(APIView):
+    """Statistiky cache dashboardu (hit/miss, aktuální verze)."""
+
+    permission_classes = [IsAdminRole]
+
+    @extend_schema(summary="Dashboard cache statistiky")
+    def get(self, request):
+        return Response(DashboardCache.stats())
 
 
 # ══════════════════════════════════════════
 # CSV Import
 # ══════════════════════════════════════════
 class CSVImportView(APIView):
-    """Import zakázek z CSV souboru."""
+    """Import zakázek z CSV souboru — jen zařazení do fronty.
+
+    Soubor se uloží jako Upload (Pending) a odpověď je hned 202; import
+    zpracuje `manage.py run_import_worker`. Průběh, počítadla a chyby
+    vrací ImportJobView.
+    """
 
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
@@ -1027,6 +1217,7 @@ class CSVImportView(APIView):
     @extend_schema(
         summary="Import CSV souboru",
         request=UploadSerializer,
+        responses={202: ImportJobSerializer},
     )
     def post(self, request):
         serializer = UploadSerializer(data=request.data)
@@ -1034,29 +1225,33 @@ class CSVImportView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         upload = serializer.save()
+        location = reverse("api_v1:csv-import-detail", kwargs={"pk": upload.pk})
+        return Response(
+            ImportJobSerializer(upload, context={"request": request}).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": request.build_absolute_uri(location)},
+        )
+
+
+class CSVImportPreviewView(APIView):
+    """Dry-run importu CSV — nové zakázky, duplicity, neznámá místa
+    určení a chybná data, bez uložení souboru i zakázek."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
 
-        # Zajistit distrib huby
-        if not DistribHub.objects.exists():
-            call_command("distrib_hub")
+    @extend_schema(summary="Náhled importu CSV (dry-run)", request=UploadSerializer)
+    def post(self, request):
+        serializer = UploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            db_count_old = Order.objects.count()
-            call_command("import_data", upload.file.path)
-            time.sleep(0.25)
-            db_count_new = Order.objects.count()
-            result = db_count_new - db_count_old
-            return Response(
-                {"detail": f"Import dokončen. {result} nových zakázek."},
-                status=status.HTTP_201_CREATED,
-            )
-        except KeyError:
-            return Response(
-                {"detail": "Špatný soubor CSV."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        except DistribHub.DoesNotExist as e:
+            # --- .file = binární BytesIO / temp soubor (UploadedFile pandas bere jako text)
+            dataset = DatasetTools.create_dataset(serializer.validated_data["file"].file)
+        except KeyError as e:
             return Response(
-                {"detail": f"Chybné místo určení: {str(e)}"},
+                {"detail": f"Špatný soubor CSV: {e.args[0]}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
         except ValueError as e:
@@ -1064,11 +1259,43 @@ class CSVImportView(APIView):
                 {"detail": f"Chyba hodnoty v souboru CSV: {str(e)}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        except Exception as e:
-            return Response(
-                {"detail": f"Neznámá chyba: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return Response(DatasetTools.preview(dataset))
+
+
+class ImportJobView(generics.RetrieveAPIView):
+    """Stav importu CSV — průběh, počítadla podle kategorií, chyba."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Upload.objects.all()
+    serializer_class = ImportJobSerializer
+
+    @extend_schema(summary="Stav importu CSV")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class ProtocolJobView(generics.RetrieveAPIView):
+    """Stav hromadného generování protokolů (generate-pdfs)."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = ProtocolJob.objects.all()
+    serializer_class = ProtocolJobSerializer
+
+    @extend_schema(summary="Stav hromadného generování protokolů")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class EmailOutboxView(generics.RetrieveAPIView):
+    """Stav emailu s protokolem ve frontě (send-mail)."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = EmailOutbox.objects.all()
+    serializer_class = EmailOutboxSerializer
+
+    @extend_schema(summary="Stav odeslání emailu s protokolem")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 # ══════════════════════════════════════════
@@ -1,9 +1,13 @@
+import time
+
 from rich.console import Console
-from django.db.models import Q, Sum, F, Value, DecimalField
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q, Sum, F, Value, DecimalField
 from django.db.models.functions import Coalesce
 
 # --- models
-from .models import Order, Status, TeamType
+from .models import Order, OrderMonthlyStats, Status, TeamType
 
 # utils
 from .utils import call_errors_adviced
@@ -12,43 +16,187 @@ from .utils import call_errors_adviced
 cons: Console = Console()
 # ---
 
+DECIMAL_FIELD = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(0, output_field=DECIMAL_FIELD)
+
+# --- podmínky sdílené počítadly (viz Dashboard.AGGREGATES)
+NOT_HIDDEN = ~Q(status=Status.HIDDEN)
+# --- výčtem (ne NOT IN) — jde použít index / partial index order_no_montage_idx
+OPEN = Q(status__in=[Status.NEW, Status.ADVICED, Status.REALIZED])
+ADVICED_BY_ASSEMBLY = Q(status=Status.ADVICED, team_type=TeamType.BY_ASSEMBLY_CREW)
+# --- stejné podmínky jako utils.call_errors_adviced
+ADVICED_ERRORS = ADVICED_BY_ASSEMBLY & (
+    Q(mail_datum_sended__isnull=True)
+    | (
+        Q(mail_datum_sended__isnull=False, team__name__isnull=False)
+        & ~Q(team__name=F("mail_team_sended"))
+    )
+    | Q(team__active=False)
+)
+# --- stejné podmínky jako Dashboard.new_orders_issues / customer_r_orders
+NEW_ISSUES = Q(status=Status.NEW) & (
+    Q(delivery_termin__isnull=True)
+    | Q(team__isnull=True, team_type=TeamType.BY_ASSEMBLY_CREW)
+    | Q(client__isnull=True)
+    | Q(client__incomplete=True)
+)
+CUSTOMER_R = NOT_HIDDEN & Q(
+    team_type=TeamType.BY_CUSTOMER, order_number__iendswith="-r", status=Status.NEW
+)
+
+
+def _sum(field: str):
+    return Coalesce(
+        Sum(Coalesce(field, ZERO), filter=NOT_HIDDEN), ZERO, output_field=DECIMAL_FIELD
+    )
+
+
+def _rollup_sum(field: str, condition: Q):
+    return Coalesce(Sum(field, filter=condition), 0)
+
 
 class Dashboard:
+    # --- všechna počítadla jako filtrované agregace nad jedním průchodem Order
+    AGGREGATES = {
+        "nove": lambda: Count("pk", filter=Q(status=Status.NEW)),
+        "zaterminovane": lambda: Count("pk", filter=Q(status=Status.ADVICED)),
+        "realizovane": lambda: Count("pk", filter=Q(status=Status.REALIZED)),
+        "vyuctovane": lambda: Count("pk", filter=Q(status=Status.BILLED)),
+        "zrusene": lambda: Count("pk", filter=Q(status=Status.CANCELED)),
+        "montazni": lambda: Count("pk", filter=ADVICED_BY_ASSEMBLY),
+        "dopravni": lambda: Count(
+            "pk", filter=Q(status=Status.ADVICED, team_type=TeamType.BY_DELIVERY_CREW)
+        ),
+        "count_all": lambda: Count("pk", filter=NOT_HIDDEN),
+        "hidden": lambda: Count("pk", filter=Q(status=Status.HIDDEN)),
+        "no_montage_total": lambda: Count("pk", filter=OPEN),
+        "no_montage_term": lambda: Count(
+            "pk", filter=OPEN & Q(montage_termin__isnull=True)
+        ),
+        "invalid": lambda: Count("pk", filter=ADVICED_ERRORS),
+        "new_issues": lambda: Count("pk", filter=NEW_ISSUES),
+        "customer_r": lambda: Count("pk", filter=CUSTOMER_R),
+        "total_vynos": lambda: _sum("vynos"),
+        "total_naklad": lambda: _sum("naklad"),
+    }
+
+    # --- filtry Order → sloupce OrderMonthlyStats
+    ROLLUP_FILTERS = {
+        "evidence_termin__year": "year",
+        "evidence_termin__month": "month",
+        "mandant": "mandant",
+        "distrib_hub_id": "distrib_hub_id",
+    }
+    # --- počítadla, která jdou spočítat z rollupu (podmínky jen přes status/team_type)
+    ROLLUP_AGGREGATES = {
+        "nove": lambda: _rollup_sum("order_count", Q(status=Status.NEW)),
+        "zaterminovane": lambda: _rollup_sum("order_count", Q(status=Status.ADVICED)),
+        "realizovane": lambda: _rollup_sum("order_count", Q(status=Status.REALIZED)),
+        "vyuctovane": lambda: _rollup_sum("order_count", Q(status=Status.BILLED)),
+        "zrusene": lambda: _rollup_sum("order_count", Q(status=Status.CANCELED)),
+        "montazni": lambda: _rollup_sum("order_count", ADVICED_BY_ASSEMBLY),
+        "dopravni": lambda: _rollup_sum(
+            "order_count", Q(status=Status.ADVICED, team_type=TeamType.BY_DELIVERY_CREW)
+        ),
+        "count_all": lambda: _rollup_sum("order_count", NOT_HIDDEN),
+        "hidden": lambda: _rollup_sum("order_count", Q(status=Status.HIDDEN)),
+        "no_montage_total": lambda: _rollup_sum("order_count", OPEN),
+        "no_montage_term": lambda: _rollup_sum("no_montage_count", OPEN),
+        "total_vynos": lambda: Coalesce(
+            Sum("vynos", filter=NOT_HIDDEN), ZERO, output_field=DECIMAL_FIELD
+        ),
+        "total_naklad": lambda: Coalesce(
+            Sum("naklad", filter=NOT_HIDDEN), ZERO, output_field=DECIMAL_FIELD
+        ),
+    }
+
     @staticmethod
-    def open_orders(qs=None) -> dict[str, int]:
+    def aggregate_rollup(filters: dict, qs=None) -> dict:
+        """Počítadla z OrderMonthlyStats (O(měsíců)) + zbytek z Order.
+
+        Chyby zatermínovaných, nové s chybějícími údaji a -R zakázky
+        závisí na týmu/zákazníkovi/čísle zakázky — ty se dopočítají
+        z Order, ale jen nad stavy NEW/ADVICED.
+        """
+        stats = OrderMonthlyStats.objects.filter(
+            **{Dashboard.ROLLUP_FILTERS[name]: value for name, value in filters.items()}
+        )
+        agg = stats.aggregate(
+            **{key: expr() for key, expr in Dashboard.ROLLUP_AGGREGATES.items()}
+        )
+        base = qs if qs is not None else Order.objects.filter(**filters)
+        rest = [key for key in Dashboard.AGGREGATES if key not in agg]
+        agg.update(
+            Dashboard.aggregate(
+                base.filter(status__in=[Status.NEW, Status.ADVICED]), rest
+            )
+        )
+        return agg
+
+    @staticmethod
+    def aggregate(qs=None, keys=None) -> dict:
+        """Spočítá vybraná počítadla (výchozí = všechna) jedním dotazem."""
         base = qs if qs is not None else Order.objects.all()
-        status_new = base.filter(status=Status.NEW).count()
-        status_adviced = base.filter(status=Status.ADVICED).count()
-        status_realized = base.filter(status=Status.REALIZED).count()
+        keys = keys if keys is not None else Dashboard.AGGREGATES.keys()
+        return base.order_by().aggregate(
+            **{key: Dashboard.AGGREGATES[key]() for key in keys}
+        )
+
+    @staticmethod
+    def summary(qs=None, filters=None) -> dict:
+        """Všechna čísla pro DashboardView.
+
+        S `filters` (jen year/month/mandant/distrib_hub, viz ROLLUP_FILTERS)
+        se čte měsíční rollup, jinak jeden aggregate() nad `qs`.
+        """
+        if filters is not None and set(filters) <= set(Dashboard.ROLLUP_FILTERS):
+            agg = Dashboard.aggregate_rollup(filters, qs)
+        else:
+            agg = Dashboard.aggregate(qs)
         return {
-            "nove": status_new,
-            "zaterminovane": status_adviced,
-            "realizovane": status_realized,
+            "open_orders": {
+                "nove": agg["nove"],
+                "zaterminovane": agg["zaterminovane"],
+                "realizovane": agg["realizovane"],
+            },
+            "closed_orders": {
+                "vyuctovane": agg["vyuctovane"],
+                "zrusene": agg["zrusene"],
+            },
+            "adviced_type_orders": {
+                "montazni": agg["montazni"],
+                "dopravni": agg["dopravni"],
+            },
+            "count_all": agg["count_all"],
+            "hidden": agg["hidden"],
+            "no_montage_term_count": agg["no_montage_term"],
+            "no_montage_total_count": agg["no_montage_total"],
+            "has_no_montage_term": agg["no_montage_term"] > 0,
+            "is_invalid": agg["invalid"] > 0,
+            "invalid_count": agg["invalid"],
+            "finance_summary": Dashboard._finance(agg),
+            "new_issues_count": agg["new_issues"],
+            "customer_r_count": agg["customer_r"],
         }
 
+    @staticmethod
+    def _finance(agg: dict) -> dict:
+        vynos = float(agg.get("total_vynos") or 0)
+        naklad = float(agg.get("total_naklad") or 0)
+        profit = vynos - naklad
+        return {"vynos": round(vynos, 2), "naklad": round(naklad, 2), "profit": round(profit, 2)}
+
+    @staticmethod
+    def open_orders(qs=None) -> dict[str, int]:
+        return Dashboard.aggregate(qs, ["nove", "zaterminovane", "realizovane"])
+
     @staticmethod
     def closed_orders(qs=None) -> dict[str, int]:
-        base = qs if qs is not None else Order.objects.all()
-        status_billed = base.filter(status=Status.BILLED).count()
-        status_canceled = base.filter(status=Status.CANCELED).count()
-        return {
-            "vyuctovane": status_billed,
-            "zrusene": status_canceled,
-        }
+        return Dashboard.aggregate(qs, ["vyuctovane", "zrusene"])
 
     @staticmethod
     def adviced_type_orders(qs=None) -> dict[str, int]:
-        base = qs if qs is not None else Order.objects.all()
-        status_adviced_by_assembly = base.filter(
-            status=Status.ADVICED, team_type=TeamType.BY_ASSEMBLY_CREW
-        ).count()
-        status_adviced_by_delivery = base.filter(
-            status=Status.ADVICED, team_type=TeamType.BY_DELIVERY_CREW
-        ).count()
-        return {
-            "montazni": status_adviced_by_assembly,
-            "dopravni": status_adviced_by_delivery,
-        }
+        return Dashboard.aggregate(qs, ["montazni", "dopravni"])
 
     @staticmethod
     def invalid_orders(qs=None) -> tuple[bool, int]:
@@ -57,9 +205,7 @@ class Dashboard:
 
     @staticmethod
     def all_orders(qs=None) -> int:
-        base = qs if qs is not None else Order.objects.all()
-        count = base.exclude(status=Status.HIDDEN).count()
-        return count
+        return Dashboard.aggregate(qs, ["count_all"])["count_all"]
 
     @staticmethod
     def no_montage_total(qs=None) -> int:
@@ -67,25 +213,18 @@ class Dashboard:
         Excludes HIDDEN and closed (BILLED, CANCELED) statuses.
         Respects provided queryset filtering.
         """
-        base = qs if qs is not None else Order.objects.all()
-        base = base.exclude(status__in=[Status.HIDDEN, Status.BILLED, Status.CANCELED])
-        return base.count()
+        return Dashboard.aggregate(qs, ["no_montage_total"])["no_montage_total"]
 
     @staticmethod
     def count_hidden(qs=None) -> int:
-        base = qs if qs is not None else Order.objects.all()
-        count = base.filter(status=Status.HIDDEN).count()
-        return count
+        return Dashboard.aggregate(qs, ["hidden"])["hidden"]
 
     @staticmethod
     def no_montage_term_orders(qs=None) -> int:
         """Count orders where montage_termin is not set, excluding HIDDEN and closed (BILLED, CANCELED).
         Respects provided queryset filtering (evidence_termin filter from form).
         """
-        base = qs if qs is not None else Order.objects.all()
-        base = base.exclude(status__in=[Status.HIDDEN, Status.BILLED, Status.CANCELED])
-        count = base.filter(montage_termin__isnull=True).count()
-        return count
+        return Dashboard.aggregate(qs, ["no_montage_term"])["no_montage_term"]
 
     @staticmethod
     def new_orders_issues(qs=None):
@@ -96,16 +235,8 @@ class Dashboard:
         Respects provided queryset filtering (evidence_termin filter from form).
         """
         base = qs if qs is not None else Order.objects.all()
-        base = base.filter(status=Status.NEW)
-
-        cond_missing_delivery = Q(delivery_termin__isnull=True)
-        cond_missing_team = Q(team__isnull=True, team_type=TeamType.BY_ASSEMBLY_CREW)
-        cond_incomplete_client = Q(client__isnull=True) | Q(client__incomplete=True)
-
         queryset = (
-            base.filter(
-                cond_missing_delivery | cond_missing_team | cond_incomplete_client
-            )
+            base.filter(NEW_ISSUES)
             .select_related("client", "team", "distrib_hub")
             .distinct()
         )
@@ -117,14 +248,9 @@ class Dashboard:
         and status NEW. Excludes HIDDEN. Respects provided queryset filtering.
         """
         base = qs if qs is not None else Order.objects.all()
-        base = base.exclude(status=Status.HIDDEN)
         queryset = (
-            base.filter(
-                team_type=TeamType.BY_CUSTOMER,
-                order_number__iendswith="-r",
-                status=Status.NEW,
-            )
-            .select_related("client")
+            base.filter(CUSTOMER_R)
+            .select_related("client", "team", "distrib_hub")
             .order_by("-evidence_termin")
         )
         return queryset
@@ -137,17 +263,80 @@ class Dashboard:
         - Excludes HIDDEN orders
         - Treats NULL as 0 using Coalesce
         """
-        base = qs if qs is not None else Order.objects.all()
-        base = base.exclude(status=Status.HIDDEN)
+        return Dashboard._finance(Dashboard.aggregate(qs, ["total_vynos", "total_naklad"]))
 
-        zero = Value(0, output_field=DecimalField(max_digits=14, decimal_places=2))
-        decimal_field = DecimalField(max_digits=14, decimal_places=2)
 
-        agg = base.aggregate(
-            total_vynos=Coalesce(Sum(Coalesce("vynos", zero)), zero, output_field=decimal_field),
-            total_naklad=Coalesce(Sum(Coalesce("naklad", zero)), zero, output_field=decimal_field),
-        )
-        vynos = float(agg.get("total_vynos") or 0)
-        naklad = float(agg.get("total_naklad") or 0)
-        profit = vynos - naklad
-        return {"vynos": round(vynos, 2), "naklad": round(naklad, 2), "profit": round(profit, 2)}
+class DashboardCache:
+    """Cache payloadu DashboardView podle filtrů (year, month, mandant, distrib_hub).
+
+    Klíč obsahuje globální "orders version" — zápis do Order/Team/Client
+    (viz signals.py) verzi změní a staré payloady se už nikdy nepřečtou
+    (doběhnou přes timeout). Verze je time_ns, ne incr — souběžné zápisy
+    z více procesů se tak nemůžou "slít" do jedné hodnoty.
+    """
+
+    alias = "dashboard"
+    timeout = 60 * 60
+    VERSION_KEY = "dashboard:orders_version"
+    HITS_KEY = "dashboard:hits"
+    MISSES_KEY = "dashboard:misses"
+
+    @classmethod
+    def cache(cls):
+        return caches[cls.alias]
+
+    @classmethod
+    def version(cls) -> int:
+        version = cls.cache().get(cls.VERSION_KEY)
+        return version if version is not None else cls.bump()
+
+    @classmethod
+    def bump(cls) -> int:
+        version = time.time_ns()
+        cls.cache().set(cls.VERSION_KEY, version, None)
+        return version
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Změna dat — bump hned i po commitu.
+
+        Okamžitý bump zneplatní cache v rámci procesu, ten po commitu
+        zahodí payload, který mezitím někdo spočítal ze starých dat.
+        """
+        cls.bump()
+        transaction.on_commit(cls.bump)
+
+    @classmethod
+    def key(cls, filters: tuple) -> str:
+        parts = ":".join("" if value is None else str(value) for value in filters)
+        return f"dashboard:{cls.version()}:{parts}"
+
+    @classmethod
+    def _count(cls, key: str) -> None:
+        cache = cls.cache()
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None) or cache.incr(key)
+
+    @classmethod
+    def get_or_compute(cls, filters: tuple, compute) -> tuple[dict, bool]:
+        """Vrátí (payload, hit)."""
+        key = cls.key(filters)
+        payload = cls.cache().get(key)
+        if payload is not None:
+            cls._count(cls.HITS_KEY)
+            return payload, True
+        cls._count(cls.MISSES_KEY)
+        payload = compute()
+        cls.cache().set(key, payload, cls.timeout)
+        return payload, False
+
+    @classmethod
+    def stats(cls) -> dict:
+        cache = cls.cache()
+        return {
+            "version": cls.version(),
+            "hits": cache.get(cls.HITS_KEY, 0),
+            "misses": cache.get(cls.MISSES_KEY, 0),
+        }
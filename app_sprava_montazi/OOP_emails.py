@@ -1,8 +1,8 @@
 """Emails"""
 
-import os
 import secrets
 import string
+from io import BytesIO
 from pathlib import Path
 from dataclasses import dataclass
 import dotenv
@@ -46,7 +46,8 @@ class CustomEmail:
         return f"Montážní protokol: {order.order_number.upper()}"
 
     def dispecert_email_address(self, user) -> str:
-        return user.email
+        # --- email z fronty: dispečer mohl být mezitím smazán
+        return user.email if user is not None else self.cfg.from_email
 
     def email_body(self, pdf_password: str | None = None) -> str:
         """HTML tělo emailu"""
@@ -109,11 +110,19 @@ class CustomEmail:
         order: Order = self.order
         return [order.team.email]  # type: ignore
 
-    def get_pdf_paths(self) -> list[str]:
-        """Cesty k PDF přílohám"""
+    def get_encrypted_pdfs(self, password: str) -> list[tuple[str, bytes]]:
+        """Zašifrované PDF přílohy (název, obsah) — v paměti, bez dočasných souborů
+
+        Šifrují se uložené bajty protokolu — příloha je přesně uložený protokol.
+        Render rovnou se šifrou reportlabu by byl pomalejší (RC4 v čistém
+        Pythonu), viz scripts/benchmark_encrypted_pdf.py.
+        """
         order: Order = self.order
         pdf_file = get_object_or_404(OrderPDFStorage, order=order)
-        return [pdf_file.file.path]
+        filename = f"{Path(pdf_file.file.name).stem}_encrypted.pdf"
+        with pdf_file.file.open("rb") as f:
+            pdf = Utility.encrypt_pdf(f.read(), password)
+        return [(filename, pdf)]
 
     def send_email_with_encrypted_pdf(self) -> None:
         """Odeslání emailu s zašifrovaným PDF jako přílohou.
@@ -132,15 +141,8 @@ class CustomEmail:
         email.attach_alternative(self.email_body(pdf_password=password), "text/html")
 
         # Přidání zašifrovaných PDF příloh
-        for file_path in self.get_pdf_paths():
-            encrypted_path = Utility.encrypt_pdf(file_path, password)
-            with open(encrypted_path, "rb") as f:
-                email.attach(
-                    filename=os.path.basename(encrypted_path),
-                    content=f.read(),
-                    mimetype="application/pdf",
-                )
-            os.remove(encrypted_path)
+        for filename, pdf in self.get_encrypted_pdfs(password):
+            email.attach(filename=filename, content=pdf, mimetype="application/pdf")
 
         try:
             email.send()
@@ -156,27 +158,20 @@ class Utility:
     """Pomocné funkce pro odesílání emailů"""
 
     @staticmethod
-    def encrypt_pdf(input_pdf_path: str, password: str) -> str:
+    def encrypt_pdf(pdf: bytes, password: str) -> bytes:
         """
-        Zašifruje PDF a vrátí cestu k zašifrovanému souboru
+        Zašifruje PDF (bajty) a vrátí zašifrované bajty — nic nezapisuje na disk
         """
-        input_path = Path(input_pdf_path)
-        reader = PdfReader(input_path)
+        reader = PdfReader(BytesIO(pdf))
         writer = PdfWriter()
 
         for page in reader.pages:
             writer.add_page(page)
 
         writer.encrypt(password)
-
-        encrypted_path = input_path.with_name(
-            f"{input_path.stem}_encrypted{input_path.suffix}"
-        )
-
-        with open(encrypted_path, "wb") as f:
-            writer.write(f)
-
-        return str(encrypted_path)
+        output = BytesIO()
+        writer.write(output)
+        return output.getvalue()
 
 
 if __name__ == "__main__":
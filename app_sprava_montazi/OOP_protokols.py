@@ -1,7 +1,11 @@
 """protokols to pdf"""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from hashlib import sha256
+from itertools import groupby
+import json
 import os
+import threading
 from abc import ABC, abstractmethod
 from io import BytesIO
 from pathlib import Path
@@ -13,20 +17,52 @@ from django.core.files.base import ContentFile
 from django.conf import settings
 from reportlab.lib.colors import Color, HexColor
 from reportlab.lib.pagesizes import A4
-from reportlab.graphics.barcode import qr
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics import renderPDF
+from reportlab.graphics.barcode.qrencoder import QRCode, QRErrorCorrectLevel
 from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen.canvas import Canvas
 from rich.console import Console
-from .models import Article, OrderPDFStorage
+from . import reportlab_compat
+from .models import OrderPDFStorage
 
 # ---
 cons: Console = Console()
 
 
 # ---
+@dataclass(frozen=True)
+class PdfProfile:
+    """Výstupní profil PDF protokolů (settings.PDF_PROTOCOL_PROFILE)
+
+    Komprese obsahu stránek, subsety fontů Roboto (jen použité znaky)
+    a jedno sdílené logo (PdfResources, statická vrstva) má každý profil.
+    "flate" navíc vynechá ASCII85 obal binárních streamů (obsah stránek,
+    logo) a logo kóduje s PNG prediktorem — bezztrátově, protokol je zhruba
+    o 12 % menší (scripts/benchmark_pdf_size.py). Fonty (~3 × 13 kB) jsou
+    v obou profilech stejné.
+    """
+
+    name: str
+    page_compression: bool = True  # --- Flate obsahu stránek
+    ascii85: bool = True  # --- ASCII85 obal binárních streamů (+25 %)
+    png_predictor: bool = False  # --- obrázky jako Flate s PNG prediktorem
+
+
+PDF_PROFILES: dict[str, PdfProfile] = {
+    "standard": PdfProfile("standard"),
+    "flate": PdfProfile("flate", ascii85=False, png_predictor=True),
+}
+
+
+def get_pdf_profile(name: str | None = None) -> PdfProfile:
+    name = name or getattr(settings, "PDF_PROTOCOL_PROFILE", "standard")
+    try:
+        return PDF_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Neznámý profil PDF: {name} ({', '.join(PDF_PROFILES)})")
+
+
 @dataclass(frozen=True)
 class PdfConfig:
     font_size_small: float = 7.6
@@ -48,6 +84,7 @@ class PdfConfig:
     zone_2: int = 379
     zone_3: int = 470
     zone_4: int = 470
+    profile: PdfProfile = field(default_factory=get_pdf_profile)
 
 
 @dataclass(frozen=True)
@@ -59,16 +96,202 @@ class CompanyInfo:
     ref: str = "Zapsaná v OR: C 120048, Městský soud v Praze."
 
 
+class PdfResources:
+    """Fonty a obrázky protokolů — načtou se jednou za proces.
+
+    Parsování TTF fontů a kódování loga (PNG → Flate + ASCII85) dřív běželo
+    znovu pro každý protokol a bylo dražší než samotné kreslení. wsgi.py volá
+    `preload()`, takže s `gunicorn --preload` se zdroje načtou v masteru
+    před forkem a workery je sdílí.
+
+    Vkládání obrázků z cache jde přes reportlab_compat — s neověřenou verzí
+    reportlabu kreslí `draw_image` obyčejným `cvs.drawImage`.
+    """
+
+    FONT_DIR: Path = settings.BASE_DIR / "files"
+    FONTS: dict[str, Path] = {
+        "Roboto-Regular": FONT_DIR / "Roboto-Regular.ttf",
+        "Roboto-Light": FONT_DIR / "Roboto-Light.ttf",
+        "Roboto-Semibold": FONT_DIR / "Roboto-Semibold.ttf",
+    }
+    IMAGES: tuple[str, ...] = ("rhenus_logo.png",)
+
+    _lock = threading.Lock()
+    # --- (soubor, PNG prediktor, ASCII85) → XObject
+    _images: dict[tuple[Path, bool, bool], PDFImageXObject] = {}
+    # --- jméno XObjectu v dokumentu → soubor
+    _paths: dict[str, Path] = {}
+
+    @classmethod
+    def register_fonts(cls) -> None:
+        """Registruje fonty do reportlabu, už registrované přeskočí"""
+        registered = set(pdfmetrics.getRegisteredFontNames())
+        if registered.issuperset(cls.FONTS):
+            return
+        with cls._lock:
+            for name, path in cls.FONTS.items():
+                if name not in pdfmetrics.getRegisteredFontNames():
+                    pdfmetrics.registerFont(TTFont(name, str(path)))
+
+    @classmethod
+    def image(cls, path: Path, profile: PdfProfile | None = None) -> PDFImageXObject:
+        """Zakódovaný obrázek (XObject) z cache procesu"""
+        profile = profile or get_pdf_profile()
+        key = (path, profile.png_predictor, profile.png_predictor or profile.ascii85)
+        img = cls._images.get(key)
+        if img is None:
+            with cls._lock:
+                img = cls._images.get(key)
+                if img is None:
+                    img = reportlab_compat.image_xobject(path, *key[1:])
+                    cls._images[key] = img
+        return img
+
+    @classmethod
+    def register_image(
+        cls, cvs: Canvas, path: Path, profile: PdfProfile | None = None
+    ) -> str:
+        """Vloží obrázek z cache do dokumentu, vrací jméno XObjectu
+
+        Jméno je stejné, jaké si drawImage spočítá z cesty — drawImage
+        pak obrázek v dokumentu najde a jen na něj odkáže.
+        """
+        name = reportlab_compat.image_name(path)
+        cls._paths[name] = path
+        reportlab_compat.add_image(cvs, name, cls.image(path, profile))
+        return name
+
+    @classmethod
+    def image_path(cls, name: str) -> Path | None:
+        return cls._paths.get(name)
+
+    @classmethod
+    def draw_image(
+        cls,
+        cvs: Canvas,
+        path: Path,
+        width: float,
+        height: float,
+        x: float,
+        y: float,
+        profile: PdfProfile | None = None,
+    ) -> None:
+        """Jako `cvs.drawImage(path, ...)`, ale bez kódování obrázku pro každé PDF"""
+        if reportlab_compat.INTERNALS_SUPPORTED:
+            cls.register_image(cvs, path, profile)
+        cvs.drawImage(image=path, width=width, height=height, x=x, y=y)
+
+    @classmethod
+    def preload(cls) -> None:
+        """Načte všechny zdroje (volá se při startu procesu)"""
+        cls.register_fonts()
+        if not reportlab_compat.INTERNALS_SUPPORTED:
+            return
+        for img_name in cls.IMAGES:
+            cls.image(PdfConfig.files / img_name)
+        for generator_class in pdf_generator_classes.values():
+            PageTemplate.get(generator_class)
+
+
+class PageTemplate:
+    """Statická vrstva protokolu (form XObject) — vykreslí se jednou za proces.
+
+    Hlavička, formulář mandanta a patička jsou pro všechny zakázky stejné;
+    dřív se pro každý protokol kreslily stovkami volání canvasu. Šablona
+    se pro třídu generátoru vykreslí jednou do formu, pro každé PDF se
+    form jen vloží do dokumentu (`install`) a stránka na něj odkáže.
+
+    Obsah formu se komprimuje jednou (jen Flate, bez ASCII85), takže PDF
+    je i o něco menší.
+
+    Text formu je kódovaný do subsetů TTF fontů dokumentu, ve kterém se
+    kreslil — `install` proto musí proběhnout na čistém canvasu, dřív než
+    se cokoliv nakreslí: převezme stav subsetů ze šablony a data zakázky
+    pak jen přidávají další znaky.
+
+    Šablona stojí na interním API reportlabu (reportlab_compat); s neověřenou
+    verzí ji PdfGenerator nepoužije a statickou vrstvu kreslí na každou stránku.
+    """
+
+    NAME: str = "StaticLayer"
+
+    _lock = threading.Lock()
+    _templates: dict[type, "PageTemplate"] = {}
+
+    def __init__(
+        self, bbox: tuple[float, ...], content: bytes, fonts: list, images: list[Path]
+    ) -> None:
+        self.bbox: tuple[float, ...] = bbox
+        self.content: bytes = content
+        # --- [(TTFont, TTFont.State)] v pořadí, v jakém je dokument registroval
+        self.fonts: list = fonts
+        self.images: list[Path] = images
+
+    @classmethod
+    def get(cls, generator_class: type) -> "PageTemplate":
+        template = cls._templates.get(generator_class)
+        if template is None:
+            with cls._lock:
+                template = cls._templates.get(generator_class)
+                if template is None:
+                    template = cls.render(generator_class)
+                    cls._templates[generator_class] = template
+        return template
+
+    @classmethod
+    def render(cls, generator_class: type) -> "PageTemplate":
+        generator = generator_class(use_template=False)
+        cvs = generator.cvs
+        cvs.beginForm(cls.NAME)
+        # --- form začíná s výchozím stavem, barvu rámečků nastavuje Section na stránce
+        cvs.setStrokeColor(generator.cfg.border_clr)
+        generator.static_layer()
+        # --- obrázky formu — jen z PdfResources, jiné by install nevložil
+        images = [
+            PdfResources.image_path(name) for name in reportlab_compat.forms_in_use(cvs)
+        ]
+        if None in images:
+            raise ValueError("statická vrstva smí kreslit obrázky jen přes PdfResources")
+        cvs.endForm()
+
+        bbox, content = reportlab_compat.form_content(cvs, cls.NAME)
+        return cls(bbox, content, reportlab_compat.font_states(cvs), images)
+
+    def install(self, cvs: Canvas, profile: PdfProfile | None = None) -> None:
+        """Vloží form do dokumentu čistého canvasu"""
+        reportlab_compat.install_font_states(cvs, self.fonts)
+        names = [PdfResources.register_image(cvs, path, profile) for path in self.images]
+        reportlab_compat.add_form(cvs, self.NAME, self.bbox, self.content, names)
+
+
 class PdfGenerator(ABC):
     """PDF generator"""
 
-    def __init__(self) -> None:
+    # --- verze výstupu — zvýšit při každé změně vzhledu nebo obsahu protokolu,
+    # --- jinak se uložené protokoly podle otisku považují za aktuální
+    VERSION: int = 1
+
+    def __init__(
+        self,
+        use_template: bool = True,
+        profile: PdfProfile | None = None,
+    ) -> None:
         # --- config ---
-        self.cfg: PdfConfig = PdfConfig()
+        self.cfg: PdfConfig = PdfConfig(profile=profile or get_pdf_profile())
         # --- pro reportlab
         Utility.font_register()
         self.buffer = BytesIO()
-        self.cvs: Canvas = Canvas(self.buffer, pagesize=A4)
+        self.cvs: Canvas = Canvas(
+            self.buffer,
+            pagesize=A4,
+            pageCompression=int(self.cfg.profile.page_compression),
+        )
+        # --- statická vrstva předrenderovaná jednou za proces
+        # --- (jen s ověřenou verzí reportlabu, jinak se kreslí na stránku)
+        self.template: PageTemplate | None = None
+        if use_template and reportlab_compat.INTERNALS_SUPPORTED:
+            self.template = PageTemplate.get(type(self))
+            self.template.install(self.cvs, self.cfg.profile)
         # --- subclassy
         self.utils: Utility = Utility(self.cfg, self.cvs, self.buffer)
         self.section: Section = Section(self)
@@ -79,7 +302,66 @@ class PdfGenerator(ABC):
     def generate_pdf_protocol(self, model) -> bytes:
         pass
 
-    def save_pdf_protocol_to_db(self, model, pdf: bytes) -> bool:
+    @abstractmethod
+    def static_layer(self) -> None:
+        """Část stránky stejná pro všechny zakázky (hlavička, formulář, patička)"""
+
+    def draw_static_layer(self) -> None:
+        if self.template is None:
+            self.static_layer()
+        else:
+            self.cvs.doForm(PageTemplate.NAME)
+
+    @classmethod
+    def fingerprint(cls, model, profile: PdfProfile | None = None) -> str:
+        """Otisk dat protokolu — zakázka, zákazník, tým, artikly, verze generátoru a profil
+
+        Jen pole, která protokol vykresluje (změna stavu zakázky protokol
+        nemění). Zakázka má mít načtené client, team a articles. `profile`
+        musí být ten, se kterým se protokol renderuje (`cfg.profile`);
+        None = výchozí profil jako v __init__.
+        """
+        profile = profile or get_pdf_profile()
+        client = model.client
+        data = {
+            "generator": [cls.__name__, cls.VERSION, profile.name],
+            "order": [
+                model.order_number,
+                model.mandant,
+                model.montage_termin,
+                model.notes,
+            ],
+            "client": [
+                client.name,
+                client.street,
+                client.zip_code,
+                client.city,
+                client.phone,
+                client.email,
+            ],
+            "team": str(model.team) if model.team else None,
+            "articles": [
+                [article.name, article.quantity, article.note]
+                for article in model.articles.all()
+            ],
+        }
+        return sha256(json.dumps(data, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def is_current(model, fingerprint: str) -> bool:
+        """Uložený protokol má stejný otisk a soubor existuje — není co generovat"""
+        try:
+            stored = model.pdf
+        except ObjectDoesNotExist:
+            return False
+        return (
+            stored.fingerprint == fingerprint
+            and bool(stored.file)
+            and stored.file.storage.exists(stored.file.name)
+        )
+
+    @staticmethod
+    def save_pdf_protocol_to_db(model, pdf: bytes, fingerprint: str = "") -> bool:
         pdf_content = ContentFile(pdf)
         filename = f"order_{model.order_number.upper()}.pdf"
         pdf_content.name = filename
@@ -94,12 +376,14 @@ class PdfGenerator(ABC):
 
             # Změň tým (pokud třeba)
             pdf_file.team = model.team.name if model.team else "Neznámý tým"
+            pdf_file.fingerprint = fingerprint
 
         except OrderPDFStorage.DoesNotExist:
             # Vytvoř nový
             pdf_file = OrderPDFStorage(
                 order=model,
                 team=model.team.name if model.team else "Neznámý tým",
+                fingerprint=fingerprint,
             )
             created = True
 
@@ -367,7 +651,8 @@ class Section:
         # --- notes
         utils.draw_txt(f"{order.notes[:140]}", y_offset=228, font="Roboto-Light")
         # --- articles
-        articles = Article.objects.filter(order=order)
+        # --- order.articles — využije prefetch (hromadné generování bez dotazů)
+        articles = order.articles.all()
         offset: float = 346.0
         # ---
         for article in articles:
@@ -596,19 +881,13 @@ class Utility:
         self.cvs = cvs
         self.buffer = buffer
 
-    FONT_DIR: Path = settings.BASE_DIR / "files"
-    FONTS: dict[str, Path] = {
-        "Roboto-Regular": FONT_DIR / "Roboto-Regular.ttf",
-        "Roboto-Light": FONT_DIR / "Roboto-Light.ttf",
-        "Roboto-Semibold": FONT_DIR / "Roboto-Semibold.ttf",
-    }
+    FONT_DIR: Path = PdfResources.FONT_DIR
+    FONTS: dict[str, Path] = PdfResources.FONTS
 
     @staticmethod
     def font_register() -> None:
-        """Registrujeme fonty do pameti pro reportlab"""
-        for name, path_obj in Utility.FONTS.items():
-            font_path_str = str(path_obj)
-            pdfmetrics.registerFont(TTFont(name, font_path_str))
+        """Registrujeme fonty do pameti pro reportlab (jednou za proces)"""
+        PdfResources.register_fonts()
 
     def cross(self, x: int, y: int, size: int) -> None:
         cvs = self.cvs
@@ -671,12 +950,14 @@ class Utility:
         self, img_name: str, img_width: float, img_height: float, x: float, y: float
     ) -> None:
         """Place image"""
-        self.cvs.drawImage(
-            image=self.cfg.files / img_name,
+        PdfResources.draw_image(
+            self.cvs,
+            self.cfg.files / img_name,
             width=img_width,
             height=img_height,
             x=x,
             y=y,
+            profile=self.cfg.profile,
         )
 
     def watermark(self, text):
@@ -691,26 +972,49 @@ class Utility:
 
         cvs.restoreState()
 
-    def generate_qrcode(self, data_string: str, x: float, y: float):
-        qr_code = qr.QrCodeWidget(data_string)
-        bounds = qr_code.getBounds()
-        width = bounds[2] - bounds[0]
-        height = bounds[3] - bounds[1]
+    def generate_qrcode(
+        self, data_string: str, x: float, y: float, size: float = 120, border: int = 4
+    ) -> None:
+        """QR kód jako jedna cesta (stejná geometrie jako QrCodeWidget)
 
-        # Vytvořím kresbu a přizpůsobím velikost QR kódu
-        xy = 120
-        d = Drawing(xy, xy, transform=[xy / width, 0, 0, xy / height, 0, 0])
-        d.add(qr_code)
+        QrCodeWidget kódoval data dvakrát (getBounds + draw) a každý úsek
+        tmavých modulů kreslil jako samostatný Rect.
+        """
+        code = QRCode(None, QRErrorCorrectLevel.L)
+        code.addData(data_string)
+        code.make()
+        box: float = size / (code.getModuleCount() + border * 2)
 
-        # Vykreslím do PDF canvasu
-        renderPDF.draw(d, self.cvs, x, y)
+        cvs = self.cvs
+        path = cvs.beginPath()
+        for row_number, row in enumerate(code.modules):
+            column = 0
+            for dark, run in groupby(bool(module) for module in row):
+                count = sum(1 for _ in run)
+                if dark:
+                    path.rect(
+                        x + (column + border) * box,
+                        y + size - (row_number + border + 1) * box,
+                        count * box,
+                        box,
+                    )
+                column += count
+        cvs.saveState()
+        cvs.setFillColor(HexColor("#000000"))
+        cvs.drawPath(path, stroke=0, fill=1)
+        cvs.restoreState()
 
     def finalize_pdf(self) -> bytes:
-        cvs, buffer = self.cvs, self.buffer
+        cvs, buffer, profile = self.cvs, self.buffer, self.cfg.profile
         cvs.showPage()
+        if not profile.ascii85 and reportlab_compat.INTERNALS_SUPPORTED:
+            # --- obsah stránek jen Flate (reportlab bere ASCII85 z globálního rl_config)
+            reportlab_compat.flate_only_pages(cvs)
         cvs.save()
         pdf_data = buffer.getvalue()
         buffer.close()
+        if settings.DEBUG:
+            cons.log(f"pdf ({profile.name}): {len(pdf_data) / 1024:.1f} kB")
         return pdf_data
 
     def x_offset_length_2f(self, number: float) -> tuple[str, float]:
@@ -735,13 +1039,17 @@ class Utility:
 class SCCZPdfGenerator(PdfGenerator):
     """PDF generator for SCCZ type."""
 
+    def static_layer(self) -> None:
+        section = self.section
+        section.header()  # --- header ---
+        section.sccz_section()  # --- body sconto ---
+        section.footer()  # --- footer ---
+
     def generate_pdf_protocol(self, model: Any = None) -> bytes:
         section, utils = self.section, self.utils
         # ---
         utils.watermark(CompanyInfo.name)  # --- vodoznak ---
-        section.header()  # --- header ---
-        section.sccz_section()  # --- body sconto ---
-        section.footer()  # --- footer ---
+        self.draw_static_layer()  # --- header, body sconto, footer ---
         # ---
         if model is not None:
             order_number = model.order_number
@@ -759,13 +1067,17 @@ class SCCZPdfGenerator(PdfGenerator):
 class DefaultPdfGenerator(PdfGenerator):
     """PDF generator for Default."""
 
+    def static_layer(self) -> None:
+        section = self.section
+        section.header()  # --- header ---
+        section.default_section()  # --- body general ---
+        section.footer()  # --- footer ---
+
     def generate_pdf_protocol(self, model: Any = None) -> bytes:
         section, utils, cfg = self.section, self.utils, self.cfg
         # ---
         utils.watermark(CompanyInfo.name)  # --- vodoznak ---
-        section.header()  # --- header ---
-        section.default_section()  # --- body general ---
-        section.footer()  # --- footer ---
+        self.draw_static_layer()  # --- header, body general, footer ---
         # ---
         if model and self.data:
             data = self.data
@@ -803,5 +1115,11 @@ pdf_generator_classes = {
     "SCCZ": SCCZPdfGenerator,
 }
 
+
+def get_generator_class(model) -> type[PdfGenerator]:
+    """Generátor protokolu podle mandanta zakázky"""
+    return pdf_generator_classes.get(model.mandant, pdf_generator_classes["default"])
+
+
 if __name__ == "__main__":
     ...
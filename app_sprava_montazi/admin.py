@@ -6,7 +6,8 @@ from simple_history.admin import SimpleHistoryAdmin
 # --- models
 from .models import Order, Team, DistribHub, Upload, Client, Article, CallLog
 from .models import OrderPDFStorage, OrderBackProtocol, OrderBackProtocolToken
-from .models import AppSetting, OrderMontazImage, DataRetentionPolicy
+from .models import AppSetting, OrderMontazImage, DataRetentionPolicy, EmailOutbox
+from .models import ProtocolJob
 
 
 class OrderAdmin(admin.ModelAdmin):
@@ -136,3 +137,18 @@ class DataRetentionPolicyAdmin(admin.ModelAdmin):
     list_display = ("name", "retention_days", "is_active", "auto_anonymize", "updated")
     list_filter = ["is_active", "auto_anonymize"]
     readonly_fields = ("created", "updated")
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("order", "status", "attempts", "next_attempt", "recipient", "sent")
+    list_filter = ["status"]
+    search_fields = ["order__order_number"]
+    readonly_fields = ("created", "updated", "sent")
+
+
+@admin.register(ProtocolJob)
+class ProtocolJobAdmin(admin.ModelAdmin):
+    list_display = ("pk", "status", "done", "force", "requested_by", "created", "updated")
+    list_filter = ["status"]
+    readonly_fields = ("created", "updated")
@@ -14,23 +14,77 @@ Nastavení v .env:
 
 Generování klíče:
   python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
+
+Rotace klíče:
+  1. BLIND_INDEX_KEY = dosavadní klíč (jinak by se změnily blind indexy)
+  2. FIELD_ENCRYPTION_KEY = nový klíč, FIELD_ENCRYPTION_OLD_KEYS = dosavadní
+     (čte se oběma, šifruje novým — deploy bez výpadku)
+  3. python manage.py rotate_encryption_key  (přešifruje Client + HistoricalClient)
+  4. FIELD_ENCRYPTION_OLD_KEYS vyprázdnit
+
+Uložený formát:
+  "enc1:<key id>:<Fernet token>" — verze obálky + id klíče (rotace).
+  is_sealed() je jen test prefixu; holé tokeny starého formátu se
+  stále dešifrují a převede je `manage.py seal_encrypted_values`.
+  Hodnota s prefixem se při ukládání bere jako ciphertext jen se známým
+  key id a platným podpisem tokenu (has_valid_envelope) — jinak se šifruje.
+
+Blind index (hledání nad šifrovanými poli):
+  HMAC-SHA256 z normalizované hodnoty, uložený vedle ciphertextu
+  (Client.phone_bidx, email_bidx, street_bidx + ClientStreetToken).
+  Klíč BLIND_INDEX_KEY (výchozí = odvozený z FIELD_ENCRYPTION_KEY);
+  při rotaci šifrovacího klíče musí BLIND_INDEX_KEY zůstat stejný.
+
+Cache dešifrování:
+  LRU ciphertext → plaintext (Fernet token je neměnný, cache nezastará).
+  FIELD_DECRYPT_CACHE_SCOPE = "request" (výchozí) | "process" | "off",
+  FIELD_DECRYPT_CACHE_SIZE (počet položek), FIELD_DECRYPT_CACHE_MAX_VALUE
+  (delší plaintexty se necachují). Velké querysety přes iter_decrypted().
+  Hromadné management commandy mají cache po dobu běhu (@decrypt_scope()
+  na handle) — mimo ně plaintexty v paměti procesu nezůstávají.
+
+Líné dešifrování:
+  from_db_value vrací LazyDecrypted (ciphertext, dešifruje se až při
+  prvním použití) a atribut modelu (DecryptOnAccess) ho při prvním čtení
+  nahradí skutečným str. Pole, na které kód nesáhne (např. client.phone
+  v seznamu zakázek), se nedešifruje vůbec. FIELD_DECRYPT_LAZY = False
+  vrátí dešifrování hned při načtení.
 """
 
 import base64
 import hashlib
+import hmac
 import logging
-
-from cryptography.fernet import Fernet, InvalidToken
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
 from django.core.validators import validate_email
 from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.functional import Promise
 
 logger = logging.getLogger(__name__)
 
 # ── Fernet helpers ──────────────────────────────────────────────────
 
-_fernet_instance: Fernet | None = None
+_keyring: "KeyRing | None" = None
+# --- obálka uloženého ciphertextu: "enc1:<key id>:<Fernet token>"
+ENVELOPE_PREFIX = "enc1:"
+
+
+def _derive_fernet_key(raw_key: str) -> bytes:
+    # Odvodíme 32 bajtů přes SHA-256, pak base64-encode pro Fernet
+    derived = hashlib.sha256(raw_key.encode()).digest()
+    return base64.urlsafe_b64encode(derived)
 
 
 def _get_fernet_key() -> bytes:
@@ -46,42 +100,194 @@ def _get_fernet_key() -> bytes:
             'Vygenerovat: python -c "from cryptography.fernet import Fernet; '
             'print(Fernet.generate_key().decode())"'
         )
-    # Odvodíme 32 bajtů přes SHA-256, pak base64-encode pro Fernet
-    derived = hashlib.sha256(raw_key.encode()).digest()
-    return base64.urlsafe_b64encode(derived)
+    return _derive_fernet_key(raw_key)
+
+
+def _old_keys() -> list[str]:
+    return [key for key in getattr(settings, "FIELD_ENCRYPTION_OLD_KEYS", []) if key]
+
+
+def key_id(fernet_key: bytes) -> str:
+    """Krátký identifikátor klíče do obálky (neprozrazuje klíč)."""
+    return hashlib.sha256(b"key-id:" + fernet_key).hexdigest()[:8]
+
 
+class KeyRing:
+    """Klíče podle key id; první = aktuální (šifruje se jím)."""
 
-def get_fernet() -> Fernet:
-    """Vrátí Fernet instanci (singleton pro celý proces)."""
-    global _fernet_instance
-    if _fernet_instance is None:
-        _fernet_instance = Fernet(_get_fernet_key())
-    return _fernet_instance
+    def __init__(self, keys: list[bytes]):
+        self.fernets = {key_id(key): Fernet(key) for key in keys}
+        self.primary_kid = key_id(keys[0])
+        self.primary = self.fernets[self.primary_kid]
+        self.multi = MultiFernet(list(self.fernets.values()))
+
+
+def get_keyring() -> KeyRing:
+    """Key ring (singleton pro celý proces).
+
+    Šifruje se aktuálním klíčem, dešifruje kterýmkoli z
+    FIELD_ENCRYPTION_KEY + FIELD_ENCRYPTION_OLD_KEYS (rotace klíče).
+    """
+    global _keyring
+    if _keyring is None:
+        _keyring = KeyRing([_get_fernet_key()] + [_derive_fernet_key(key) for key in _old_keys()])
+    return _keyring
+
+
+def get_fernet() -> MultiFernet:
+    """Vrátí MultiFernet přes všechny klíče key ringu."""
+    return get_keyring().multi
+
+
+def get_primary_fernet() -> Fernet:
+    """Fernet jen s aktuálním klíčem (FIELD_ENCRYPTION_KEY)."""
+    return get_keyring().primary
+
+
+def _seal(kid: str, token: bytes) -> str:
+    return f"{ENVELOPE_PREFIX}{kid}:{token.decode('ascii')}"
+
+
+def _unseal(value: str) -> tuple[str, bytes]:
+    """Obálka → (key id, Fernet token)."""
+    kid, _, token = value[len(ENVELOPE_PREFIX):].partition(":")
+    return kid, token.encode("ascii")
 
 
 def encrypt_str(plaintext: str) -> str:
-    """Zašifruje plaintext string → base64 Fernet token."""
+    """Zašifruje plaintext string → obálka s Fernet tokenem aktuálního klíče."""
     if not plaintext:
         return plaintext
-    f = get_fernet()
-    return f.encrypt(plaintext.encode("utf-8")).decode("ascii")
+    ring = get_keyring()
+    return _seal(ring.primary_kid, ring.primary.encrypt(plaintext.encode("utf-8")))
 
 
-def decrypt_str(ciphertext: str) -> str:
-    """Dešifruje Fernet token → plaintext string."""
-    if not ciphertext:
-        return ciphertext
-    f = get_fernet()
+def _decrypt_bytes(value: str) -> bytes:
+    ring = get_keyring()
+    if is_sealed(value):
+        kid, token = _unseal(value)
+        if kid not in ring.fernets:
+            raise InvalidToken
+        return ring.fernets[kid].decrypt(token)
+    # --- starý formát (holý token) — zkusí se všechny klíče
+    return ring.multi.decrypt(value.encode("ascii"))
+
+
+def _decrypt(ciphertext: str) -> tuple[str, bool]:
+    """(plaintext, ok) — ok=False, pokud hodnota není platný token."""
     try:
-        return f.decrypt(ciphertext.encode("ascii")).decode("utf-8")
+        return _decrypt_bytes(ciphertext).decode("utf-8"), True
     except (InvalidToken, Exception):
         # Fallback: data mohou být ještě v plaintextu (během migrace)
         logger.warning("Fernet decryption failed — returning value as-is.")
+        return ciphertext, False
+
+
+def rotate_str(ciphertext: str) -> str | None:
+    """Hodnota přešifrovaná aktuálním klíčem; None = už je aktuální (nebo není token).
+
+    Aktuálnost se pozná z key id v obálce — bez dešifrování.
+    """
+    if is_sealed(ciphertext) and _unseal(ciphertext)[0] == get_keyring().primary_kid:
+        return None
+    try:
+        return encrypt_str(_decrypt_bytes(ciphertext).decode("utf-8"))
+    except (InvalidToken, Exception):
+        logger.warning("Fernet rotation failed — value is not a token of any known key.")
+        return None
+
+
+def seal_legacy(value: str) -> str | None:
+    """Holý Fernet token (starý formát) → obálka; None = už v obálce / neznámý klíč.
+
+    Token se nepřešifruje — jen se ověří podpis (bez AES) a doplní key id.
+    """
+    if is_sealed(value) or not looks_like_fernet_token(value):
+        return None
+    token = value.encode("ascii")
+    for kid, fernet in get_keyring().fernets.items():
+        try:
+            fernet.extract_timestamp(token)
+        except InvalidToken:
+            continue
+        return _seal(kid, token)
+    logger.warning("Legacy token does not match any known key.")
+    return None
+
+
+def decrypt_str(ciphertext: str) -> str:
+    """Dešifruje Fernet token → plaintext string (přes cache)."""
+    if not ciphertext:
         return ciphertext
+    cache = get_decrypt_cache()
+    if cache is not None:
+        plaintext = cache.get(ciphertext)
+        if plaintext is not None:
+            return plaintext
+    plaintext, ok = _decrypt(ciphertext)
+    if ok and cache is not None:
+        cache.set(ciphertext, plaintext)
+    return plaintext
+
+
+def decrypt_many(ciphertexts) -> dict[str, str]:
+    """Dávkové dešifrování — každý různý token jen jednou; vrací {ciphertext: plaintext}."""
+    cache = get_decrypt_cache()
+    result = {}
+    for ciphertext in ciphertexts:
+        if not ciphertext or ciphertext in result:
+            continue
+        plaintext = cache.get(ciphertext) if cache is not None else None
+        if plaintext is None:
+            plaintext, ok = _decrypt(ciphertext)
+            if ok and cache is not None:
+                cache.set(ciphertext, plaintext)
+        result[ciphertext] = plaintext
+    return result
+
+
+def is_sealed(value: str) -> bool:
+    """Začíná hodnota prefixem obálky? (O(1) test prefixu, bez ověření tokenu)"""
+    return bool(value) and value.startswith(ENVELOPE_PREFIX)
+
+
+def has_valid_envelope(value: str) -> bool:
+    """Je hodnota obálka se známým key id a platně podepsaným tokenem?
+
+    Ověří se jen HMAC (extract_timestamp), bez AES — plaintext s prefixem
+    "enc1:" (např. ze vstupu API) tím neprojde.
+    """
+    if not is_sealed(value):
+        return False
+    kid, token = _unseal(value)
+    fernet = get_keyring().fernets.get(kid)
+    if fernet is None:
+        return False
+    try:
+        fernet.extract_timestamp(token)
+    except (InvalidToken, ValueError):
+        return False
+    return True
 
 
 def is_encrypted(value: str) -> bool:
-    """Heuristicky zjistí, zda je hodnota Fernet token."""
+    """Obálka nebo holý Fernet token (heuristika).
+
+    Stabilní rozhraní pro migraci 0005 — nový kód používá is_sealed()
+    a has_valid_envelope().
+    """
+    return is_sealed(value) or looks_like_fernet_token(value)
+
+
+class StoredCiphertext(str):
+    """Hodnota převzatá z DB beze změny — get_prep_value ji znovu nešifruje.
+
+    Potřeba pro holé tokeny starého formátu, které is_sealed() nepozná.
+    """
+
+
+def looks_like_fernet_token(value: str) -> bool:
+    """Heuristicky zjistí, zda je hodnota holý Fernet token (starý formát bez obálky)."""
     if not value or len(value) < 50:
         return False
     try:
@@ -91,6 +297,282 @@ def is_encrypted(value: str) -> bool:
         return False
 
 
+# ── Cache dešifrování ───────────────────────────────────────────────
+
+
+class DecryptCache:
+    """Omezená LRU cache ciphertext → plaintext s počítadly (thread-safe)."""
+
+    def __init__(self, maxsize: int = 10_000, max_value: int = 1024):
+        self.maxsize = maxsize
+        self.max_value = max_value
+        self._data: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, ciphertext: str) -> str | None:
+        with self._lock:
+            plaintext = self._data.get(ciphertext)
+            if plaintext is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(ciphertext)
+            self.hits += 1
+            return plaintext
+
+    def set(self, ciphertext: str, plaintext: str) -> None:
+        if self.maxsize <= 0 or len(plaintext) > self.max_value:
+            return
+        with self._lock:
+            self._data[ciphertext] = plaintext
+            self._data.move_to_end(ciphertext)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_process_cache: DecryptCache | None = None
+_scoped_cache: ContextVar[DecryptCache | None] = ContextVar("decrypt_cache", default=None)
+
+
+def _cache_settings() -> tuple[str, int, int]:
+    return (
+        getattr(settings, "FIELD_DECRYPT_CACHE_SCOPE", "request"),
+        getattr(settings, "FIELD_DECRYPT_CACHE_SIZE", 10_000),
+        getattr(settings, "FIELD_DECRYPT_CACHE_MAX_VALUE", 1024),
+    )
+
+
+def get_decrypt_cache() -> DecryptCache | None:
+    """Aktivní cache: request scope (decrypt_scope), jinak procesní; None = vypnuto."""
+    global _process_cache
+    scoped = _scoped_cache.get()
+    if scoped is not None:
+        return scoped
+    scope, size, max_value = _cache_settings()
+    if scope != "process":
+        return None
+    if _process_cache is None:
+        _process_cache = DecryptCache(size, max_value)
+    return _process_cache
+
+
+@contextmanager
+def decrypt_scope():
+    """Vlastní cache jen pro blok (request, příkaz) — plaintexty ho nepřežijí.
+
+    Jde použít i jako dekorátor (`@decrypt_scope()`).
+    """
+    _, size, max_value = _cache_settings()
+    cache = DecryptCache(size, max_value)
+    token = _scoped_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _scoped_cache.reset(token)
+        cache.clear()
+
+
+def decrypt_cache_stats() -> dict:
+    cache = get_decrypt_cache()
+    return cache.stats() if cache is not None else {"size": 0, "maxsize": 0}
+
+
+def encrypted_fields(model) -> list[str]:
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if isinstance(field, EncryptedTextField)
+    ]
+
+
+def iter_decrypted(queryset, chunk_size: int = 2000):
+    """Iteruje queryset a šifrovaná pole modelu dešifruje po dávkách (decrypt_many).
+
+    Pro exporty a hromadné průchody; pole relací ze select_related se
+    dešifrují běžně při načtení.
+    """
+    fields = encrypted_fields(queryset.model)
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        lazy = [
+            (obj, name, obj.__dict__[name])
+            for obj in chunk
+            for name in fields
+            if isinstance(obj.__dict__.get(name), LazyDecrypted)
+        ]
+        plaintexts = decrypt_many(value.ciphertext for _, _, value in lazy)
+        for obj, name, value in lazy:
+            obj.__dict__[name] = plaintexts[value.ciphertext]
+        yield from chunk
+
+
+# ── Líné dešifrování ────────────────────────────────────────────────
+
+
+class LazyDecrypted(Promise):
+    """Hodnota šifrovaného sloupce, dešifruje se až při prvním použití.
+
+    Chová se jako str (str(), ==, hash, bool, len, metody str); bool()
+    nedešifruje — prázdný ciphertext = prázdný plaintext. Jako Promise ji
+    JSON encodery Djanga i DRF převedou přes str().
+    """
+
+    __slots__ = ("ciphertext", "_plaintext")
+
+    def __init__(self, ciphertext: str):
+        self.ciphertext = ciphertext
+        self._plaintext = None
+
+    @property
+    def plaintext(self) -> str:
+        if self._plaintext is None:
+            self._plaintext = decrypt_str(self.ciphertext)
+        return self._plaintext
+
+    def __str__(self) -> str:
+        return self.plaintext
+
+    def __repr__(self) -> str:
+        return repr(self.plaintext)
+
+    def __bool__(self) -> bool:
+        return bool(self.ciphertext)
+
+    def __len__(self) -> int:
+        return len(self.plaintext)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyDecrypted):
+            other = other.plaintext
+        return self.plaintext == other
+
+    def __lt__(self, other) -> bool:
+        return self.plaintext < str(other)
+
+    def __hash__(self) -> int:
+        return hash(self.plaintext)
+
+    def __add__(self, other) -> str:
+        return self.plaintext + str(other)
+
+    def __radd__(self, other) -> str:
+        return str(other) + self.plaintext
+
+    def __contains__(self, item) -> bool:
+        return str(item) in self.plaintext
+
+    def __iter__(self):
+        return iter(self.plaintext)
+
+    def __getitem__(self, key) -> str:
+        return self.plaintext[key]
+
+    def __getattr__(self, name):
+        return getattr(self.plaintext, name)
+
+    def __reduce__(self):
+        return (str, (self.plaintext,))
+
+    def _proxy____cast(self) -> str:
+        # --- Field.get_prep_value() takto rozbaluje Promise
+        return self.plaintext
+
+
+class DecryptOnAccess(DeferredAttribute):
+    """Atribut modelu — při prvním čtení nahradí LazyDecrypted skutečným str.
+
+    Datový descriptor (má __set__) — jinak by hodnota v instance.__dict__
+    měla přednost a __get__ by se nezavolal.
+    """
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, LazyDecrypted):
+            value = instance.__dict__[self.field.attname] = value.plaintext
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+# ── Blind index ─────────────────────────────────────────────────────
+
+_blind_index_key: bytes | None = None
+_STREET_TOKEN = re.compile(r"\w+")
+
+
+def _get_blind_index_key() -> bytes:
+    """Klíč pro HMAC — BLIND_INDEX_KEY, jinak odvozený z FIELD_ENCRYPTION_KEY."""
+    global _blind_index_key
+    if _blind_index_key is None:
+        raw_key = getattr(settings, "BLIND_INDEX_KEY", "") or getattr(
+            settings, "FIELD_ENCRYPTION_KEY", ""
+        )
+        if not raw_key:
+            raise ImproperlyConfigured(
+                "BLIND_INDEX_KEY nebo FIELD_ENCRYPTION_KEY musí být nastaveno."
+            )
+        # --- jiná doména než Fernet klíč (ten je sha256(raw_key))
+        _blind_index_key = hashlib.sha256(b"blind-index:" + raw_key.encode()).digest()
+    return _blind_index_key
+
+
+def blind_index(normalized: str) -> str:
+    """HMAC-SHA256 (32 hex znaků) z už normalizované hodnoty; prázdná → ''."""
+    if not normalized:
+        return ""
+    digest = hmac.new(_get_blind_index_key(), normalized.encode("utf-8"), hashlib.sha256)
+    return digest.hexdigest()[:32]
+
+
+def normalize_email(value: str | None) -> str:
+    return (value or "").strip().lower()
+
+
+def _fold(value: str) -> str:
+    """Malá písmena bez diakritiky: 'Náměstí Míru' → 'namesti miru'."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def street_tokens(value: str | None) -> list[str]:
+    """Tokeny ulice pro token lookup: 'Náměstí Míru 12/3' → ['namesti', 'miru', '12', '3']."""
+    return list(dict.fromkeys(_STREET_TOKEN.findall(_fold(value or ""))))
+
+
+def normalize_street(value: str | None) -> str:
+    return " ".join(street_tokens(value))
+
+
+def _reset_on_setting_changed(setting, **kwargs) -> None:
+    """Singletony klíčů a cache drží odvozený stav — po změně nastavení (testy) zahodit."""
+    global _keyring, _blind_index_key, _process_cache
+    if setting in ("FIELD_ENCRYPTION_KEY", "FIELD_ENCRYPTION_OLD_KEYS", "BLIND_INDEX_KEY"):
+        _keyring = _blind_index_key = None
+    if setting.startswith("FIELD_DECRYPT_CACHE"):
+        _process_cache = None
+
+
+setting_changed.connect(_reset_on_setting_changed)
+
+
 # ── Custom encrypted Django model fields ────────────────────────────
 
 
@@ -106,24 +588,36 @@ class EncryptedTextField(models.TextField):
     """
 
     description = "Šifrované textové pole (Fernet AES-128-CBC + HMAC)"
+    descriptor_class = DecryptOnAccess
 
     def get_prep_value(self, value):
         """Zašifruj před uložením do databáze."""
+        if isinstance(value, StoredCiphertext):
+            return str(value)
         value = super().get_prep_value(value)
         if value is None or value == "":
             return value
         str_value = str(value)
-        # Ochrana proti dvojitému šifrování
-        if is_encrypted(str_value):
+        # Ochrana proti dvojitému šifrování — jen skutečná obálka, ne prefix
+        if has_valid_envelope(str_value):
             return str_value
         return encrypt_str(str_value)
 
     def from_db_value(self, value, expression, connection):
-        """Dešifruj po načtení z databáze."""
+        """Dešifruj po načtení z databáze (líně — viz LazyDecrypted)."""
         if value is None or value == "":
             return value
+        if getattr(settings, "FIELD_DECRYPT_LAZY", True):
+            return LazyDecrypted(value)
         return decrypt_str(value)
 
+    def pre_save(self, model_instance, add):
+        """Nedotčená hodnota se uloží jako původní ciphertext — bez dešifrování."""
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, LazyDecrypted):
+            return StoredCiphertext(value.ciphertext)
+        return super().pre_save(model_instance, add)
+
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         return name, "app_sprava_montazi.encryption.EncryptedTextField", args, kwargs
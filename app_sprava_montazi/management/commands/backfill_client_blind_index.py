@@ -0,0 +1,65 @@
+"""
+Doplnění blind indexů zákazníků (phone_bidx, email_bidx, street_bidx
++ ClientStreetToken) pro záznamy z doby před migrací 0010.
+
+Běží po dávkách podle pk (každá dávka = jedna transakce, bulk_update),
+takže jde spustit za provozu a po přerušení prostě znovu:
+  python manage.py backfill_client_blind_index --batch-size 1000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_sprava_montazi.encryption import decrypt_scope
+from app_sprava_montazi.models import Client, ClientStreetToken
+
+BIDX_FIELDS = ["phone_bidx", "email_bidx", "street_bidx"]
+
+
+class Command(BaseCommand):
+    help = "Přepočítá blind indexy šifrovaných polí zákazníků"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="přepočítat i záznamy, které už blind index mají (např. po změně BLIND_INDEX_KEY)",
+        )
+
+    @decrypt_scope()
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        queryset = Client.objects.only("pk", "phone", "email", "street", *BIDX_FIELDS)
+        if not options["all"]:
+            # --- všechny tři prázdné = ještě nezaindexováno (klienti bez údajů jen naprázdno)
+            queryset = queryset.filter(phone_bidx="", email_bidx="", street_bidx="")
+        started = time.perf_counter()
+        last_pk, processed = 0, 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+            if not chunk:
+                break
+            self._backfill(chunk)
+            last_pk = chunk[-1].pk
+            processed += len(chunk)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{processed} zákazníků (pk ≤ {last_pk}), {processed / elapsed:.0f}/s")
+        self.stdout.write(self.style.SUCCESS(f"Blind index doplněn u {processed} zákazníků."))
+
+    @staticmethod
+    @transaction.atomic
+    def _backfill(chunk: list[Client]) -> None:
+        tokens = []
+        for client in chunk:
+            for name, value in client.blind_indexes().items():
+                setattr(client, name, value)
+            tokens += [
+                ClientStreetToken(client=client, digest=digest)
+                for digest in client.street_token_digests()
+            ]
+        Client.objects.bulk_update(chunk, BIDX_FIELDS)
+        ClientStreetToken.objects.filter(client__in=chunk).delete()
+        ClientStreetToken.objects.bulk_create(tokens)
@@ -3,6 +3,7 @@
 from rich.console import Console
 from django.core.management.base import BaseCommand
 from django.db.models import Count
+from app_sprava_montazi.encryption import decrypt_scope
 from app_sprava_montazi.models import DistribHub, Client
 
 cons: Console = Console()
@@ -11,6 +12,7 @@ cons: Console = Console()
 class Command(BaseCommand):
     help = "Najde a vypíše duplicity podle name a zip_code"
 
+    @decrypt_scope()
     def handle(self, *args, **kwargs):
         cons.log("Spoustim kontrolu duplikace")
 
@@ -4,6 +4,7 @@ from time import sleep
 from django.db import transaction
 from rich.console import Console
 from django.core.management.base import BaseCommand, CommandParser, CommandError
+from app_sprava_montazi.encryption import decrypt_scope
 from app_sprava_montazi.models import Client, Order
 from django.conf import settings
 
@@ -64,6 +65,7 @@ class Command(BaseCommand):
                     if settings.DEBUG:
                         cons.log(f"Order {order_number} not found")
 
+    @decrypt_scope()
     def handle(self, *args, **kwargs):
         """Hlavni funkce"""
         incomplete_list: list[str] = self.incomplete_customers_query()
@@ -23,6 +23,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db.models import Max
 
+from app_sprava_montazi.encryption import decrypt_scope, iter_decrypted
 from app_sprava_montazi.models import Client, DataRetentionPolicy
 
 logger = logging.getLogger(__name__)
@@ -50,6 +51,7 @@ class Command(BaseCommand):
             help="Přepsat dobu uchovávání (dní). Ignoruje policy.",
         )
 
+    @decrypt_scope()
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
         policy_name = options["policy"]
@@ -145,8 +147,9 @@ class Command(BaseCommand):
         eligible = Client.objects.filter(is_anonymized=False)
 
         candidates = []
-        for client in eligible.annotate(
-            last_order_date=Max("order__evidence_termin")
+        # --- dávkové dešifrování (projde se celá tabulka zákazníků)
+        for client in iter_decrypted(
+            eligible.annotate(last_order_date=Max("order__evidence_termin"))
         ):
             should_anonymize = False
 
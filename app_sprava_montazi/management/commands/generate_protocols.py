@@ -0,0 +1,110 @@
+"""
+Hromadné generování PDF protokolů v poolu procesů.
+
+  python manage.py generate_protocols --status Adviced --team 3 --week 2025-W14
+  python manage.py generate_protocols --order 700123-O --order 700124-O
+  python manage.py generate_protocols --stale
+
+Protokoly se stejným otiskem dat jako uložené PDF se přeskočí.
+
+Volby:
+  --status STAV     stav zakázky (výchozí Adviced)
+  --team ID         montážní tým
+  --week RRRR-Wtt   ISO týden montáže
+  --mandant M       mandant (SCCZ, ...)
+  --order ČÍSLO     konkrétní zakázky (lze opakovat; ostatní filtry se ignorují)
+  --stale           jen zakázky se zastaralým protokolem (v rámci filtrů)
+  --force           generovat i aktuální protokoly
+  --workers N       počet procesů (1 = bez poolu)
+"""
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from app_sprava_montazi.encryption import decrypt_scope
+from app_sprava_montazi.models import Order, Status
+from app_sprava_montazi.protocol_batch import (
+    DEFAULT_WORKERS,
+    generate_protocols,
+    shutdown_pool,
+    stale_protocols,
+    week_range,
+)
+
+
+class Command(BaseCommand):
+    help = "Vygeneruje PDF protokoly vybraných zakázek (pool procesů)"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--status", choices=Status.values, default=Status.ADVICED, help="stav zakázky"
+        )
+        parser.add_argument("--team", type=int, default=None, help="id montážního týmu")
+        parser.add_argument("--week", default=None, help="ISO týden montáže, např. 2025-W14")
+        parser.add_argument("--mandant", default=None)
+        parser.add_argument(
+            "--order", action="append", default=[], help="číslo zakázky (lze opakovat)"
+        )
+        parser.add_argument(
+            "--stale", action="store_true", help="jen zastaralé protokoly (bez --status)"
+        )
+        parser.add_argument("--force", action="store_true", help="i aktuální protokoly")
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+
+    @decrypt_scope()
+    def handle(self, *args, **options):
+        orders = self.select_orders(options)
+        if not orders.exists():
+            self.stdout.write("Filtru neodpovídá žádná zakázka.")
+            return
+        try:
+            results = generate_protocols(
+                orders, workers=options["workers"], force=options["force"]
+            )
+        finally:
+            shutdown_pool()
+
+        for result in results:
+            if result.skipped:
+                continue
+            if result.ok:
+                action = "založen" if result.created else "přegenerován"
+                self.stdout.write(
+                    f"{result.order_number.upper()}: protokol {action} "
+                    f"({result.size / 1024:.1f} kB)"
+                )
+            else:
+                self.stderr.write(f"{result.order_number.upper()}: CHYBA {result.error}")
+        failed = sum(not result.ok for result in results)
+        skipped = sum(result.skipped for result in results)
+        generated = len(results) - failed - skipped
+        size = sum(result.size for result in results)
+        summary = (
+            f"Protokoly: {generated} hotovo, {skipped} beze změny, {failed} chyb."
+        )
+        if generated:
+            summary += (
+                f" Celkem {size / 1024:.1f} kB, průměr {size / generated / 1024:.1f} kB."
+            )
+        self.stdout.write(self.style.ERROR(summary) if failed else self.style.SUCCESS(summary))
+
+    def select_orders(self, options: dict):
+        if options["order"]:
+            numbers = [number.strip().upper() for number in options["order"]]
+            return Order.objects.filter(order_number__in=numbers)
+        if options["stale"]:
+            orders = Order.objects.all()
+        else:
+            orders = Order.objects.filter(status=options["status"])
+        if options["team"] is not None:
+            orders = orders.filter(team_id=options["team"])
+        if options["mandant"]:
+            orders = orders.filter(mandant=options["mandant"])
+        if options["week"]:
+            try:
+                start, end = week_range(options["week"])
+            except ValueError:
+                raise CommandError(f"Neplatný týden: {options['week']} (např. 2025-W14)")
+            orders = orders.filter(montage_termin__gte=start, montage_termin__lt=end)
+        if options["stale"]:
+            orders = stale_protocols(orders)
+        return orders
@@ -1,20 +1,25 @@
 """Custom commands"""
 
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import TypedDict
+from typing import Iterator, TypedDict
 
 # --- django
 from django.core.management.base import BaseCommand, CommandParser
-from django.db import transaction
-from django.db import IntegrityError
+from django.db import reset_queries, transaction
 from django.conf import settings
 from django.utils.text import slugify
-from pandas import DataFrame, read_csv
+from pandas import DataFrame, Series, read_csv, to_datetime
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
+from simple_history.utils import bulk_create_with_history
 
-from app_sprava_montazi.models import Client, DistribHub, Order
+from app_sprava_montazi.encryption import decrypt_scope
+from app_sprava_montazi import search
+from app_sprava_montazi.models import Client, DistribHub, ImportStatus, Order
+from app_sprava_montazi.models import OrderMonthlyStats, Upload
+from app_sprava_montazi.OOP_dashboard import DashboardCache
 
 
 class ClientRecord(TypedDict):
@@ -33,12 +38,16 @@ class OrderRecord(TypedDict):
 
 # ---
 cons: Console = Console()
+# --- cislo zakazky, ktere slugify nezmeni (krome velikosti pismen)
+_PLAIN_NUMBER = re.compile(r"[A-Za-z0-9]+(?:[-_][A-Za-z0-9]+)*")
 # ---
 
 
 class Command(BaseCommand):
     """Custom command"""
 
+    DEFAULT_CHUNK_SIZE = 5000
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.counter: dict[str, int] = {
@@ -67,72 +76,54 @@ class Command(BaseCommand):
             self.counter["duplicit_count"] += 1
 
     def create_orders_from_dataset(self, dataset: DataFrame) -> None:
-        """create orders form dataset with progress bar"""
-        total_items = len(dataset)
+        """create orders form dataset — po dávkách (BulkRecords), ne po řádcích"""
+        items = dataset.to_dict(orient="records")
 
         with Progress(SpinnerColumn(), TimeElapsedColumn()) as progress:
-            task = progress.add_task("Creating orders...", total=total_items)
-            for item in dataset.to_dict(orient="records"):
-                try:
-                    # ziskavam FK DistribHubu
-                    distrib_hub: DistribHub = DistribHub.objects.get(
-                        code=item["misto-urceni"]
-                    )
-                    # vytvarim FK clienta
-                    client: ClientRecord = CreateRecords.create_client(
-                        item["prijmeni"], item["krestni-jmeno"], item["psc"]
-                    )
-                    # vytvarim Order
-                    order: OrderRecord = CreateRecords.create_order(
-                        item, distrib_hub, client["client"]
-                    )
-
-                    self.update_counters(client, order)
-
-                except DistribHub.DoesNotExist as e:
-                    zakazka = item.get("cislo-zakazky", "N/A")
-                    cons.log(
-                        f"Chybi DistribHub pro objednavku: \n{zakazka}",
-                        style="red",
-                    )
-                    raise DistribHub.DoesNotExist(
-                        f"DistribHub neexistuje pro zakázku: {zakazka}"
-                    ) from e
-
-                except ValueError as e:
-                    cons.log(
-                        f"spatna data ve sloupcich CSV souboru \n"
-                        f"'{item.get('cislo-zakazky', 'N/A')}': {e}",
-                        style="red",
-                    )
-                    raise
-
-                except IntegrityError as e:
-                    cons.log(
-                        f"Neocekavana chyba u objednavky: \n"
-                        f"{item.get('cislo-zakazky', 'N/A')} {str(e)}",
-                        style="red",
-                    )
-                    raise
-
-                except Exception as e:
-                    cons.log(
-                        f"Neocekavana chyba u objednavky: \n"
-                        f"{item.get('cislo-zakazky', 'N/A')} {str(e)}",
-                        style="red",
-                    )
-                    raise
-
-                finally:
-                    progress.update(task, advance=1)
+            task = progress.add_task("Creating orders...", total=len(items))
+            records = BulkRecords(items)
+            # --- 1) místa určení jedním dotazem; chybějící = chyba celého importu
+            records.resolve_hubs()
+            # --- 2) zákazníci (name, zip_code) — existující najednou, chybějící bulk_create
+            self.counter["client_count"] += records.resolve_clients()
+            # --- 3) zakázky — duplicity podle čísla zakázky, nové bulk_create
+            created, duplicit = records.create_orders()
+            self.counter["duplicit_count"] += duplicit
+            for order in created:
+                if order.team_type == "By_assembly_crew":
+                    self.counter["by_assembly_crew_count"] += 1
+                elif order.team_type == "By_customer":
+                    self.counter["by_customer_count"] += 1
+            progress.update(task, completed=len(items))
 
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument("file", type=str, help="pridej soubor csv")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help=f"streamovat po N radcich, commit po kazde davce "
+            f"(vychozi s --upload: {self.DEFAULT_CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--upload",
+            type=int,
+            default=None,
+            help="id Upload zaznamu — checkpoint po davkach, opakovane spusteni navaze",
+        )
 
+    @decrypt_scope()
     def handle(self, *args, **kwargs):
         # cesta k souboru
         file_path: Path = Path("./files") / kwargs["file"]
 
+        upload_id, chunk_size = kwargs.get("upload"), kwargs.get("chunk_size")
+        if upload_id or chunk_size:
+            upload = Upload.objects.get(pk=upload_id) if upload_id else None
+            chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+            self.handle_streaming(file_path, chunk_size, upload)
+            return
+
         # nacteni datasetu
         dataset = DatasetTools.create_dataset(file_path)
         filtered_dataset: DataFrame = DatasetTools.dataset_filter(dataset)
@@ -140,33 +131,125 @@ class Command(BaseCommand):
         try:
             with transaction.atomic():
                 self.create_orders_from_dataset(filtered_dataset)
-                Utility.logs(dataset, self.counter)
+                Utility.logs(len(dataset), self.counter)
 
         except Exception as e:
             cons.log(f"Dataset se nezpracoval kvuli chybe: {str(e)}", style="red bold")
             cons.log("Zadna data z tohoto souboru nebyla ulozena.", style="red")
             raise
 
+    def handle_streaming(self, file_path: Path, chunk_size: int, upload: Upload | None) -> None:
+        """Import po davkach — v pameti je vzdy jen jedna davka.
+
+        Kazda davka se zapise ve vlastni transakci spolu s checkpointem
+        v Upload (rows_done + pocitadla). Po padu se davky do checkpointu
+        preskoci a import pokracuje dalsi davkou.
+        """
+        rows_done = 0
+        if upload is not None:
+            if upload.import_status == ImportStatus.DONE:
+                cons.log(f"Upload {upload.pk} uz je naimportovany.", style="yellow")
+                return
+            rows_done = upload.rows_done
+            self.counter.update(upload.counters)
+            if upload.rows_total is None:
+                upload.set_rows_total(DatasetTools.count_rows(file_path))
+            if rows_done:
+                cons.log(f"Navazuji za radkem {rows_done}.", style="blue")
+
+        try:
+            for rows_read, dataset in DatasetTools.iter_datasets(file_path, chunk_size, rows_done):
+                with transaction.atomic():
+                    self.create_orders_from_dataset(DatasetTools.dataset_filter(dataset))
+                    if upload is not None:
+                        upload.save_checkpoint(rows_read, self.counter)
+                rows_done = rows_read
+                # --- pri DEBUG by connection.queries drzel SQL vsech davek
+                reset_queries()
+                cons.log(f"davka ulozena, zpracovano radku: {rows_done}", style="blue")
+
+        except Exception as e:
+            if upload is not None:
+                upload.mark_failed(str(e))
+            cons.log(f"Davka se nezpracovala kvuli chybe: {str(e)}", style="red bold")
+            cons.log(
+                f"Ulozeno je prvnich {rows_done} radku, import lze navazat pres --upload.",
+                style="red",
+            )
+            raise
+
+        if upload is not None:
+            upload.mark_done()
+        Utility.logs(rows_done, self.counter)
+
 
 class DatasetTools:
     """Utility class"""
 
-    @staticmethod
-    def create_dataset(file_path) -> DataFrame:
+    EXPECTED_COLS: list[str] = [
+        "misto-urceni",
+        "cislo-zakazky",
+        "mandant",
+        "prijmeni",
+        "krestni-jmeno",
+        "psc",
+        "montaz",
+        "avizovany-termin",
+        "erfassungstermin",
+        "poznamka-mandanta",
+    ]
+    # --- max. ukazek chyb na kontrolu v preview
+    PREVIEW_ERROR_LIMIT = 50
+
+    @classmethod
+    def _wanted_column(cls, column: str) -> bool:
+        """usecols — ostatni sloupce CSV se vubec neparsuji"""
+        return slugify(column.strip()) in cls.EXPECTED_COLS
+
+    @classmethod
+    def create_dataset(cls, file_path) -> DataFrame:
         """Create dataset"""
-        expected_cols: list[str] = [
-            "misto-urceni",
-            "cislo-zakazky",
-            "mandant",
-            "prijmeni",
-            "krestni-jmeno",
-            "psc",
-            "montaz",
-            "avizovany-termin",
-            "erfassungstermin",
-            "poznamka-mandanta",
-        ]
-        dataset: DataFrame = read_csv(file_path, encoding="cp1250", delimiter=";")
+        dataset: DataFrame = read_csv(
+            file_path, encoding="cp1250", delimiter=";", usecols=cls._wanted_column
+        )
+        return cls.clean_dataset(dataset)
+
+    @classmethod
+    def iter_datasets(
+        cls, file_path, chunk_size: int, skip_rows: int = 0
+    ) -> Iterator[tuple[int, DataFrame]]:
+        """Streamovane cteni po chunk_size radcich.
+
+        Vraci (pocet dosud prectenych radku, vycistena davka). Prvnich
+        skip_rows radku (checkpoint) se jen precte a zahodi — pozice tak
+        nezavisi na velikosti davky predchoziho behu.
+        """
+        rows_read = 0
+        with read_csv(
+            file_path,
+            encoding="cp1250",
+            delimiter=";",
+            usecols=cls._wanted_column,
+            chunksize=chunk_size,
+        ) as reader:
+            for chunk in reader:
+                start, rows_read = rows_read, rows_read + len(chunk)
+                if rows_read <= skip_rows:
+                    continue
+                if start < skip_rows:
+                    chunk = chunk.iloc[skip_rows - start :]
+                yield rows_read, cls.clean_dataset(chunk)
+
+    @staticmethod
+    def count_rows(file_path) -> int:
+        """Pocet neprazdnych datovych radku (bez hlavicky) — pro prubeh importu"""
+        with open(file_path, "rb") as file:
+            return max(sum(1 for line in file if line.strip()) - 1, 0)
+
+    @classmethod
+    def clean_dataset(cls, dataset: DataFrame) -> DataFrame:
+        """Kontrola a cisteni sloupcu — cely soubor i jedna davka"""
+        expected_cols = cls.EXPECTED_COLS
         dataset.columns = dataset.columns.str.strip()
         dataset.columns = [slugify(col) for col in dataset.columns]
         dataset = dataset.dropna(how="all")
@@ -184,11 +267,100 @@ class DatasetTools:
         dataset["psc"] = dataset["psc"].astype(str)
         dataset["misto-urceni"] = dataset["misto-urceni"].fillna(0).astype(int)
         dataset["poznamka-mandanta"] = dataset["poznamka-mandanta"].fillna("")
-        dataset["cislo-zakazky"] = dataset["cislo-zakazky"].apply(slugify)
-        dataset["cislo-zakazky"] = dataset["cislo-zakazky"].str.upper()
+        dataset["cislo-zakazky"] = cls.normalize_numbers(dataset["cislo-zakazky"])
 
         return dataset
 
+    @staticmethod
+    def normalize_numbers(numbers: Series) -> Series:
+        """slugify + upper jednim pruchodem — cisla zakazek uz ve tvaru
+        slugu (700123-O) jen upper(), slugify jen pro zbytek"""
+        return Series(
+            [
+                value.upper() if _PLAIN_NUMBER.fullmatch(value) else slugify(value).upper()
+                for value in numbers.astype(str)
+            ],
+            index=numbers.index,
+            dtype=object,
+        )
+
+    @staticmethod
+    def parse_dates(values: Series) -> Series:
+        """Vektorova obdoba create_datetime — prazdne i necitelne = NaT"""
+        parsed = to_datetime(values, format="%d.%m.%Y", errors="coerce")
+        # --- strip (pruchod po radcich) jen pro to, co napoprve neproslo
+        retry = parsed.isna()
+        if retry.any():
+            parsed[retry] = to_datetime(
+                values[retry].str.strip(), format="%d.%m.%Y", errors="coerce"
+            )
+        return parsed
+
+    @classmethod
+    def preview(cls, dataset: DataFrame) -> dict:
+        """Dry-run importu — co by import udelal, bez zapisu do DB.
+
+        Cisla zakazek a kody mist urceni se nactou kazde jednim dotazem,
+        vsechny kontroly jsou po sloupcich (isin / duplicated / to_datetime).
+        """
+        filtered = cls.dataset_filter(dataset)
+        numbers = filtered["cislo-zakazky"]
+        hubs = filtered["misto-urceni"].astype(str)
+
+        hub_codes = set(DistribHub.objects.values_list("code", flat=True))
+        existing = set(Order.objects.values_list("order_number", flat=True))
+        in_db = numbers.isin(existing)
+        in_file = numbers.duplicated() & ~in_db
+        new = ~(in_db | in_file)
+        unknown_hub = ~hubs.isin(hub_codes)
+
+        # --- erfassungstermin je povinny (Order.evidence_termin), avizovany jen kdyz je vyplneny
+        evidence = filtered["erfassungstermin"]
+        delivery = filtered["avizovany-termin"]
+        bad_delivery = cls.parse_dates(delivery).isna()
+        bad_delivery[bad_delivery] = ~delivery[bad_delivery].str.strip().isin(["", "nan"])
+        bad_dates = {
+            "erfassungstermin": cls.parse_dates(evidence).isna(),
+            "avizovany-termin": bad_delivery,
+        }
+
+        errors = []
+        checks = [("misto-urceni", hubs, unknown_hub, "neznámé místo určení")] + [
+            (column, filtered[column], mask, "chybné datum") for column, mask in bad_dates.items()
+        ]
+        for column, values, mask, message in checks:
+            for row, number, value in zip(
+                mask[mask].index[: cls.PREVIEW_ERROR_LIMIT],
+                numbers[mask].head(cls.PREVIEW_ERROR_LIMIT),
+                values[mask].head(cls.PREVIEW_ERROR_LIMIT),
+            ):
+                errors.append(
+                    {
+                        "row": int(row) + 1,
+                        "order_number": number,
+                        "column": column,
+                        "value": value,
+                        "error": message,
+                    }
+                )
+
+        return {
+            "rows": len(dataset),
+            "skipped": len(dataset) - len(filtered),
+            "new": int(new.sum()),
+            "new_by_team_type": {
+                team_type: int(count)
+                for team_type, count in filtered.loc[new, "team_type"].value_counts().items()
+            },
+            "duplicates": {"existing": int(in_db.sum()), "in_file": int(in_file.sum())},
+            "unknown_hubs": {
+                code: int(count) for code, count in hubs[unknown_hub].value_counts().items()
+            },
+            "invalid_dates": {column: int(mask.sum()) for column, mask in bad_dates.items()},
+            "errors": errors,
+            "valid": not unknown_hub.any() and not bad_dates["erfassungstermin"].any(),
+        }
+
     @staticmethod
     def create_datetime(source: str):
         if not source or source.strip().lower() == "nan":
@@ -225,11 +397,11 @@ class CreateRecords:
         name = f"{prijmeni.strip()} {krestni_jmeno.strip()}".strip()
         psc = psc.strip()
 
-        client, client_created = Client.objects.get_or_create(name=name, zip_code=psc)
+        clients, created = Client.upsert([Client(name=name, zip_code=psc)])
 
         return {
-            "client": client,
-            "client_created": client_created,
+            "client": clients[(name, psc)],
+            "client_created": (name, psc) in created,
         }
 
     @staticmethod
@@ -261,11 +433,136 @@ class CreateRecords:
         return result
 
 
+class BulkRecords:
+    """Set-based zápis datasetu — náhrada CreateRecords po řádcích.
+
+    Místa určení i existující zákazníci / čísla zakázek se načtou
+    hromadně, chybějící zakázky se vloží přes bulk_create_with_history
+    (historie simple_history bez dotazu na řádek), chybějící zákazníci
+    přes Client.upsert (INSERT ... ON CONFLICT). Výsledek i počítadla
+    odpovídají zpracování řádek po řádku (první výskyt vyhrává).
+
+    bulk_create neposílá signály — rollup OrderMonthlyStats, fulltextové
+    dokumenty a cache dashboardu se aktualizují tady (viz signals.py).
+    """
+
+    BATCH_SIZE = 1000
+    # --- řádků v jednom INSERT ... ON CONFLICT (parametrů = řádky × sloupce Client)
+    UPSERT_BATCH_SIZE = 500
+    # --- strop počtu hodnot v jednom `IN (...)` (limit proměnných SQLite)
+    IN_CHUNK = 900
+
+    def __init__(self, items: list[dict]):
+        self.items = items
+        self.hub_ids: list[int] = []
+        self.clients: list[Client] = []
+
+    @staticmethod
+    def _number(item: dict) -> str:
+        return item.get("cislo-zakazky", "N/A")
+
+    @classmethod
+    def _chunks(cls, values: list) -> list[list]:
+        return [values[i : i + cls.IN_CHUNK] for i in range(0, len(values), cls.IN_CHUNK)]
+
+    def resolve_hubs(self) -> None:
+        hubs = dict(DistribHub.objects.values_list("code", "pk"))
+        for item in self.items:
+            hub_id = hubs.get(str(item["misto-urceni"]))
+            if hub_id is None:
+                zakazka = self._number(item)
+                cons.log(f"Chybi DistribHub pro objednavku: \n{zakazka}", style="red")
+                raise DistribHub.DoesNotExist(f"DistribHub neexistuje pro zakázku: {zakazka}")
+            self.hub_ids.append(hub_id)
+
+    @staticmethod
+    def client_key(item: dict) -> tuple[str, str]:
+        """(name, zip_code) jako v CreateRecords.create_client"""
+        name = f"{item['prijmeni'].strip()} {item['krestni-jmeno'].strip()}".strip()
+        return name, item["psc"].strip()
+
+    def resolve_clients(self) -> int:
+        """Zákazník pro každý řádek; vrací počet nově vytvořených."""
+        keys = []
+        for item in self.items:
+            try:
+                keys.append(self.client_key(item))
+            except (AttributeError, KeyError) as e:
+                cons.log(
+                    f"spatna data ve sloupcich CSV souboru \n'{self._number(item)}': {e}",
+                    style="red",
+                )
+                raise ValueError(f"Chybný zákazník u zakázky {self._number(item)}") from e
+        unique = list(dict.fromkeys(keys))
+        existing: dict[tuple[str, str], Client] = {}
+        for chunk in self._chunks(unique):
+            names = {name for name, _ in chunk}
+            zips = {zip_code for _, zip_code in chunk}
+            candidates = Client.objects.filter(name__in=names, zip_code__in=zips)
+            for client in candidates.only("pk", "name", "zip_code"):
+                existing[(client.name, client.zip_code)] = client
+        # --- chybějící přes upsert — souběžný import je mezitím mohl založit
+        clients, created = Client.upsert(
+            [
+                Client(name=name, zip_code=zip_code)
+                for name, zip_code in unique
+                if (name, zip_code) not in existing
+            ],
+            batch_size=self.UPSERT_BATCH_SIZE,
+        )
+        existing.update(clients)
+        self.clients = [existing[key] for key in keys]
+        return len(created)
+
+    def create_orders(self) -> tuple[list[Order], int]:
+        """Vloží nové zakázky; vrací (vytvořené, počet duplicit)."""
+        numbers = [item["cislo-zakazky"] for item in self.items]
+        seen: set[str] = set()
+        for chunk in self._chunks(list(dict.fromkeys(numbers))):
+            seen.update(
+                Order.objects.filter(order_number__in=chunk).values_list("order_number", flat=True)
+            )
+        orders, duplicit = [], 0
+        for item, hub_id, client in zip(self.items, self.hub_ids, self.clients):
+            if item["cislo-zakazky"] in seen:
+                duplicit += 1
+                continue
+            seen.add(item["cislo-zakazky"])
+            orders.append(
+                Order(
+                    order_number=item["cislo-zakazky"],
+                    distrib_hub_id=hub_id,
+                    mandant=item["mandant"],
+                    client=client,
+                    delivery_termin=DatasetTools.create_datetime(item["avizovany-termin"]),
+                    evidence_termin=DatasetTools.create_datetime(item["erfassungstermin"]),
+                    team_type=item["team_type"],
+                    notes=item["poznamka-mandanta"],
+                )
+            )
+        created = bulk_create_with_history(orders, Order, batch_size=self.BATCH_SIZE)
+        self.after_bulk_create(created)
+        return created, duplicit
+
+    @classmethod
+    def after_bulk_create(cls, orders: list[Order]) -> None:
+        """Náhrada post_save signálů pro bulk_create zakázek."""
+        if not orders:
+            return
+        OrderMonthlyStats.apply_created(
+            {name: getattr(order, name) for name in OrderMonthlyStats.ORDER_FIELDS}
+            for order in orders
+        )
+        for chunk in cls._chunks([order.pk for order in orders]):
+            search.index_orders(Order.objects.filter(pk__in=chunk))
+        DashboardCache.invalidate()
+
+
 class Utility:
     """Utility"""
 
     @staticmethod
-    def logs(dataset: DataFrame, counter: dict[str, int]) -> None:
+    def logs(rows: int, counter: dict[str, int]) -> None:
         """Vypis logu"""
 
         small_break: str = "------\n"
@@ -273,7 +570,7 @@ class Utility:
         order_sum = counter["by_assembly_crew_count"] + counter["by_customer_count"]
         cons.log(
             big_break
-            + f"celkovy pocet zaznamu v datasetu je: {len(dataset)}\n"
+            + f"celkovy pocet zaznamu v datasetu je: {rows}\n"
             + f"clientu vytvoreno: {counter['client_count']}\n"
             + small_break
             + f"zakazek pro montaz vytvoreno: {counter['by_assembly_crew_count']}\n"
@@ -0,0 +1,25 @@
+"""
+Přestavba fulltextového indexu zakázek (OrderSearchDocument + FTS5/GIN).
+
+Dokumenty se udržují ze signálů; příkaz je přepočítá všechny — po
+hromadných změnách mimo ORM save (bulk_create, update()):
+  python manage.py rebuild_order_search
+"""
+
+from django.core.management.base import BaseCommand
+
+from app_sprava_montazi.encryption import decrypt_scope
+from app_sprava_montazi import search
+
+
+class Command(BaseCommand):
+    help = "Přepočítá fulltextové dokumenty zakázek"
+
+    @decrypt_scope()
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(
+                self.style.WARNING("Fulltextový index v této DB není — hledá se přes icontains.")
+            )
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Zaindexováno {count} zakázek."))
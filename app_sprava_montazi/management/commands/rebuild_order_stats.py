@@ -0,0 +1,22 @@
+"""
+Přepočet měsíčního rollupu zakázek (OrderMonthlyStats).
+
+Rollup se udržuje průběžně ze signálů Order; příkaz ho přepočítá celý
+znovu — po hromadných změnách mimo ORM save (bulk_create, update())
+nebo pro kontrolu:
+  python manage.py rebuild_order_stats
+"""
+
+from django.core.management.base import BaseCommand
+
+from app_sprava_montazi.models import OrderMonthlyStats
+from app_sprava_montazi.OOP_dashboard import DashboardCache
+
+
+class Command(BaseCommand):
+    help = "Přepočítá měsíční statistiky zakázek (OrderMonthlyStats) z tabulky Order"
+
+    def handle(self, *args, **options):
+        count = OrderMonthlyStats.rebuild()
+        DashboardCache.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"Rollup přepočítán: {count} řádků."))
@@ -0,0 +1,125 @@
+"""
+Rotace šifrovacího klíče osobních údajů (Client + HistoricalClient).
+
+Přešifruje phone/email/street aktuálním FIELD_ENCRYPTION_KEY; tokeny
+starých klíčů čte přes FIELD_ENCRYPTION_OLD_KEYS (postup viz encryption.py).
+
+ - po dávkách podle pk, každá dávka = krátká transakce (select_for_update
+   jen na řádky dávky + bulk_update) — tabulky se nezamykají, jde spustit
+   za provozu, `--sleep` ještě uleví zátěži
+ - pozice se ukládá do checkpointu (JSON), po přerušení se pokračuje;
+   `--restart` začne znovu
+ - hotové hodnoty (key id obálky = aktuální klíč) se přeskočí bez dešifrování
+   — opakované spuštění je bezpečné; holé tokeny starého formátu se převedou
+
+  python manage.py rotate_encryption_key --batch-size 500
+"""
+
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from app_sprava_montazi.encryption import StoredCiphertext, encrypted_fields, rotate_str
+from app_sprava_montazi.models import Client
+
+LOGS_DIR = Path(settings.BASE_DIR) / "logs"
+
+
+class Command(BaseCommand):
+    help = "Přešifruje osobní údaje zákazníků aktuálním FIELD_ENCRYPTION_KEY"
+    checkpoint_name = "rotate_encryption_key.json"
+    done_message = "Rotace klíče dokončena."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--checkpoint", type=Path, default=LOGS_DIR / self.checkpoint_name)
+        parser.add_argument("--restart", action="store_true", help="ignorovat checkpoint")
+        parser.add_argument(
+            "--sleep", type=float, default=0.0, help="pauza mezi dávkami [s] (zátěž za provozu)"
+        )
+
+    def transform(self, value: str) -> str | None:
+        """Nová uložená hodnota; None = beze změny."""
+        return rotate_str(value)
+
+    def check_settings(self) -> None:
+        if settings.FIELD_ENCRYPTION_OLD_KEYS and not settings.BLIND_INDEX_KEY:
+            raise CommandError(
+                "Nastavte BLIND_INDEX_KEY na dosavadní FIELD_ENCRYPTION_KEY — "
+                "jinak by rotace zneplatnila blind indexy zákazníků."
+            )
+
+    def handle(self, *args, **options):
+        self.check_settings()
+        self.checkpoint_path = options["checkpoint"]
+        self.checkpoint = {} if options["restart"] else self._load_checkpoint()
+        for model in (Client, Client.history.model):
+            self._rotate_model(model, options["batch_size"], options["sleep"])
+        self.checkpoint_path.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(self.done_message))
+
+    def _rotate_model(self, model, batch_size: int, pause: float) -> None:
+        label = model._meta.label
+        fields = encrypted_fields(model)
+        # --- Cast na TextField → surový ciphertext bez from_db_value
+        raw = {f"raw_{name}": Cast(name, output_field=TextField()) for name in fields}
+        last_pk = self.checkpoint.get(label, 0)
+        if last_pk:
+            self.stdout.write(f"{label}: pokračuji od pk > {last_pk}")
+        started = time.perf_counter()
+        scanned = rotated = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    model.objects.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .annotate(**raw)
+                    .values_list("pk", *raw)[:batch_size]
+                )
+                if not rows:
+                    break
+                changed = []
+                for pk, *values in rows:
+                    new_values = [self.transform(value) if value else None for value in values]
+                    if any(new_values):
+                        # --- nezměněné hodnoty zpět tak, jak jsou (i holé tokeny)
+                        changed.append(
+                            model(
+                                pk=pk,
+                                **{
+                                    name: new or StoredCiphertext(old or "")
+                                    for name, old, new in zip(fields, values, new_values)
+                                },
+                            )
+                        )
+                model.objects.bulk_update(changed, fields)
+            last_pk = rows[-1][0]
+            scanned += len(rows)
+            rotated += len(changed)
+            self._save_checkpoint(label, last_pk)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label}: {scanned} řádků (změněno {rotated}), "
+                f"pk ≤ {last_pk}, {scanned / elapsed:.0f} řádků/s"
+            )
+            if pause:
+                time.sleep(pause)
+        self.stdout.write(self.style.SUCCESS(f"{label}: změněno {rotated} z {scanned}."))
+
+    def _load_checkpoint(self) -> dict:
+        try:
+            return json.loads(self.checkpoint_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_checkpoint(self, label: str, last_pk: int) -> None:
+        self.checkpoint[label] = last_pk
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_path.write_text(json.dumps(self.checkpoint))
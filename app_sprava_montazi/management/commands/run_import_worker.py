@@ -0,0 +1,82 @@
+"""Worker importu CSV — zpracovává frontu Upload záznamů.
+
+CSVImportView jen uloží soubor (Upload ve stavu Pending) a vrátí 202;
+import běží tady, mimo webové workery:
+
+  python manage.py run_import_worker            # běží trvale, polluje frontu
+  python manage.py run_import_worker --once     # zpracuje frontu a skončí
+
+Import se spouští streamovaně (import_data --upload), průběh a počítadla
+jsou po každé dávce v Upload. Import, jehož worker spadl (Running bez
+checkpointu déle než --stale-after minut), převezme jiný worker a naváže
+od posledního checkpointu.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+from rich.console import Console
+
+from app_sprava_montazi.models import DistribHub, Upload
+
+cons: Console = Console()
+
+
+def import_error_message(error: Exception) -> str:
+    """Chyba importu pro uživatele (dřív odpověď CSVImportView)."""
+    if isinstance(error, KeyError):
+        return f"Špatný soubor CSV: {error.args[0] if error.args else error}"
+    if isinstance(error, DistribHub.DoesNotExist):
+        return f"Chybné místo určení: {error}"
+    if isinstance(error, ValueError):
+        return f"Chyba hodnoty v souboru CSV: {error}"
+    return f"Neznámá chyba: {error}"
+
+
+class Command(BaseCommand):
+    help = "Zpracovává importy CSV z fronty (Upload ve stavu Pending)"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--once", action="store_true", help="zpracovat frontu a skončit")
+        parser.add_argument(
+            "--sleep", type=float, default=2.0, help="pauza při prázdné frontě [s]"
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=15,
+            help="po kolika minutách bez checkpointu převzít Running import",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=None, help="velikost dávky import_data"
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options["stale_after"])
+        while True:
+            # --- dlouho běžící proces — spojení s DB podle CONN_MAX_AGE
+            close_old_connections()
+            upload = Upload.claim_next(stale_after)
+            if upload is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+            self.run_job(upload, options["chunk_size"])
+
+    def run_job(self, upload: Upload, chunk_size: int | None) -> None:
+        cons.log(f"Import {upload.pk}: {upload.file.name}", style="blue")
+        try:
+            if not DistribHub.objects.exists():
+                call_command("distrib_hub")
+            call_command(
+                "import_data", upload.file.path, upload=upload.pk, chunk_size=chunk_size
+            )
+        except Exception as e:
+            upload.mark_failed(import_error_message(e))
+            cons.log(f"Import {upload.pk} selhal: {upload.import_error}", style="red")
+            return
+        cons.log(f"Import {upload.pk} dokončen.", style="green")
@@ -0,0 +1,82 @@
+"""Worker odesílání emailů — zpracovává frontu EmailOutbox.
+
+Akce send-mail jen založí EmailOutbox (Pending) a vrátí 202; email
+s protokolem se sestaví, zašifruje a odešle tady, mimo webové workery:
+
+  python manage.py run_mail_worker            # běží trvale, polluje frontu
+  python manage.py run_mail_worker --once     # zpracuje frontu a skončí
+
+Neúspěšné odeslání se opakuje po --backoff sekundách, pak dvojnásobku atd.
+(next_attempt); po --max-attempts pokusech zůstane email ve stavu Failed.
+Email, jehož worker spadl (Sending déle než --stale-after minut), převezme
+jiný worker — tým pak může dostat email dvakrát, ale nikdy žádný.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+from django.utils import timezone
+from rich.console import Console
+
+from app_sprava_montazi.models import EmailOutbox, MailStatus
+from app_sprava_montazi.OOP_emails import CustomEmail
+
+cons: Console = Console()
+
+
+class Command(BaseCommand):
+    help = "Odesílá emaily s protokoly z fronty (EmailOutbox ve stavu Pending)"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--once", action="store_true", help="zpracovat frontu a skončit")
+        parser.add_argument(
+            "--sleep", type=float, default=5.0, help="pauza při prázdné frontě [s]"
+        )
+        parser.add_argument(
+            "--max-attempts", type=int, default=5, help="počet pokusů před stavem Failed"
+        )
+        parser.add_argument(
+            "--backoff", type=float, default=60.0, help="pauza po prvním neúspěchu [s]"
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=15,
+            help="po kolika minutách převzít email ve stavu Sending",
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options["stale_after"])
+        backoff = timedelta(seconds=options["backoff"])
+        while True:
+            # --- dlouho běžící proces — spojení s DB podle CONN_MAX_AGE
+            close_old_connections()
+            job = EmailOutbox.claim_next(stale_after)
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+            self.run_job(job, options["max_attempts"], backoff)
+
+    def run_job(self, job: EmailOutbox, max_attempts: int, backoff: timedelta) -> None:
+        order_number = job.order.order_number.upper()
+        try:
+            email = CustomEmail(pk=job.order_id, back_url=job.back_url, user=job.requested_by)
+            recipient = ", ".join(email.email_to())
+            email.send_email_with_encrypted_pdf()
+        except Exception as e:
+            job.mark_failed_attempt(str(e), max_attempts, backoff)
+            if job.status == MailStatus.FAILED:
+                cons.log(f"Email {order_number} neodeslan: {e}", style="red")
+            else:
+                cons.log(
+                    f"Email {order_number}: pokus {job.attempts} selhal ({e}), "
+                    f"dalsi {timezone.localtime(job.next_attempt):%H:%M:%S}",
+                    style="yellow",
+                )
+            return
+        job.mark_sent(recipient)
+        cons.log(f"Email {order_number} odeslan na {recipient}.", style="green")
@@ -0,0 +1,93 @@
+"""Worker hromadného generování protokolů — zpracovává frontu ProtocolJob.
+
+Akce generate-pdfs jen uloží vybrané zakázky (ProtocolJob ve stavu Pending)
+a vrátí 202; protokoly se renderují tady, v poolu procesů tohoto workeru:
+
+  python manage.py run_protocol_worker              # běží trvale, polluje frontu
+  python manage.py run_protocol_worker --once       # zpracuje frontu a skončí
+
+Zakázky se generují po dávkách (JOB_CHUNK_SIZE), výsledky se po každé dávce
+uloží do jobu. Job, jehož worker spadl (Running bez checkpointu déle než
+--stale-after minut), převezme jiný worker a naváže od checkpointu.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+from rich.console import Console
+
+from app_sprava_montazi.encryption import decrypt_scope
+from app_sprava_montazi.models import Order, ProtocolJob
+from app_sprava_montazi.protocol_batch import (
+    DEFAULT_WORKERS,
+    JOB_CHUNK_SIZE,
+    ProtocolResult,
+    generate_protocols,
+    shutdown_pool,
+)
+
+cons: Console = Console()
+
+
+class Command(BaseCommand):
+    help = "Generuje PDF protokoly z fronty (ProtocolJob ve stavu Pending)"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--once", action="store_true", help="zpracovat frontu a skončit")
+        parser.add_argument(
+            "--sleep", type=float, default=2.0, help="pauza při prázdné frontě [s]"
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=15,
+            help="po kolika minutách bez checkpointu převzít Running job",
+        )
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options["stale_after"])
+        try:
+            while True:
+                # --- dlouho běžící proces — spojení s DB podle CONN_MAX_AGE
+                close_old_connections()
+                job = ProtocolJob.claim_next(stale_after)
+                if job is None:
+                    if options["once"]:
+                        return
+                    time.sleep(options["sleep"])
+                    continue
+                self.run_job(job, options["workers"])
+        finally:
+            shutdown_pool()
+
+    @decrypt_scope()
+    def run_job(self, job: ProtocolJob, workers: int) -> None:
+        cons.log(f"Protokoly {job.pk}: {len(job.orders) - job.done} zakazek", style="blue")
+        try:
+            for start in range(job.done, len(job.orders), JOB_CHUNK_SIZE):
+                chunk = job.orders[start : start + JOB_CHUNK_SIZE]
+                results = generate_protocols(
+                    Order.objects.filter(pk__in=chunk), workers=workers, force=job.force
+                )
+                found = {result.order_id for result in results}
+                # --- zakázka smazaná mezi zadáním a zpracováním
+                results += [
+                    ProtocolResult(pk, "", ok=False, error="Zakázka neexistuje.")
+                    for pk in chunk
+                    if pk not in found
+                ]
+                job.save_checkpoint([result.as_dict() for result in results])
+        except Exception as e:
+            job.mark_failed(str(e))
+            cons.log(f"Protokoly {job.pk} selhaly: {e}", style="red")
+            return
+        job.mark_done()
+        summary = job.summary()
+        cons.log(
+            f"Protokoly {job.pk}: {summary['generated']} hotovo, {summary['skipped']} beze "
+            f"zmeny, {summary['failed']} chyb.",
+            style="red" if summary["failed"] else "green",
+        )
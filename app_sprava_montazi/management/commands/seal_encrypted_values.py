@@ -0,0 +1,25 @@
+"""
+Převod šifrovaných hodnot Client + HistoricalClient do obálky
+"enc1:<key id>:<token>" (viz encryption.py).
+
+Holé Fernet tokeny se nepřešifrují — ověří se jen podpis, kterým klíčem
+byly vytvořeny, a doplní se prefix s key id. Dávkování, checkpoint
+a běh za provozu jako u rotate_encryption_key:
+  python manage.py seal_encrypted_values --batch-size 1000
+"""
+
+from app_sprava_montazi.encryption import seal_legacy
+
+from .rotate_encryption_key import Command as RotateCommand
+
+
+class Command(RotateCommand):
+    help = "Převede holé Fernet tokeny zákazníků do verzované obálky s key id"
+    checkpoint_name = "seal_encrypted_values.json"
+    done_message = "Převod do obálky dokončen."
+
+    def transform(self, value: str) -> str | None:
+        return seal_legacy(value)
+
+    def check_settings(self) -> None:
+        pass  # --- klíče se nemění, blind indexy zůstávají platné
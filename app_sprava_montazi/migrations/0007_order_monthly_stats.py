@@ -0,0 +1,75 @@
+# Generated by Django 5.2 on 2026-10-18 18:11
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+
+def fill_order_stats(apps, schema_editor):
+    """Naplní rollup z existujících zakázek (stejně jako OrderMonthlyStats.rebuild)."""
+    Order = apps.get_model("app_sprava_montazi", "Order")
+    OrderMonthlyStats = apps.get_model("app_sprava_montazi", "OrderMonthlyStats")
+    zero = Value(Decimal(0), output_field=models.DecimalField(max_digits=14, decimal_places=2))
+    rows = (
+        Order.objects.order_by()
+        .annotate(year=ExtractYear("evidence_termin"), month=ExtractMonth("evidence_termin"))
+        .values("year", "month", "mandant", "distrib_hub_id", "status", "team_type")
+        .annotate(
+            order_count=Count("pk"),
+            no_montage_count=Count("pk", filter=Q(montage_termin__isnull=True)),
+            vynos_sum=Coalesce(Sum("vynos"), zero),
+            naklad_sum=Coalesce(Sum("naklad"), zero),
+        )
+    )
+    OrderMonthlyStats.objects.bulk_create(
+        [
+            OrderMonthlyStats(
+                year=row["year"],
+                month=row["month"],
+                mandant=row["mandant"],
+                distrib_hub_id=row["distrib_hub_id"],
+                status=row["status"],
+                team_type=row["team_type"],
+                order_count=row["order_count"],
+                no_montage_count=row["no_montage_count"],
+                vynos=row["vynos_sum"],
+                naklad=row["naklad_sum"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0006_gdpr_retention_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderMonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Rok')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Měsíc')),
+                ('mandant', models.CharField(max_length=4, verbose_name='Mandant')),
+                ('status', models.CharField(choices=[('New', 'Nový'), ('Adviced', 'Zatermínováno'), ('Realized', 'Realizováno'), ('Billed', 'Vyúčtovaný'), ('Canceled', 'Zrušeno'), ('Hidden', 'Skryto')], max_length=32, verbose_name='Stav')),
+                ('team_type', models.CharField(choices=[('By_customer', 'Zákazníkem'), ('By_delivery_crew', 'Dopravcem'), ('By_assembly_crew', 'Montážníky')], max_length=32, verbose_name='Realizace kým')),
+                ('order_count', models.IntegerField(default=0, verbose_name='Počet zakázek')),
+                ('no_montage_count', models.IntegerField(default=0, verbose_name='Bez termínu montáže')),
+                ('vynos', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Výnos')),
+                ('naklad', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Náklad')),
+                ('distrib_hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app_sprava_montazi.distribhub', verbose_name='Místo určení')),
+            ],
+            options={
+                'verbose_name': 'Měsíční statistika zakázek',
+                'verbose_name_plural': 'Měsíční statistiky zakázek',
+                'constraints': [models.UniqueConstraint(fields=('year', 'month', 'mandant', 'distrib_hub', 'status', 'team_type'), name='order_monthly_stats_unique_bucket')],
+            },
+        ),
+        migrations.RunPython(fill_order_stats, migrations.RunPython.noop),
+    ]
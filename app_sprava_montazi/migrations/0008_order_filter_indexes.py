@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0007_order_monthly_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'team_type', 'evidence_termin'], name='order_status_type_evid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['mandant', 'evidence_termin', 'distrib_hub'], name='order_mandant_evid_hub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('montage_termin__isnull', True)), fields=['status', 'evidence_termin'], name='order_no_montage_idx'),
+        ),
+    ]
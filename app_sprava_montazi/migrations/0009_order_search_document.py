@@ -0,0 +1,103 @@
+# Generated by Django 5.2 on 2026-10-18 18:19
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models
+
+FTS = "app_sprava_montazi_ordersearch_fts"
+TABLE = "app_sprava_montazi_ordersearchdocument"
+DOCUMENT_FIELDS = (
+    "order_number",
+    "client__name",
+    "team__name",
+    "mandant",
+    "distrib_hub__code",
+    "distrib_hub__city",
+    "notes",
+)
+
+
+def _normalize(text):
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def create_search_index(apps, schema_editor):
+    """FTS5 + triggery (SQLite) resp. GIN index (PostgreSQL) — viz search.py."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX order_search_gin_idx ON {TABLE} "
+            "USING GIN (to_tsvector('simple', document))"
+        )
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS} USING fts5(document, content='{TABLE}', "
+                "content_rowid='order_id', tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            return  # --- SQLite bez FTS5 → search.is_available() = False, hledá se přes icontains
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS}_ai AFTER INSERT ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS}(rowid, document) VALUES (new.order_id, new.document); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS}_ad AFTER DELETE ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS}({FTS}, rowid, document) "
+            "VALUES ('delete', old.order_id, old.document); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS}_au AFTER UPDATE ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS}({FTS}, rowid, document) "
+            "VALUES ('delete', old.order_id, old.document); "
+            f"INSERT INTO {FTS}(rowid, document) VALUES (new.order_id, new.document); END"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS order_search_gin_idx")
+    elif vendor == "sqlite":
+        for suffix in ("_ai", "_ad", "_au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS}{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS}")
+
+
+def fill_documents(apps, schema_editor):
+    Order = apps.get_model("app_sprava_montazi", "Order")
+    OrderSearchDocument = apps.get_model("app_sprava_montazi", "OrderSearchDocument")
+    rows = Order.objects.order_by().values("pk", *DOCUMENT_FIELDS)
+    OrderSearchDocument.objects.bulk_create(
+        [
+            OrderSearchDocument(
+                order_id=row["pk"],
+                document=" ".join(
+                    _normalize(row[name]) for name in DOCUMENT_FIELDS if row[name]
+                ),
+            )
+            for row in rows.iterator(chunk_size=1000)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0008_order_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearchDocument',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='app_sprava_montazi.order', verbose_name='Zakázka')),
+                ('document', models.TextField(blank=True, verbose_name='Dokument')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(fill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 18:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0009_order_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='email_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='phone_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='street_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='historicalclient',
+            name='email_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='historicalclient',
+            name='phone_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='historicalclient',
+            name='street_bidx',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.CreateModel(
+            name='ClientStreetToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(db_index=True, max_length=32, verbose_name='HMAC tokenu')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='street_tokens', to='app_sprava_montazi.client', verbose_name='Zákazník')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('client', 'digest'), name='client_street_token_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0010_client_blind_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalupload',
+            name='counters',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Počítadla importu'),
+        ),
+        migrations.AddField(
+            model_name='historicalupload',
+            name='import_error',
+            field=models.TextField(blank=True, verbose_name='Chyba importu'),
+        ),
+        migrations.AddField(
+            model_name='historicalupload',
+            name='import_status',
+            field=models.CharField(choices=[('Pending', 'Čeká'), ('Running', 'Probíhá'), ('Done', 'Dokončeno'), ('Failed', 'Chyba')], default='Pending', max_length=16, verbose_name='Stav importu'),
+        ),
+        migrations.AddField(
+            model_name='historicalupload',
+            name='rows_done',
+            field=models.PositiveIntegerField(default=0, verbose_name='Zpracováno řádků'),
+        ),
+        migrations.AddField(
+            model_name='historicalupload',
+            name='updated',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Poslední checkpoint'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='counters',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Počítadla importu'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='import_error',
+            field=models.TextField(blank=True, verbose_name='Chyba importu'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='import_status',
+            field=models.CharField(choices=[('Pending', 'Čeká'), ('Running', 'Probíhá'), ('Done', 'Dokončeno'), ('Failed', 'Chyba')], default='Pending', max_length=16, verbose_name='Stav importu'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='rows_done',
+            field=models.PositiveIntegerField(default=0, verbose_name='Zpracováno řádků'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='updated',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Poslední checkpoint'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+def mark_existing_imported(apps, schema_editor):
+    """Dosavadní uploady naimportoval synchronně CSVImportView — nesmí
+    skončit ve frontě workera."""
+    Upload = apps.get_model("app_sprava_montazi", "Upload")
+    Upload.objects.filter(import_status="Pending").update(import_status="Done")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0011_upload_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalupload',
+            name='rows_total',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Řádků v souboru'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='rows_total',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Řádků v souboru'),
+        ),
+        migrations.RunPython(mark_existing_imported, migrations.RunPython.noop),
+    ]
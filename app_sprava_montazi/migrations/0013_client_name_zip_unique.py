@@ -0,0 +1,77 @@
+# Generated by Django 5.2 on 2026-10-18 19:14
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+# --- (šifrované pole, jeho blind index) — prázdné hodnoty doplní duplicita
+CONTACT_FIELDS = [("phone", "phone_bidx"), ("email", "email_bidx"), ("street", "street_bidx")]
+
+audit_logger = logging.getLogger("gdpr_audit")
+
+
+def merge_duplicate_clients(apps, schema_editor):
+    """Duplicity (name, zip_code) — zakázky a hovory přepojí na nejstaršího
+    zákazníka, ostatní smaže (jinak nejde založit unikátní index).
+
+    Prázdný telefon, email, ulici a město nejstaršího zákazníka doplní
+    z duplicit (šifrovaná hodnota i blind index, u ulice i tokeny) a přepočítá
+    příznak `incomplete`; sloučená id se zapíšou do GDPR audit logu.
+    """
+    Client = apps.get_model("app_sprava_montazi", "Client")
+    ClientStreetToken = apps.get_model("app_sprava_montazi", "ClientStreetToken")
+    Order = apps.get_model("app_sprava_montazi", "Order")
+    CallLog = apps.get_model("app_sprava_montazi", "CallLog")
+    duplicates = (
+        Client.objects.values("name", "zip_code")
+        .annotate(count=Count("pk"), keep=Min("pk"))
+        .filter(count__gt=1)
+    )
+    for group in duplicates:
+        keep = Client.objects.get(pk=group["keep"])
+        others = Client.objects.filter(name=group["name"], zip_code=group["zip_code"]).exclude(
+            pk=keep.pk
+        )
+        filled = {}
+        for other in others.order_by("pk"):
+            for field, bidx in CONTACT_FIELDS:
+                if field not in filled and not getattr(keep, field) and getattr(other, field):
+                    filled[field] = getattr(other, field)
+                    filled[bidx] = getattr(other, bidx)
+                    if field == "street":
+                        ClientStreetToken.objects.filter(client=other).update(client=keep)
+            if "city" not in filled and not keep.city and other.city:
+                filled["city"] = other.city
+        if filled:
+            merged_contact = {
+                field: filled.get(field, getattr(keep, field))
+                for field in ("street", "city", "phone")
+            }
+            filled["incomplete"] = not all(merged_contact.values())
+            Client.objects.filter(pk=keep.pk).update(**filled)
+
+        merged = sorted(others.values_list("pk", flat=True))
+        Order.objects.filter(client__in=others).update(client_id=keep.pk)
+        CallLog.objects.filter(client__in=others).update(client_id=keep.pk)
+        others.delete()
+        message = (
+            f"client_name_zip_unique: zakaznici {merged} slouceni do {keep.pk}"
+            f" (doplneno: {', '.join(f for f in filled if f in ('phone', 'email', 'street', 'city')) or '-'})"
+        )
+        audit_logger.info(message)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0012_upload_import_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_clients, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='client',
+            constraint=models.UniqueConstraint(fields=('name', 'zip_code'), name='client_name_zip_unique'),
+        ),
+    ]
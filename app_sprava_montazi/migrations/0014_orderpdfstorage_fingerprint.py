@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0013_client_name_zip_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalorderpdfstorage',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Otisk dat protokolu'),
+        ),
+        migrations.AddField(
+            model_name='orderpdfstorage',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Otisk dat protokolu'),
+        ),
+    ]
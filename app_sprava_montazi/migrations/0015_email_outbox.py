@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 19:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0014_orderpdfstorage_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('back_url', models.CharField(max_length=500, verbose_name='Odkaz na zpětný protokol')),
+                ('status', models.CharField(choices=[('Pending', 'Čeká'), ('Sending', 'Odesílá se'), ('Sent', 'Odesláno'), ('Failed', 'Chyba')], default='Pending', max_length=16, verbose_name='Stav')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Počet pokusů')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Další pokus')),
+                ('last_error', models.TextField(blank=True, verbose_name='Poslední chyba')),
+                ('recipient', models.CharField(blank=True, max_length=254, verbose_name='Adresát')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Založeno')),
+                ('updated', models.DateTimeField(blank=True, null=True, verbose_name='Převzato workerem')),
+                ('sent', models.DateTimeField(blank=True, null=True, verbose_name='Odesláno')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='outbox_emails', to='app_sprava_montazi.order', verbose_name='Zakázka')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Odeslal dispečer')),
+            ],
+            options={
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['status', 'next_attempt'], name='app_sprava__status_5871dd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 20:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0015_email_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProtocolJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.JSONField(default=list, verbose_name='Zakázky (id)')),
+                ('force', models.BooleanField(default=False, verbose_name='Generovat i aktuální protokoly')),
+                ('status', models.CharField(choices=[('Pending', 'Čeká'), ('Running', 'Probíhá'), ('Done', 'Dokončeno'), ('Failed', 'Chyba')], default='Pending', max_length=16, verbose_name='Stav')),
+                ('done', models.PositiveIntegerField(default=0, verbose_name='Zpracováno zakázek')),
+                ('results', models.JSONField(default=list, verbose_name='Výsledky po zakázkách')),
+                ('error', models.TextField(blank=True, verbose_name='Chyba')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Založeno')),
+                ('updated', models.DateTimeField(blank=True, null=True, verbose_name='Poslední checkpoint')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Zadal dispečer')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sprava_montazi', '0016_protocol_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='token',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Token zpětného protokolu'),
+        ),
+    ]
@@ -2,12 +2,14 @@
 
 from decimal import Decimal
 import hashlib
+import secrets
 
 from rich.console import Console
 
 # --- django
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
@@ -16,6 +18,7 @@ from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db.models import PROTECT, BooleanField, CharField, DateField, EmailField
 from django.db.models import SlugField, PositiveIntegerField, ForeignKey, FileField
 from django.db.models import JSONField, OneToOneField, TextField, TextChoices, Model
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
 
 # --- pluginy
 from simple_history.models import HistoricalRecords
@@ -23,6 +26,8 @@ from phonenumber_field.modelfields import PhoneNumberField
 
 # --- šifrování osobních údajů (GDPR)
 from app_sprava_montazi.encryption import EncryptedCharField, EncryptedEmailField
+from app_sprava_montazi.encryption import blind_index, normalize_email
+from app_sprava_montazi.encryption import normalize_street, street_tokens
 
 User = get_user_model()
 cons: Console = Console()
@@ -48,6 +53,20 @@ class AdviceStatus(TextChoices):
     FAILED = "Failed", "Neúspěšný"
 
 
+class ImportStatus(TextChoices):
+    PENDING = "Pending", "Čeká"
+    RUNNING = "Running", "Probíhá"
+    DONE = "Done", "Dokončeno"
+    FAILED = "Failed", "Chyba"
+
+
+class MailStatus(TextChoices):
+    PENDING = "Pending", "Čeká"
+    SENDING = "Sending", "Odesílá se"
+    SENT = "Sent", "Odesláno"
+    FAILED = "Failed", "Chyba"
+
+
 class Whom(TextChoices):
     TO_CUSTOMER = "To_customer", "Zákazníkovi"
     TO_DELIVERY_CREW = "To_delivery_crew", "Dopravci"
@@ -130,6 +149,11 @@ class Client(Model):
     email = EncryptedEmailField(blank=True, verbose_name="E-mail")
     incomplete = BooleanField(default=True, verbose_name="Neúplný záznam")
 
+    # --- blind index šifrovaných polí (HMAC normalizované hodnoty, viz encryption.py)
+    phone_bidx = CharField(max_length=32, blank=True, editable=False, db_index=True)
+    email_bidx = CharField(max_length=32, blank=True, editable=False, db_index=True)
+    street_bidx = CharField(max_length=32, blank=True, editable=False, db_index=True)
+
     # --- GDPR ---
     consent_given = BooleanField(
         default=False,
@@ -203,12 +227,176 @@ class Client(Model):
             pass
         return raw
 
-    def save(self, *args, **kwargs):
+    # --- pole → blind index sloupec
+    BLIND_INDEXED = {"phone": "phone_bidx", "email": "email_bidx", "street": "street_bidx"}
+
+    def blind_indexes(self) -> dict[str, str]:
+        """Hodnoty blind index sloupců pro aktuální phone/email/street."""
+        return {
+            "phone_bidx": blind_index(self.normalize_phone(self.phone or "")),
+            "email_bidx": blind_index(normalize_email(self.email)),
+            "street_bidx": blind_index(normalize_street(self.street)),
+        }
+
+    # --- lookupy přes blind index (prázdná hodnota nesmí trefit klienty bez údaje)
+    @classmethod
+    def phone_match(cls, value: str) -> models.Q:
+        digest = blind_index(cls.normalize_phone((value or "").strip()))
+        return models.Q(phone_bidx=digest) if digest else models.Q(pk__in=[])
+
+    @classmethod
+    def email_match(cls, value: str) -> models.Q:
+        digest = blind_index(normalize_email(value))
+        return models.Q(email_bidx=digest) if digest else models.Q(pk__in=[])
+
+    @classmethod
+    def street_match(cls, value: str) -> models.Q:
+        """Všechny tokeny hledaného textu musí být v ulici ('miru 12' najde 'Náměstí Míru 12')."""
+        tokens = street_tokens(value)
+        if not tokens:
+            return models.Q(pk__in=[])
+        condition = models.Q()
+        for token in tokens:
+            condition &= models.Q(
+                pk__in=ClientStreetToken.objects.filter(digest=blind_index(token)).values(
+                    "client_id"
+                )
+            )
+        return condition
+
+    def street_token_digests(self) -> set[str]:
+        return {blind_index(token) for token in street_tokens(self.street)}
+
+    def sync_street_tokens(self) -> None:
+        """Přepíše tokeny ulice (ClientStreetToken) podle aktuální hodnoty."""
+        self.street_tokens.all().delete()
+        ClientStreetToken.objects.bulk_create(
+            ClientStreetToken(client=self, digest=digest)
+            for digest in self.street_token_digests()
+        )
+
+    def prepare_write(self) -> None:
+        """Odvozená pole jako v save() — pro zápis mimo save() (upsert)."""
         self.phone = self.normalize_phone(self.phone)
         self.incomplete = not all([self.street, self.city, self.phone])
         if not self.slug:
             self.slug = self.generate_slug()
+        for name, value in self.blind_indexes().items():
+            setattr(self, name, value)
+
+    @staticmethod
+    def identity(name: str, zip_code: str) -> tuple[str, str]:
+        """Klíč zákazníka (name, zip_code) — viz Meta.constraints"""
+        return name.strip(), zip_code.strip()
+
+    @classmethod
+    def upsert(
+        cls, clients: list["Client"], batch_size: int = 500
+    ) -> tuple[dict[tuple[str, str], "Client"], set[tuple[str, str]]]:
+        """Hromadné založení zákazníků podle (name, zip_code).
+
+        `INSERT ... ON CONFLICT (name, zip_code) DO NOTHING RETURNING` —
+        vloží chybějící, existující nechá beze změny. Souběžní zapisovatelé
+        tak nemohou založit duplicitu ani spadnout na IntegrityError.
+        Vrací (klíč → zákazník, klíče nově vložených); existující zákazníci
+        se načtou z DB. Nově vloženým se založí historie a tokeny ulice
+        (bulk zápis neposílá signály ani nevolá save()).
+        """
+        pending: dict[tuple[str, str], Client] = {}
+        for client in clients:
+            client.name, client.zip_code = cls.identity(client.name, client.zip_code)
+            pending.setdefault((client.name, client.zip_code), client)
+        if not pending:
+            return {}, set()
+
+        quote = connection.ops.quote_name
+        fields = [field for field in cls._meta.concrete_fields if not field.primary_key]
+        name_col = quote(cls._meta.get_field("name").column)
+        zip_col = quote(cls._meta.get_field("zip_code").column)
+        pk_col = quote(cls._meta.pk.column)
+        row = "(" + ", ".join(["%s"] * len(fields)) + ")"
+        sql = (
+            f"INSERT INTO {quote(cls._meta.db_table)} "
+            f"({', '.join(quote(field.column) for field in fields)}) VALUES {{rows}} "
+            f"ON CONFLICT ({name_col}, {zip_col}) DO NOTHING "
+            f"RETURNING {pk_col}, {name_col}, {zip_col}"
+        )
+
+        # --- vše v jedné transakci — jinak by po chybě (zamčená tabulka) zůstal
+        # --- vložený zákazník bez historie a opakování by ho vrátilo jako existující
+        with transaction.atomic():
+            created: list[Client] = []
+            items = list(pending.items())
+            for start in range(0, len(items), batch_size):
+                chunk = [client for _, client in items[start : start + batch_size]]
+                params = []
+                for client in chunk:
+                    client.prepare_write()
+                    params.extend(
+                        field.get_db_prep_save(field.pre_save(client, add=True), connection)
+                        for field in fields
+                    )
+                with connection.cursor() as cursor:
+                    cursor.execute(sql.format(rows=", ".join([row] * len(chunk))), params)
+                    inserted = cursor.fetchall()
+                for pk, name, zip_code in inserted:
+                    client = pending[(name, zip_code)]
+                    client.pk = pk
+                    client._state.adding = False
+                    client._state.db = connection.alias
+                    created.append(client)
+
+            result = {(client.name, client.zip_code): client for client in created}
+            missing = [key for key in pending if key not in result]
+            for start in range(0, len(missing), batch_size):
+                keys = missing[start : start + batch_size]
+                candidates = cls.objects.filter(
+                    name__in={name for name, _ in keys}, zip_code__in={zip_code for _, zip_code in keys}
+                )
+                for client in candidates:
+                    if (client.name, client.zip_code) in pending:
+                        result[(client.name, client.zip_code)] = client
+
+            if created:
+                cls.history.bulk_history_create(created, batch_size=batch_size)
+                ClientStreetToken.objects.bulk_create(
+                    (
+                        ClientStreetToken(client=client, digest=digest)
+                        for client in created
+                        for digest in client.street_token_digests()
+                    ),
+                    batch_size=batch_size,
+                )
+        return result, {(client.name, client.zip_code) for client in created}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+        # --- update_fields bez šifrovaných polí → nic se nedešifruje
+        encrypted_touched = update_fields is None or bool(
+            update_fields & {*self.BLIND_INDEXED, "city", "incomplete"}
+        )
+        if encrypted_touched:
+            self.phone = self.normalize_phone(self.phone)
+            self.incomplete = not all([self.street, self.city, self.phone])
+        if not self.slug:
+            self.slug = self.generate_slug()
+        old_street_bidx = self.street_bidx
+        if encrypted_touched:
+            for name, value in self.blind_indexes().items():
+                setattr(self, name, value)
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields | {
+                bidx for name, bidx in self.BLIND_INDEXED.items() if name in update_fields
+            }
+            # --- přepočítaný příznak uložit i při částečném save
+            if encrypted_touched:
+                kwargs["update_fields"].add("incomplete")
+        creating = self._state.adding
         super().save(*args, **kwargs)
+        if creating or self.street_bidx != old_street_bidx:
+            self.sync_street_tokens()
 
     def anonymize(self) -> None:
         """
@@ -233,6 +421,29 @@ class Client(Model):
     def __str__(self) -> str:
         return str(self.name)
 
+    class Meta:
+        constraints = [
+            # --- identita zákazníka; index zároveň pro lookup (name, zip_code)
+            models.UniqueConstraint(fields=["name", "zip_code"], name="client_name_zip_unique")
+        ]
+
+
+class ClientStreetToken(Model):
+    """Blind index tokenů ulice — hledání podle části adresy (viz Client.sync_street_tokens)."""
+
+    client = ForeignKey(
+        Client, on_delete=models.CASCADE, related_name="street_tokens", verbose_name="Zákazník"
+    )
+    digest = CharField(max_length=32, db_index=True, verbose_name="HMAC tokenu")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["client", "digest"], name="client_street_token_unique")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.client_id}: {self.digest}"
+
 
 class DataRetentionPolicy(Model):
     """
@@ -468,6 +679,206 @@ class Order(Model):
 
     class Meta:
         ordering = ["-evidence_termin"]
+        indexes = [
+            # --- stavové filtry (status_group, call_errors_adviced, Dashboard, bot) + řazení
+            # (mail_datum_sended__isnull vlastní index nemá — ve všech dotazech je
+            # v OR s podmínkou na tým, takže ho partial index nepokryje; filtruje
+            # se nad řádky vybranými přes status + team_type)
+            models.Index(
+                fields=["status", "team_type", "evidence_termin"],
+                name="order_status_type_evid_idx",
+            ),
+            # --- dashboard / seznam: mandant + rok/měsíc (+ místo určení)
+            # (evidence_termin schválně ne jako první sloupec — nezměnit pořadí
+            # shodných termínů ve výchozím řazení)
+            models.Index(
+                fields=["mandant", "evidence_termin", "distrib_hub"],
+                name="order_mandant_evid_hub_idx",
+            ),
+            # --- bez termínu montáže (dashboard no_montage_term) — jen NULL řádky
+            models.Index(
+                fields=["status", "evidence_termin"],
+                condition=models.Q(montage_termin__isnull=True),
+                name="order_no_montage_idx",
+            ),
+        ]
+
+
+class OrderMonthlyStats(Model):
+    """Rollup zakázek po měsících — podklad pro dashboard.
+
+    Jeden řádek = (rok, měsíc evidence, mandant, místo určení, stav,
+    realizace) → počet zakázek, z toho bez termínu montáže, součty
+    výnosu a nákladu. Udržuje se inkrementálně ze signálů Order
+    (viz signals.py), celý se přepočítá `manage.py rebuild_order_stats`.
+    """
+
+    # --- pole zakázky, ze kterých se počítá příspěvek do rollupu
+    ORDER_FIELDS = (
+        "evidence_termin",
+        "mandant",
+        "distrib_hub_id",
+        "status",
+        "team_type",
+        "montage_termin",
+        "vynos",
+        "naklad",
+    )
+
+    year = models.PositiveSmallIntegerField(verbose_name="Rok")
+    month = models.PositiveSmallIntegerField(verbose_name="Měsíc")
+    mandant = CharField(max_length=4, verbose_name="Mandant")
+    distrib_hub = ForeignKey(
+        DistribHub, on_delete=models.CASCADE, verbose_name="Místo určení"
+    )
+    status = CharField(max_length=32, choices=Status.choices, verbose_name="Stav")
+    team_type = CharField(
+        max_length=32, choices=TeamType.choices, verbose_name="Realizace kým"
+    )
+    order_count = models.IntegerField(default=0, verbose_name="Počet zakázek")
+    no_montage_count = models.IntegerField(
+        default=0, verbose_name="Bez termínu montáže"
+    )
+    vynos = DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal(0), verbose_name="Výnos"
+    )
+    naklad = DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal(0), verbose_name="Náklad"
+    )
+
+    class Meta:
+        verbose_name = "Měsíční statistika zakázek"
+        verbose_name_plural = "Měsíční statistiky zakázek"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "month", "mandant", "distrib_hub", "status", "team_type"],
+                name="order_monthly_stats_unique_bucket",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.year}/{self.month:02d} {self.mandant} {self.status}"
+
+    @staticmethod
+    def bucket_of(row: dict) -> tuple[dict, dict]:
+        """(klíč, příspěvek) jedné zakázky — `row` obsahuje ORDER_FIELDS."""
+        key = {
+            "year": row["evidence_termin"].year,
+            "month": row["evidence_termin"].month,
+            "mandant": row["mandant"],
+            "distrib_hub_id": row["distrib_hub_id"],
+            "status": row["status"],
+            "team_type": row["team_type"],
+        }
+        values = {
+            "order_count": 1,
+            "no_montage_count": 1 if row["montage_termin"] is None else 0,
+            "vynos": Decimal(row["vynos"] or 0),
+            "naklad": Decimal(row["naklad"] or 0),
+        }
+        return key, values
+
+    @classmethod
+    def _add(cls, key: dict, values: dict) -> None:
+        if not any(values.values()):
+            return
+        changes = {name: models.F(name) + delta for name, delta in values.items()}
+        if cls.objects.filter(**key).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(**key, **values)
+        except IntegrityError:
+            # --- souběžně ho někdo založil → už jen přičteme
+            cls.objects.filter(**key).update(**changes)
+
+    @classmethod
+    def apply_change(cls, before: dict | None, after: dict | None) -> None:
+        """Přesune příspěvek zakázky ze stavu `before` do `after` (None = neexistuje)."""
+        old = cls.bucket_of(before) if before else None
+        new = cls.bucket_of(after) if after else None
+        with transaction.atomic():
+            if old and new and old[0] == new[0]:
+                cls._add(new[0], {k: new[1][k] - old[1][k] for k in new[1]})
+                return
+            if old:
+                cls._add(old[0], {k: -v for k, v in old[1].items()})
+            if new:
+                cls._add(new[0], new[1])
+
+    @classmethod
+    def apply_created(cls, rows) -> None:
+        """Přičte nově vložené zakázky (bulk_create) — jeden update na bucket."""
+        buckets: dict[tuple, dict] = {}
+        for row in rows:
+            key, values = cls.bucket_of(row)
+            total = buckets.setdefault(tuple(key.items()), dict.fromkeys(values, 0))
+            for name, delta in values.items():
+                total[name] += delta
+        with transaction.atomic():
+            for key, values in buckets.items():
+                cls._add(dict(key), values)
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """Přepočítá celý rollup jedním GROUP BY nad Order; vrací počet řádků."""
+        zero = models.Value(Decimal(0), output_field=DecimalField(max_digits=14, decimal_places=2))
+        rows = (
+            Order.objects.order_by()
+            .annotate(
+                year=ExtractYear("evidence_termin"),
+                month=ExtractMonth("evidence_termin"),
+            )
+            .values("year", "month", "mandant", "distrib_hub_id", "status", "team_type")
+            .annotate(
+                order_count=models.Count("pk"),
+                no_montage_count=models.Count(
+                    "pk", filter=models.Q(montage_termin__isnull=True)
+                ),
+                vynos_sum=Coalesce(models.Sum("vynos"), zero),
+                naklad_sum=Coalesce(models.Sum("naklad"), zero),
+            )
+        )
+        stats = [
+            cls(
+                year=row["year"],
+                month=row["month"],
+                mandant=row["mandant"],
+                distrib_hub_id=row["distrib_hub_id"],
+                status=row["status"],
+                team_type=row["team_type"],
+                order_count=row["order_count"],
+                no_montage_count=row["no_montage_count"],
+                vynos=row["vynos_sum"],
+                naklad=row["naklad_sum"],
+            )
+            for row in rows
+        ]
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(stats, batch_size=1000)
+        return len(stats)
+
+
+class OrderSearchDocument(Model):
+    """Fulltextový dokument zakázky (viz search.py).
+
+    Normalizovaný text (malá písmena, bez diakritiky) z čísla zakázky,
+    zákazníka, týmu, mandanta, místa určení a poznámek. Nad ním je
+    FTS5 tabulka (SQLite) resp. GIN index (PostgreSQL).
+    """
+
+    order = OneToOneField(
+        Order,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+        verbose_name="Zakázka",
+    )
+    document = TextField(blank=True, verbose_name="Dokument")
+
+    def __str__(self) -> str:
+        return f"{self.order_id}: {self.document[:40]}"
 
 
 class Article(Model):
@@ -500,11 +911,295 @@ class Article(Model):
 class Upload(models.Model):
     file = FileField(upload_to="uploads/")
     created = DateTimeField(auto_now_add=True)
+    # --- checkpoint streamovaného importu (import_data --upload)
+    import_status = CharField(
+        max_length=16,
+        choices=ImportStatus.choices,
+        default=ImportStatus.PENDING,
+        verbose_name="Stav importu",
+    )
+    rows_done = PositiveIntegerField(default=0, verbose_name="Zpracováno řádků")
+    rows_total = PositiveIntegerField(null=True, blank=True, verbose_name="Řádků v souboru")
+    counters = JSONField(default=dict, blank=True, verbose_name="Počítadla importu")
+    import_error = TextField(blank=True, verbose_name="Chyba importu")
+    updated = DateTimeField(null=True, blank=True, verbose_name="Poslední checkpoint")
     history = HistoricalRecords()
 
     def __str__(self) -> str:
         return f"{self.file.name if self.file else 'No file'}"
 
+    @property
+    def progress(self) -> float | None:
+        """Průběh importu v %; None = počet řádků ještě není známý."""
+        if self.import_status == ImportStatus.DONE:
+            return 100.0
+        if not self.rows_total:
+            return None
+        return round(min(self.rows_done / self.rows_total, 1) * 100, 1)
+
+    @classmethod
+    def claim_next(cls, stale_after=None) -> "Upload | None":
+        """Převezme nejstarší čekající import pro workera.
+
+        Převzetí je compare-and-swap přes update() (stav + updated) — dva
+        workeři nikdy nedostanou stejný záznam, zámky nejsou potřeba.
+        S `stale_after` (timedelta) se převezmou i importy ve stavu
+        Running bez checkpointu déle než stale_after (spadlý worker) —
+        import_data pak naváže od checkpointu.
+        """
+        waiting = models.Q(import_status=ImportStatus.PENDING)
+        if stale_after is not None:
+            waiting |= models.Q(
+                import_status=ImportStatus.RUNNING,
+                updated__lt=timezone.now() - stale_after,
+            )
+        candidates = cls.objects.filter(waiting).order_by("created", "pk")
+        for job in candidates.only("pk", "import_status", "updated")[:10]:
+            claimed = cls.objects.filter(
+                pk=job.pk, import_status=job.import_status, updated=job.updated
+            ).update(import_status=ImportStatus.RUNNING, updated=timezone.now())
+            if claimed:
+                return cls.objects.get(pk=job.pk)
+        return None
+
+    def _set_import_state(self, **fields) -> None:
+        """Zápis stavu přes update() — checkpoint po každé dávce nemá
+        zakládat historický záznam ani posílat signály."""
+        fields["updated"] = timezone.now()
+        Upload.objects.filter(pk=self.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def save_checkpoint(self, rows_done: int, counters: dict) -> None:
+        """Volat ve stejné transakci jako zápis dávky — checkpoint a data
+        se commitnou (nebo vrátí) spolu."""
+        self._set_import_state(
+            import_status=ImportStatus.RUNNING,
+            rows_done=rows_done,
+            counters=dict(counters),
+            import_error="",
+        )
+
+    def set_rows_total(self, rows_total: int) -> None:
+        self._set_import_state(rows_total=rows_total)
+
+    def mark_done(self) -> None:
+        self._set_import_state(import_status=ImportStatus.DONE)
+
+    def mark_failed(self, error: str) -> None:
+        self._set_import_state(import_status=ImportStatus.FAILED, import_error=error)
+
+    class Meta:
+        ordering = ["-created"]
+
+
+class EmailOutbox(Model):
+    """Fronta emailů s protokolem pro montážní tým.
+
+    `send-mail` jen založí záznam (Pending) a vrátí 202; email sestaví,
+    zašifruje PDF a odešle `manage.py run_mail_worker` — pomalý SMTP server
+    tak nedrží webového workera. Neúspěšný pokus se opakuje s backoffem
+    (`next_attempt`), po vyčerpání pokusů zůstane záznam ve stavu Failed.
+    Token zpětného protokolu (`token`) platí až po odeslání — do té doby
+    zůstává v platnosti odkaz z posledního odeslaného emailu.
+    """
+
+    order = ForeignKey(
+        Order, on_delete=PROTECT, related_name="outbox_emails", verbose_name="Zakázka"
+    )
+    back_url = CharField(max_length=500, verbose_name="Odkaz na zpětný protokol")
+    token = CharField(max_length=64, blank=True, verbose_name="Token zpětného protokolu")
+    requested_by = ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Odeslal dispečer",
+    )
+    status = CharField(
+        max_length=16,
+        choices=MailStatus.choices,
+        default=MailStatus.PENDING,
+        verbose_name="Stav",
+    )
+    attempts = PositiveIntegerField(default=0, verbose_name="Počet pokusů")
+    next_attempt = DateTimeField(default=timezone.now, verbose_name="Další pokus")
+    last_error = TextField(blank=True, verbose_name="Poslední chyba")
+    recipient = CharField(max_length=254, blank=True, verbose_name="Adresát")
+    created = DateTimeField(auto_now_add=True, verbose_name="Založeno")
+    updated = DateTimeField(null=True, blank=True, verbose_name="Převzato workerem")
+    sent = DateTimeField(null=True, blank=True, verbose_name="Odesláno")
+
+    def __str__(self) -> str:
+        return f"{self.order_id}: {self.get_status_display()} ({self.attempts}×)"
+
+    @classmethod
+    def enqueue(cls, order: "Order", base_url: str, user=None) -> "EmailOutbox":
+        """Založí email k odeslání; dosud neodeslané emaily zakázky nahradí.
+
+        `base_url` je adresa FE — odkaz na zpětný protokol se skládá z ní
+        a nového tokenu, který se aktivuje až v `mark_sent`.
+        """
+        token = secrets.token_urlsafe(16)
+        cls.objects.filter(order=order, status=MailStatus.PENDING).delete()
+        return cls.objects.create(
+            order=order,
+            back_url=f"{base_url}back-protocol?token={token}",
+            token=token,
+            requested_by=user,
+        )
+
+    @classmethod
+    def claim_next(cls, stale_after=None) -> "EmailOutbox | None":
+        """Převezme nejstarší email k odeslání — compare-and-swap jako
+        Upload.claim_next. Se `stale_after` převezme i email ve stavu
+        Sending, jehož worker spadl."""
+        now = timezone.now()
+        waiting = models.Q(status=MailStatus.PENDING, next_attempt__lte=now)
+        if stale_after is not None:
+            waiting |= models.Q(status=MailStatus.SENDING, updated__lt=now - stale_after)
+        candidates = cls.objects.filter(waiting).order_by("next_attempt", "pk")
+        for job in candidates.only("pk", "status", "updated")[:10]:
+            claimed = cls.objects.filter(
+                pk=job.pk, status=job.status, updated=job.updated
+            ).update(status=MailStatus.SENDING, updated=timezone.now())
+            if claimed:
+                return cls.objects.select_related("order", "requested_by").get(pk=job.pk)
+        return None
+
+    def _set_state(self, **fields) -> None:
+        EmailOutbox.objects.filter(pk=self.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def mark_sent(self, recipient: str) -> None:
+        """Email odešel — v jedné transakci zapíše odeslání na zakázku
+        a aktivuje token zpětného protokolu z emailu (starý zruší).
+
+        Zakázka se jen updatuje — `self.order` je načtená před odesláním
+        a dispečer ji mezitím mohl změnit. Update neposílá signály, cache
+        dashboardu (počty neodeslaných emailů) se proto zneplatní ručně.
+        """
+        from .OOP_dashboard import DashboardCache
+
+        now = timezone.now()
+        with transaction.atomic():
+            if self.token:
+                OrderBackProtocolToken.objects.filter(order_id=self.order_id).delete()
+                OrderBackProtocolToken.objects.create(order_id=self.order_id, token=self.token)
+            self._set_state(
+                status=MailStatus.SENT,
+                attempts=self.attempts + 1,
+                sent=now,
+                recipient=recipient,
+                last_error="",
+            )
+            orders = Order.objects.filter(pk=self.order_id)
+            team_name = orders.values_list("team__name", flat=True).first()
+            orders.update(mail_datum_sended=now, mail_team_sended=team_name or "")
+            DashboardCache.invalidate()
+
+    def mark_failed_attempt(self, error: str, max_attempts: int, backoff) -> None:
+        """Neúspěšný pokus — další za backoff × 2^(pokus-1), po max_attempts Failed."""
+        attempts = self.attempts + 1
+        if attempts >= max_attempts:
+            self._set_state(status=MailStatus.FAILED, attempts=attempts, last_error=error)
+            return
+        self._set_state(
+            status=MailStatus.PENDING,
+            attempts=attempts,
+            last_error=error,
+            next_attempt=timezone.now() + backoff * 2 ** (attempts - 1),
+        )
+
+    class Meta:
+        ordering = ["-created"]
+        indexes = [models.Index(fields=["status", "next_attempt"])]
+
+
+class ProtocolJob(Model):
+    """Hromadné generování protokolů jako job (stejné stavy jako import).
+
+    `generate-pdfs` uloží id zakázek vybraných filtrem (Pending) a vrátí 202;
+    protokoly vyrenderuje `manage.py run_protocol_worker` v poolu procesů —
+    webový proces žádný pool nedrží. Výsledky po zakázkách se ukládají po
+    dávkách (`done` = checkpoint), převzatý job naváže od checkpointu.
+    """
+
+    orders = JSONField(default=list, verbose_name="Zakázky (id)")
+    force = BooleanField(default=False, verbose_name="Generovat i aktuální protokoly")
+    requested_by = ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Zadal dispečer",
+    )
+    status = CharField(
+        max_length=16,
+        choices=ImportStatus.choices,
+        default=ImportStatus.PENDING,
+        verbose_name="Stav",
+    )
+    done = PositiveIntegerField(default=0, verbose_name="Zpracováno zakázek")
+    results = JSONField(default=list, verbose_name="Výsledky po zakázkách")
+    error = TextField(blank=True, verbose_name="Chyba")
+    created = DateTimeField(auto_now_add=True, verbose_name="Založeno")
+    updated = DateTimeField(null=True, blank=True, verbose_name="Poslední checkpoint")
+
+    def __str__(self) -> str:
+        return f"{self.pk}: {self.get_status_display()} ({self.done}/{len(self.orders)})"
+
+    @property
+    def progress(self) -> float:
+        if not self.orders:
+            return 100.0
+        return round(self.done / len(self.orders) * 100, 1)
+
+    def summary(self) -> dict:
+        """Počty jako dřívější synchronní odpověď generate-pdfs."""
+        skipped = sum(result["skipped"] for result in self.results)
+        failed = sum(not result["ok"] for result in self.results)
+        return {
+            "requested": len(self.orders),
+            "generated": len(self.results) - skipped - failed,
+            "skipped": skipped,
+            "failed": failed,
+            "size": sum(result["size"] for result in self.results),
+        }
+
+    @classmethod
+    def claim_next(cls, stale_after=None) -> "ProtocolJob | None":
+        """Převezme nejstarší čekající job — compare-and-swap jako Upload.claim_next."""
+        waiting = models.Q(status=ImportStatus.PENDING)
+        if stale_after is not None:
+            waiting |= models.Q(
+                status=ImportStatus.RUNNING, updated__lt=timezone.now() - stale_after
+            )
+        candidates = cls.objects.filter(waiting).order_by("created", "pk")
+        for job in candidates.only("pk", "status", "updated")[:10]:
+            claimed = cls.objects.filter(
+                pk=job.pk, status=job.status, updated=job.updated
+            ).update(status=ImportStatus.RUNNING, updated=timezone.now())
+            if claimed:
+                return cls.objects.get(pk=job.pk)
+        return None
+
+    def _set_state(self, **fields) -> None:
+        fields["updated"] = timezone.now()
+        ProtocolJob.objects.filter(pk=self.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def save_checkpoint(self, results: list[dict]) -> None:
+        self._set_state(done=self.done + len(results), results=self.results + results)
+
+    def mark_done(self) -> None:
+        self._set_state(status=ImportStatus.DONE)
+
+    def mark_failed(self, error: str) -> None:
+        self._set_state(status=ImportStatus.FAILED, error=error)
+
     class Meta:
         ordering = ["-created"]
 
@@ -516,6 +1211,10 @@ class OrderPDFStorage(Model):
     team = CharField(blank=False, max_length=32, verbose_name="montazni tym")
     file = FileField(upload_to="stored_pdfs/", verbose_name="PDF soubor")
     created = DateTimeField(auto_now=True, verbose_name="Čas uložení")
+    # --- otisk dat, ze kterých byl protokol vygenerován (PdfGenerator.fingerprint)
+    fingerprint = CharField(
+        max_length=64, blank=True, default="", verbose_name="Otisk dat protokolu"
+    )
     history = HistoricalRecords()
 
     def __str__(self):
@@ -0,0 +1,219 @@
+"""
+Hromadné generování PDF protokolů.
+
+Dispečeři dřív generovali protokoly po jednom (`generate-pdf`), každý
+synchronně ve webovém workeru. Tady se vybrané zakázky (filtr — např.
+zatermínované zakázky týmu v daném týdnu) renderují v poolu procesů —
+jen mimo webové workery (worker jobů, management command):
+
+ - hlavní proces načte zakázky i s klientem, týmem a artikly a posílá je
+   workerům; worker jen renderuje (do DB nesahá) a vrací bajty PDF
+ - uložení jde v hlavním procesu přes `save_pdf_protocol_to_db`
+ - zakázky, jejichž uložený protokol má stejný otisk dat
+   (`PdfGenerator.fingerprint`), se přeskočí — `force=True` je vygeneruje i tak
+ - pool je "teplý" — vznikne jednou za proces a workery mají v initializeru
+   načtené fonty, logo i šablony stránek (`PdfResources.preload()`)
+
+Workery startují metodou spawn: nedědí spojení do DB ani vlákna webového
+procesu. Modul se proto musí dát importovat ještě před `django.setup()`
+(spawn v novém procesu nejdřív importuje initializer) — modely a generátory
+se importují až uvnitř funkcí.
+
+Použití: `POST /api/v1/orders/generate-pdfs/?<filtr seznamu zakázek>` založí
+ProtocolJob, který zpracuje `manage.py run_protocol_worker`;
+`manage.py generate_protocols` generuje rovnou.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import django
+from django.apps import apps
+from django.db.models import QuerySet
+from django.utils import timezone
+from rich.console import Console
+
+if TYPE_CHECKING:
+    from .models import Order
+    from .OOP_protokols import PdfProfile
+
+# ---
+cons: Console = Console()
+
+DEFAULT_WORKERS: int = min(4, os.cpu_count() or 1)
+# --- strop zakázek na jeden ProtocolJob z API
+BULK_PROTOCOL_LIMIT: int = 500
+# --- zakázek na dávku workeru (checkpoint výsledků v ProtocolJob)
+JOB_CHUNK_SIZE: int = 50
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers: int = 0
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class ProtocolResult:
+    order_id: int
+    order_number: str
+    ok: bool
+    created: bool = False
+    skipped: bool = False
+    error: str = ""
+    size: int = 0  # --- velikost PDF v bajtech
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def week_range(value: str) -> tuple[datetime, datetime]:
+    """ISO týden '2025-W14' → (pondělí 00:00, další pondělí 00:00) v lokálním čase"""
+    year, week = value.upper().split("-W")
+    monday = date.fromisocalendar(int(year), int(week), 1)
+    start = timezone.make_aware(datetime.combine(monday, datetime.min.time()))
+    return start, start + timedelta(days=7)
+
+
+def protocol_queryset(orders: QuerySet) -> QuerySet:
+    """Zakázky se vším, co generátor čte — worker pak nedělá žádné dotazy"""
+    return orders.select_related("client", "team", "pdf").prefetch_related("articles")
+
+
+def stale_protocols(orders: QuerySet | None = None) -> QuerySet:
+    """Zakázky s uloženým protokolem, jehož otisk neodpovídá aktuálním datům
+
+    Otisk se počítá v Pythonu (šifrovaná pole zákazníka), po dávkách —
+    cena roste s počtem zakázek, API proto kontroluje nejvýše
+    BULK_PROTOCOL_LIMIT zakázek na dotaz.
+    """
+    from .models import Order
+    from .OOP_protokols import get_generator_class
+
+    if orders is None:
+        orders = Order.objects.all()
+    stale = [
+        order.pk
+        for order in protocol_queryset(orders.filter(pdf__isnull=False)).iterator(
+            chunk_size=500
+        )
+        if order.pdf.fingerprint != get_generator_class(order).fingerprint(order)
+    ]
+    return orders.filter(pk__in=stale)
+
+
+# --- worker ---------------------------------------------------------------
+def _init_worker() -> None:
+    """Initializer procesu v poolu — Django a zdroje protokolů jednou za proces"""
+    if not apps.ready:
+        django.setup()
+    from .OOP_protokols import PdfResources
+
+    PdfResources.preload()
+
+
+def render_protocol(order: Order, profile: PdfProfile | None = None) -> bytes:
+    """Vyrenderuje protokol zakázky (běží ve workeru) v profilu jeho otisku"""
+    from .OOP_protokols import get_generator_class
+
+    return get_generator_class(order)(profile=profile).generate_pdf_protocol(model=order)
+
+
+# --- pool -----------------------------------------------------------------
+def get_pool(workers: int = DEFAULT_WORKERS) -> ProcessPoolExecutor:
+    """Teplý pool procesů; při jiném počtu workerů se založí znovu"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool, _pool_workers = None, 0
+
+
+# --- generování -----------------------------------------------------------
+def _save(order: Order, pdf: bytes, fingerprint: str) -> ProtocolResult:
+    from .OOP_protokols import PdfGenerator
+
+    created = PdfGenerator.save_pdf_protocol_to_db(
+        model=order, pdf=pdf, fingerprint=fingerprint
+    )
+    return ProtocolResult(
+        order.pk, order.order_number, ok=True, created=created, size=len(pdf)
+    )
+
+
+def _failed(order: Order, error: Exception) -> ProtocolResult:
+    return ProtocolResult(order.pk, order.order_number, ok=False, error=str(error))
+
+
+def generate_protocols(
+    orders: QuerySet, workers: int = DEFAULT_WORKERS, force: bool = False
+) -> list[ProtocolResult]:
+    """Vygeneruje a uloží protokoly zakázek; výsledek pro každou zakázku
+
+    `workers` <= 1 renderuje v tomto procesu (bez poolu). Aktuální protokoly
+    (stejný otisk dat) se bez `force` přeskočí.
+    """
+    from .OOP_protokols import PdfGenerator, get_generator_class, get_pdf_profile
+
+    # --- jeden profil pro otisk i render (workery ho dostanou s úlohou)
+    profile = get_pdf_profile()
+    orders = list(protocol_queryset(orders))
+    results: dict[int, ProtocolResult] = {}
+    pending: list[tuple[Order, str]] = []
+    for order in orders:
+        fingerprint = get_generator_class(order).fingerprint(order, profile)
+        if not force and PdfGenerator.is_current(order, fingerprint):
+            results[order.pk] = ProtocolResult(
+                order.pk, order.order_number, ok=True, skipped=True
+            )
+        else:
+            pending.append((order, fingerprint))
+
+    if workers <= 1 or not pending:
+        for order, fingerprint in pending:
+            try:
+                results[order.pk] = _save(order, render_protocol(order, profile), fingerprint)
+            except Exception as e:
+                results[order.pk] = _failed(order, e)
+        return [results[order.pk] for order in orders]
+
+    pool = get_pool(workers)
+    futures: list[tuple[Order, str, Future]] = [
+        (order, fingerprint, pool.submit(render_protocol, order, profile))
+        for order, fingerprint in pending
+    ]
+    broken = False
+    for order, fingerprint, future in futures:
+        try:
+            results[order.pk] = _save(order, future.result(), fingerprint)
+        except BrokenProcessPool as e:
+            # --- worker spadl (OOM, kill) — pool se příště založí znovu
+            broken = True
+            results[order.pk] = _failed(order, e)
+        except Exception as e:
+            results[order.pk] = _failed(order, e)
+    if broken:
+        shutdown_pool()
+        cons.log("pool protokolů byl rozbitý, založí se znovu", style="red")
+    return [results[order.pk] for order in orders]
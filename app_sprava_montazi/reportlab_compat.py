@@ -0,0 +1,185 @@
+"""
+Adaptér na interní API reportlabu — jediné místo, které sahá na privátní
+stav canvasu a dokumentu (Canvas._doc, _formsinuse, PDFDocument.idToObject,
+delayedFonts, stav subsetů TTFont.state, _digester, streamy stránek
+a obrázků).
+
+Stojí na něm statická vrstva protokolů (OOP_protokols.PageTemplate), cache
+obrázků (PdfResources) a profily bez ASCII85. Interní API se může změnit
+i v patch release reportlabu a rozbité PDF by nic neohlásilo — adaptér je
+proto ověřený jen pro SUPPORTED_VERSIONS. Jiná verze se pozná při importu:
+zaloguje se varování a INTERNALS_SUPPORTED = False, protokoly se pak
+kreslí celé po stránkách přes veřejné API canvasu (pomaleji, ale správně).
+
+Nová verze reportlabu: projít funkce níže, pustit ReportlabInternalsTest,
+verzi přidat do SUPPORTED_VERSIONS a upravit pin v requirements.txt.
+"""
+
+import logging
+import struct
+import zlib
+from copy import copy
+from io import BytesIO
+from pathlib import Path
+
+import reportlab
+from PIL import Image as PILImage
+from reportlab.lib.rl_accel import asciiBase85Decode
+from reportlab.lib.utils import _digester
+from reportlab.pdfbase.pdfdoc import (
+    PDFArray,
+    PDFDictionary,
+    PDFFormXObject,
+    PDFImageXObject,
+    PDFName,
+    PDFStream,
+    PDFZCompress,
+)
+from reportlab.pdfgen.canvas import Canvas
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_VERSIONS: frozenset[str] = frozenset({"4.4.1"})
+INTERNALS_SUPPORTED: bool = reportlab.Version in SUPPORTED_VERSIONS
+if not INTERNALS_SUPPORTED:
+    logger.warning(
+        "reportlab %s není ověřený (%s) — protokoly bez šablony a cache obrázků",
+        reportlab.Version,
+        ", ".join(sorted(SUPPORTED_VERSIONS)),
+    )
+
+
+# --- obrázky ----------------------------------------------------------------
+def _png_idat(png: bytes) -> bytes:
+    """Spojená data IDAT z PNG — Flate stream s PNG prediktory"""
+    pos, data = 8, bytearray()
+    while pos < len(png):
+        length, chunk = struct.unpack(">I4s", png[pos : pos + 8])
+        if chunk == b"IDAT":
+            data += png[pos + 8 : pos + 8 + length]
+        pos += 12 + length
+    return bytes(data)
+
+
+class PngImageXObject(PDFImageXObject):
+    """Obrázek jako Flate s PNG prediktorem (PDF DecodeParms Predictor 15)
+
+    Bezztrátově menší než Flate surových RGB dat, které dělá reportlab —
+    u loga zhruba o třetinu. Průhlednost se zahodí stejně jako v drawImage
+    bez masky.
+    """
+
+    def __init__(self, name: str | None, path: Path) -> None:
+        super().__init__(name)
+        with PILImage.open(path) as im:
+            rgb = im.convert("RGB")
+        buffer = BytesIO()
+        rgb.save(buffer, "PNG", optimize=True)
+        self.width, self.height = rgb.size
+        self.bitsPerComponent = 8
+        self.colorSpace = "DeviceRGB"
+        self._filters = ("FlateDecode",)
+        self.mask = None
+        self.streamContent = _png_idat(buffer.getvalue())
+
+    def format(self, document):
+        stream = PDFStream(content=self.streamContent)
+        d = stream.dictionary
+        d["Type"] = PDFName("XObject")
+        d["Subtype"] = PDFName("Image")
+        d["Width"] = self.width
+        d["Height"] = self.height
+        d["BitsPerComponent"] = self.bitsPerComponent
+        d["ColorSpace"] = PDFName(self.colorSpace)
+        d["Filter"] = PDFArray([PDFName("FlateDecode")])
+        d["DecodeParms"] = PDFDictionary(
+            {"Predictor": 15, "Colors": 3, "BitsPerComponent": 8, "Columns": self.width}
+        )
+        return stream.format(document)
+
+
+def image_xobject(path: Path, png_predictor: bool, ascii85: bool) -> PDFImageXObject:
+    """Zakódovaný obrázek pro vložení do libovolného dokumentu"""
+    if png_predictor:
+        return PngImageXObject(None, path)
+    img = PDFImageXObject(None, str(path))
+    if not ascii85 and img._filters[0] == "ASCII85Decode":
+        # --- reportlab bere ASCII85 z globálního rl_config
+        img.streamContent = asciiBase85Decode(img.streamContent)
+        img._filters = img._filters[1:]
+    return img
+
+
+def image_name(path: Path) -> str:
+    """Jméno XObjectu, které si drawImage spočítá z cesty k souboru"""
+    return _digester(f"{path}None".encode("utf-8"))
+
+
+def add_image(cvs: Canvas, name: str, img: PDFImageXObject) -> None:
+    """Vloží obrázek do dokumentu pod `name`, už vložený přeskočí"""
+    doc = cvs._doc
+    reg_name = doc.getXObjectName(name)
+    if reg_name not in doc.idToObject:
+        # --- kopie — registrace nastavuje atributy, sdílí se jen data
+        img = copy(img)
+        img.name = name
+        cvs._setXObjects(img)
+        doc.Reference(img, reg_name)
+        doc.addForm(name, img)
+
+
+# --- form XObject statické vrstvy -------------------------------------------
+def forms_in_use(cvs: Canvas) -> list[str]:
+    """Jména XObjectů nakreslených do právě otevřeného formu (v pořadí)"""
+    return list(dict.fromkeys(cvs._formsinuse))
+
+
+def form_content(cvs: Canvas, name: str) -> tuple[tuple[float, ...], bytes]:
+    """Uzavřený form dokumentu → (bbox, obsah komprimovaný Flate)"""
+    doc = cvs._doc
+    form = doc.idToObject[doc.getXObjectName(name)]
+    stream = form.stream
+    content = zlib.compress(stream if isinstance(stream, bytes) else stream.encode("utf-8"))
+    return (form.lowerx, form.lowery, form.upperx, form.uppery), content
+
+
+def font_states(cvs: Canvas) -> list:
+    """[(TTFont, TTFont.State)] v pořadí, v jakém je dokument registroval"""
+    doc = cvs._doc
+    return [(font, font.state[doc]) for font in doc.delayedFonts]
+
+
+def install_font_states(cvs: Canvas, fonts: list) -> None:
+    """Převezme stav subsetů fontů (kopii) do dokumentu čistého canvasu"""
+    doc = cvs._doc
+    for font, state in fonts:
+        doc_state = copy(state)
+        doc_state.assignments = dict(state.assignments)
+        doc_state.subsets = [list(subset) for subset in state.subsets]
+        font.state[doc] = doc_state
+        doc.fontMapping[font.fontName] = "/" + state.internalName
+        doc.delayedFonts.append(font)
+
+
+def add_form(
+    cvs: Canvas, name: str, bbox: tuple[float, ...], content: bytes, images: list[str]
+) -> None:
+    """Vloží form s hotovým (Flate) obsahem a odkazy na obrázky dokumentu"""
+    doc = cvs._doc
+    contents = PDFStream(content=content)
+    contents.dictionary["Filter"] = PDFArray([PDFName("FlateDecode")])
+    form = PDFFormXObject(*bbox)
+    form.Contents = contents
+    form.XObjects = doc.xobjDict(images) if images else None
+    doc.addForm(name, form)
+
+
+# --- stránky ----------------------------------------------------------------
+def flate_only_pages(cvs: Canvas) -> None:
+    """Obsah stránek jen Flate, bez ASCII85 (volat před `cvs.save()`)"""
+    for page in cvs._doc.Pages.pages:
+        if not page.Contents:
+            page.Contents = PDFStream(
+                content=page.stream,
+                filters=[PDFZCompress] if page.compression else None,
+            )
@@ -0,0 +1,125 @@
+"""
+Fulltextové hledání zakázek.
+
+Každá zakázka má OrderSearchDocument — normalizovaný text (lower, bez
+diakritiky) z polí, přes která dřív hledal SearchFilter (`icontains`
+přes 4 tabulky). Index nad dokumentem:
+ - SQLite: FTS5 external-content tabulka ORDER_SEARCH_FTS + triggery
+ - PostgreSQL: GIN index nad to_tsvector('simple', document)
+
+Dotaz se normalizuje stejně jako dokument a každé slovo se hledá jako
+prefix (`novak` najde "Novák", `7001` najde "700123-O"). Dokumenty se
+udržují ze signálů (signals.py), celé se přestaví přes
+`manage.py rebuild_order_search`.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .models import Order, OrderSearchDocument
+
+ORDER_SEARCH_FTS = "app_sprava_montazi_ordersearch_fts"
+DOCUMENT_TABLE = OrderSearchDocument._meta.db_table
+# --- pole zakázky, ze kterých se skládá dokument
+DOCUMENT_FIELDS = (
+    "order_number",
+    "client__name",
+    "team__name",
+    "mandant",
+    "distrib_hub__code",
+    "distrib_hub__city",
+    "notes",
+)
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text: str | None) -> str:
+    """'Novák, Plzeň' → 'novak, plzen'"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokens(text: str | None) -> list[str]:
+    return _TOKEN.findall(normalize(text))
+
+
+# --- index --------------------------------------------------------------
+_available: dict[str, bool] = {}
+
+
+def is_available() -> bool:
+    """Je fulltextový index v této DB? (SQLite bez FTS5 → fallback na icontains)
+
+    Index zakládá migrace 0009_order_search_document.
+    """
+    if connection.alias not in _available:
+        if connection.vendor == "postgresql":
+            _available[connection.alias] = True
+        elif connection.vendor == "sqlite":
+            tables = connection.introspection.table_names()
+            _available[connection.alias] = ORDER_SEARCH_FTS in tables
+        else:
+            _available[connection.alias] = False
+    return _available[connection.alias]
+
+
+# --- dokumenty ----------------------------------------------------------
+def build_document(row: dict) -> str:
+    return " ".join(normalize(row[name]) for name in DOCUMENT_FIELDS if row[name])
+
+
+def index_orders(orders: QuerySet | None = None, batch_size: int = 1000) -> int:
+    """Přepočítá dokumenty pro dané zakázky (výchozí = všechny); vrací počet."""
+    orders = orders if orders is not None else Order.objects.all()
+    rows = orders.order_by().values("pk", *DOCUMENT_FIELDS)
+    documents = [
+        OrderSearchDocument(order_id=row["pk"], document=build_document(row))
+        for row in rows.iterator(chunk_size=batch_size)
+    ]
+    OrderSearchDocument.objects.bulk_create(
+        documents,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["order"],
+        update_fields=["document"],
+    )
+    return len(documents)
+
+
+def rebuild() -> int:
+    """Celý index znovu — smaže osiřelé dokumenty a přepočítá ostatní."""
+    OrderSearchDocument.objects.exclude(order__in=Order.objects.all()).delete()
+    count = index_orders()
+    if connection.vendor == "sqlite" and is_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {ORDER_SEARCH_FTS}({ORDER_SEARCH_FTS}) VALUES ('rebuild')")
+    return count
+
+
+# --- dotaz --------------------------------------------------------------
+def match_condition(query: str) -> Q | None:
+    """Q(pk__in=...) pro hledaný text; None = nic k hledání."""
+    words = tokens(query)
+    if not words:
+        return None
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{word}:*" for word in words)
+        sql = (
+            f"SELECT order_id FROM {DOCUMENT_TABLE} "
+            "WHERE to_tsvector('simple', document) @@ to_tsquery('simple', %s)"
+        )
+        return Q(pk__in=RawSQL(sql, [tsquery]))
+    match = " ".join(f'"{word}"*' for word in words)
+    sql = f"SELECT rowid FROM {ORDER_SEARCH_FTS} WHERE {ORDER_SEARCH_FTS} MATCH %s"
+    return Q(pk__in=RawSQL(sql, [match]))
+
+
+def search_orders(queryset: QuerySet, query: str) -> QuerySet:
+    condition = match_condition(query)
+    return queryset if condition is None else queryset.filter(condition)
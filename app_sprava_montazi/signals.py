@@ -0,0 +1,118 @@
+"""
+Signály — invalidace cache dashboardu, měsíční rollup zakázek
+a fulltextové dokumenty zakázek (search.py).
+
+Payload dashboardu (OOP_dashboard.DashboardCache) čte Order a přes
+tabulky detailu i Client, Team, DistribHub a PDF/fotky zakázky. Každý
+save/delete těchto modelů (i historický záznam simple_history) posune
+globální "orders version".
+
+OrderMonthlyStats se udržuje inkrementálně: pre_save/pre_delete načte
+původní hodnoty zakázky z DB, post_save/post_delete přesune její
+příspěvek do nového bucketu.
+
+Pozor: bulk_create / bulk_update / QuerySet.update() a
+bulk_*_with_history signály neposílají — volající musí zavolat
+DashboardCache.invalidate() sám (a rollup přepočítat přes
+OrderMonthlyStats.rebuild / apply_change).
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from simple_history.signals import post_create_historical_record
+
+from .models import (
+    Client,
+    DistribHub,
+    Order,
+    OrderBackProtocol,
+    OrderMontazImage,
+    OrderMonthlyStats,
+    OrderPDFStorage,
+    Team,
+)
+from .OOP_dashboard import DashboardCache
+from . import search
+
+DASHBOARD_MODELS = (
+    Order,
+    Team,
+    Client,
+    DistribHub,
+    OrderPDFStorage,
+    OrderBackProtocol,
+    OrderMontazImage,
+)
+HISTORY_MODELS = tuple(
+    model.history.model for model in DASHBOARD_MODELS if hasattr(model, "history")
+)
+
+
+def invalidate_dashboard(sender, **kwargs) -> None:
+    DashboardCache.invalidate()
+
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(invalidate_dashboard, sender=model)
+    post_delete.connect(invalidate_dashboard, sender=model)
+for model in HISTORY_MODELS:
+    post_create_historical_record.connect(invalidate_dashboard, sender=model)
+
+
+# --- měsíční rollup zakázek
+def _order_stats_row(pk) -> dict | None:
+    if pk is None:
+        return None
+    return Order.objects.filter(pk=pk).values(*OrderMonthlyStats.ORDER_FIELDS).first()
+
+
+def _touches_stats(update_fields) -> bool:
+    if update_fields is None:
+        return True
+    names = {name.removesuffix("_id") for name in OrderMonthlyStats.ORDER_FIELDS}
+    return bool(names & set(update_fields))
+
+
+def remember_order_stats(sender, instance, update_fields=None, **kwargs) -> None:
+    if _touches_stats(update_fields):
+        instance._stats_before = _order_stats_row(instance.pk)
+
+
+def update_order_stats(sender, instance, update_fields=None, **kwargs) -> None:
+    if not _touches_stats(update_fields):
+        return
+    # --- po uložení čteme z DB (instance může mít neznormalizované hodnoty)
+    before = getattr(instance, "_stats_before", None)
+    OrderMonthlyStats.apply_change(before, _order_stats_row(instance.pk))
+
+
+def remove_order_stats(sender, instance, **kwargs) -> None:
+    OrderMonthlyStats.apply_change(getattr(instance, "_stats_before", None), None)
+
+
+pre_save.connect(remember_order_stats, sender=Order)
+post_save.connect(update_order_stats, sender=Order)
+pre_delete.connect(remember_order_stats, sender=Order)
+post_delete.connect(remove_order_stats, sender=Order)
+
+
+# --- fulltextové dokumenty (číslo zakázky, zákazník, tým, místo určení, ...)
+def reindex_order(sender, instance, **kwargs) -> None:
+    search.index_orders(Order.objects.filter(pk=instance.pk))
+
+
+def reindex_client_orders(sender, instance, **kwargs) -> None:
+    search.index_orders(Order.objects.filter(client_id=instance.pk))
+
+
+def reindex_team_orders(sender, instance, **kwargs) -> None:
+    search.index_orders(Order.objects.filter(team_id=instance.pk))
+
+
+def reindex_hub_orders(sender, instance, **kwargs) -> None:
+    search.index_orders(Order.objects.filter(distrib_hub_id=instance.pk))
+
+
+post_save.connect(reindex_order, sender=Order)
+post_save.connect(reindex_client_orders, sender=Client)
+post_save.connect(reindex_team_orders, sender=Team)
+post_save.connect(reindex_hub_orders, sender=DistribHub)
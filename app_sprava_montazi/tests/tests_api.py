@@ -0,0 +1,925 @@
+"""API testy"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+# --- django
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+# --- modely
+from ..models import (
+    Article,
+    Client,
+    ClientStreetToken,
+    DistribHub,
+    EmailOutbox,
+    ImportStatus,
+    MailStatus,
+    Order,
+    OrderBackProtocolToken,
+    OrderPDFStorage,
+    ProtocolJob,
+    Status,
+    Team,
+    TeamType,
+    Upload,
+)
+from ..encryption import decrypt_scope
+from ..utils import call_errors_adviced
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT="/tmp/ams_test_media")
+class OrderListQueryCountTest(TestCase):
+    """Seznam zakázek musí mít konstantní počet dotazů (žádné N+1)."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = reverse("api_v1:order-list")
+
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        team = Team.objects.create(
+            name="Tým A", city="Praha", phone="777111222", email="tym@example.com"
+        )
+        for i in range(30):
+            client = Client.objects.create(name=f"Zákazník {i}", zip_code="10000")
+            order = Order.objects.create(
+                order_number=f"{700000 + i}-O",
+                distrib_hub=hub,
+                mandant="SCCZ",
+                client=client,
+                team=team,
+                evidence_termin=date(2025, 1, 1 + i % 28),
+                team_type=TeamType.BY_ASSEMBLY_CREW,
+            )
+            if i % 2:
+                OrderPDFStorage.objects.create(
+                    order=order,
+                    team=team.name,
+                    file=ContentFile(b"%PDF", name=f"order_{i}.pdf"),
+                )
+
+    def test_list_query_count_is_constant(self):
+        """COUNT + SELECT — nezávisle na page_size."""
+        for page_size in (5, 30):
+            with self.assertNumQueries(2):
+                response = self.api.get(self.url, {"page_size": page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_list_does_not_decrypt_client_fields(self):
+        """Seznam čte jen client.name / incomplete — šifrovaná pole zůstanou nedotčená."""
+        for client in Client.objects.all():
+            client.street, client.phone = "Dlouhá 5", "777123456"
+            client.save()
+        with decrypt_scope() as cache:
+            response = self.api.get(self.url, {"page_size": 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache.stats()["misses"], 0)
+
+    def test_list_flags_from_annotations(self):
+        response = self.api.get(self.url, {"page_size": 30})
+        flags = {row["order_number"]: row["has_pdf"] for row in response.data["results"]}
+        self.assertEqual(sum(flags.values()), 15)
+        row = response.data["results"][0]
+        self.assertFalse(row["has_back_protocol"])
+        self.assertEqual(row["montage_images_count"], 0)
+
+
+class CursorPaginationTest(TestCase):
+    """Keyset režim `?cursor=` — bez COUNT, stabilní přes všechny stránky."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = reverse("api_v1:order-list")
+
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        for i in range(23):
+            Order.objects.create(
+                order_number=f"{800000 + i}-O",
+                distrib_hub=hub,
+                mandant="SCCZ" if i % 3 else "KIKA",
+                # --- schválně duplicitní termíny → tie-break přes id
+                evidence_termin=date(2025, 2, 1 + i % 4),
+            )
+
+    def _walk(self, params):
+        numbers, url, pages = [], self.url, 0
+        response = self.api.get(url, {**params, "cursor": "", "page_size": 5})
+        while True:
+            pages += 1
+            self.assertNotIn("count", response.data)
+            numbers += [row["order_number"] for row in response.data["results"]]
+            if not response.data["next"]:
+                return numbers, pages
+            response = self.api.get(response.data["next"])
+
+    def test_cursor_walks_all_orders_in_order(self):
+        expected = list(
+            Order.objects.order_by("-evidence_termin", "-pk").values_list(
+                "order_number", flat=True
+            )
+        )
+        with self.assertNumQueries(1):
+            self.api.get(self.url, {"cursor": "", "page_size": 5})
+        numbers, pages = self._walk({})
+        self.assertEqual(numbers, expected)
+        self.assertEqual(pages, 5)
+
+    def test_cursor_with_filter_and_ordering(self):
+        numbers, _ = self._walk({"mandant": "SCCZ", "ordering": "order_number"})
+        expected = list(
+            Order.objects.filter(mandant="SCCZ")
+            .order_by("order_number")
+            .values_list("order_number", flat=True)
+        )
+        self.assertEqual(numbers, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.api.get(self.url, {"cursor": "", "page_size": 5})
+        second = self.api.get(first.data["next"])
+        back = self.api.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(back.data["previous"])
+
+
+class SparseFieldsetsTest(TestCase):
+    """`?fields=` / `?omit=` — ořezaný výstup i dotazy."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        team = Team.objects.create(name="Tým A", city="Praha")
+        for i in range(5):
+            client = Client.objects.create(
+                name=f"Zákazník {i}", zip_code="10000", phone="777123456"
+            )
+            Order.objects.create(
+                order_number=f"{900000 + i}-O",
+                distrib_hub=hub,
+                mandant="SCCZ",
+                client=client,
+                team=team,
+                evidence_termin=date(2025, 3, 1 + i),
+            )
+
+    def test_fields_limits_order_output_and_sql(self):
+        url = reverse("api_v1:order-list")
+        with self.assertNumQueries(2):
+            response = self.api.get(url, {"fields": "id,order_number,status"})
+        row = response.data["results"][0]
+        self.assertEqual(set(row), {"id", "order_number", "status"})
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.api.get(url, {"fields": "id,order_number"})
+        select = ctx.captured_queries[-1]["sql"]
+        self.assertNotIn("JOIN", select)
+        self.assertNotIn("EXISTS", select)
+        self.assertNotIn('"notes"', select)
+
+    def test_omit_drops_fields(self):
+        url = reverse("api_v1:order-list")
+        response = self.api.get(url, {"omit": "has_pdf,client_name"})
+        row = response.data["results"][0]
+        self.assertNotIn("has_pdf", row)
+        self.assertNotIn("client_name", row)
+        self.assertIn("team_name", row)
+
+    def test_related_fields_still_resolved(self):
+        response = self.api.get(
+            reverse("api_v1:order-list"), {"fields": "order_number,client_name"}
+        )
+        names = {row["client_name"] for row in response.data["results"]}
+        self.assertIn("Zákazník 0", names)
+
+    def test_client_list_skips_encrypted_columns(self):
+        url = reverse("api_v1:client-list")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api.get(url, {"fields": "name,slug"})
+        self.assertEqual(set(response.data["results"][0]), {"name", "slug"})
+        select = ctx.captured_queries[-1]["sql"]
+        self.assertNotIn('"phone"', select)
+        self.assertNotIn('"street"', select)
+
+    def test_write_ignores_fields_param(self):
+        """Na zápis se `?fields=` neaplikuje (jinak by se zahodila data)."""
+        team = Team.objects.get()
+        url = reverse("api_v1:team-detail", args=[team.slug])
+        response = self.api.patch(f"{url}?fields=id", {"city": "Brno"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        team.refresh_from_db()
+        self.assertEqual(team.city, "Brno")
+
+
+class DashboardAggregateTest(TestCase):
+    """Dashboard — počítadla z jednoho aggregate(), stejná čísla jako dřív."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = reverse("api_v1:dashboard")
+
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        active = Team.objects.create(name="Tým A", city="Praha")
+        inactive = Team.objects.create(name="Tým B", city="Brno", active=False)
+        incomplete = Client.objects.create(name="Bez kontaktu", zip_code="10000")
+        statuses = list(Status)
+        team_types = list(TeamType)
+        for i in range(36):
+            Order.objects.create(
+                order_number=f"{600000 + i}-{'R' if i % 4 == 0 else 'O'}",
+                distrib_hub=hub,
+                mandant="SCCZ" if i % 2 else "KIKA",
+                client=incomplete if i % 5 == 0 else None,
+                team=(active, inactive, None)[i % 3],
+                status=statuses[i % len(statuses)],
+                team_type=team_types[i % len(team_types)],
+                evidence_termin=date(2025, 1 + i % 2, 1 + i % 28),
+                montage_termin=None if i % 7 else timezone.now(),
+                vynos=Decimal("100.50") if i % 3 else None,
+                naklad=Decimal("40.25"),
+            )
+
+    def _expected(self, qs):
+        """Původní výpočet — jeden dotaz na každé číslo."""
+        visible = qs.exclude(status=Status.HIDDEN)
+        open_ = qs.exclude(status__in=[Status.HIDDEN, Status.BILLED, Status.CANCELED])
+        is_invalid, invalid_count = call_errors_adviced(qs)
+        vynos = sum(float(o.vynos or 0) for o in visible)
+        naklad = sum(float(o.naklad or 0) for o in visible)
+        return {
+            "open_orders": {
+                "nove": qs.filter(status=Status.NEW).count(),
+                "zaterminovane": qs.filter(status=Status.ADVICED).count(),
+                "realizovane": qs.filter(status=Status.REALIZED).count(),
+            },
+            "closed_orders": {
+                "vyuctovane": qs.filter(status=Status.BILLED).count(),
+                "zrusene": qs.filter(status=Status.CANCELED).count(),
+            },
+            "adviced_type_orders": {
+                "montazni": qs.filter(
+                    status=Status.ADVICED, team_type=TeamType.BY_ASSEMBLY_CREW
+                ).count(),
+                "dopravni": qs.filter(
+                    status=Status.ADVICED, team_type=TeamType.BY_DELIVERY_CREW
+                ).count(),
+            },
+            "count_all": visible.count(),
+            "hidden": qs.filter(status=Status.HIDDEN).count(),
+            "no_montage_term_count": open_.filter(montage_termin__isnull=True).count(),
+            "no_montage_total_count": open_.count(),
+            "is_invalid": is_invalid,
+            "invalid_count": invalid_count,
+            "finance_summary": {
+                "vynos": round(vynos, 2),
+                "naklad": round(naklad, 2),
+                "profit": round(vynos - naklad, 2),
+            },
+        }
+
+    def test_numbers_match_per_query_counts(self):
+        for params, qs in (
+            ({}, Order.objects.all()),
+            ({"mandant": "SCCZ", "month": 1}, Order.objects.filter(
+                mandant="SCCZ", evidence_termin__month=1
+            )),
+        ):
+            response = self.api.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            for key, value in self._expected(qs).items():
+                self.assertEqual(response.data[key], value, key)
+            self.assertEqual(
+                response.data["has_no_montage_term"],
+                response.data["no_montage_term_count"] > 0,
+            )
+
+    def test_dashboard_query_count(self):
+        """rollup + zbytek z Order + 2 tabulky + mandant/rok volby — nezávisle na počtu zakázek."""
+        with self.assertNumQueries(6):
+            response = self.api.get(self.url, {"year": 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["new_issues_count"], len(response.data["new_issues_orders"])
+        )
+        self.assertEqual(
+            response.data["customer_r_count"], len(response.data["customer_r_orders"])
+        )
+
+
+class DashboardCacheTest(TestCase):
+    """Cache dashboardu — hit bez dotazů, invalidace zápisem do Order/Team/Client."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = reverse("api_v1:dashboard")
+
+        self.hub = DistribHub.objects.create(code="626", city="Chrastany")
+        self.team = Team.objects.create(name="Tým A", city="Praha")
+        self.client_obj = Client.objects.create(name="Zákazník", zip_code="10000")
+        self.order = Order.objects.create(
+            order_number="500000-O",
+            distrib_hub=self.hub,
+            mandant="SCCZ",
+            client=self.client_obj,
+            team=self.team,
+            evidence_termin=date(2025, 5, 1),
+        )
+
+    def _get(self, params=None):
+        response = self.api.get(self.url, params or {"year": 2025})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_tests_use_locmem_cache(self):
+        """AMS.test_runner — testy nezapisují do souborové cache instalace."""
+        from django.core.cache import caches
+        from django.core.cache.backends.locmem import LocMemCache
+
+        self.assertIsInstance(caches["dashboard"], LocMemCache)
+
+    def test_second_request_is_hit_without_queries(self):
+        self.assertEqual(self._get()["X-Dashboard-Cache"], "miss")
+        with self.assertNumQueries(0):
+            response = self._get()
+        self.assertEqual(response["X-Dashboard-Cache"], "hit")
+        # --- jiný filtr = jiný klíč
+        self.assertEqual(self._get({"year": 2025, "mandant": "SCCZ"})["X-Dashboard-Cache"], "miss")
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self._get().data["open_orders"]["nove"], 1)
+        Order.objects.create(
+            order_number="500001-O",
+            distrib_hub=self.hub,
+            mandant="SCCZ",
+            evidence_termin=date(2025, 5, 2),
+        )
+        response = self._get()
+        self.assertEqual(response["X-Dashboard-Cache"], "miss")
+        self.assertEqual(response.data["open_orders"]["nove"], 2)
+
+        for write in (
+            lambda: self.team.save(),
+            lambda: self.client_obj.save(),
+            lambda: self.order.save_without_historical_record(),
+        ):
+            self._get()
+            write()
+            self.assertEqual(self._get()["X-Dashboard-Cache"], "miss")
+
+        self.order.delete()
+        self.assertEqual(self._get().data["open_orders"]["nove"], 1)
+
+    def test_invalidation_after_commit(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.order.status = Status.ADVICED
+            self.order.save()
+        self.assertTrue(callbacks)
+        self.assertEqual(self._get().data["open_orders"]["zaterminovane"], 1)
+
+    def test_stats_counts_hits_and_misses(self):
+        before = self.api.get(reverse("api_v1:dashboard-cache-stats")).data
+        self._get()
+        self._get()
+        self._get()
+        after = self.api.get(reverse("api_v1:dashboard-cache-stats")).data
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 2)
+
+
+class OrderFullTextSearchTest(TestCase):
+    """`?search=` přes fulltextový index — prefixy, bez diakritiky, udržovaný signály."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = reverse("api_v1:order-list")
+
+        self.hub = DistribHub.objects.create(code="626", city="Chrastany")
+        self.team = Team.objects.create(name="Montáže Dvořák", city="Praha")
+        self.novak = Client.objects.create(name="Jiří Novák", zip_code="10000")
+        self.other = Client.objects.create(name="Petr Svoboda", zip_code="10000")
+        Order.objects.create(
+            order_number="700123-O",
+            distrib_hub=self.hub,
+            mandant="SCCZ",
+            client=self.novak,
+            team=self.team,
+            evidence_termin=date(2025, 1, 1),
+            notes="Kuchyňská linka, třetí patro",
+        )
+        Order.objects.create(
+            order_number="800456-R",
+            distrib_hub=self.hub,
+            mandant="KIKA",
+            client=self.other,
+            evidence_termin=date(2025, 1, 2),
+        )
+
+    def _search(self, query):
+        response = self.api.get(self.url, {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row["order_number"] for row in response.data["results"])
+
+    def test_diacritics_insensitive_prefix(self):
+        self.assertEqual(self._search("novak"), ["700123-O"])
+        self.assertEqual(self._search("Nov"), ["700123-O"])
+        self.assertEqual(self._search("kuchynsk"), ["700123-O"])
+        self.assertEqual(self._search("dvořák"), ["700123-O"])
+        self.assertEqual(self._search("7001"), ["700123-O"])
+        self.assertEqual(self._search("chrast"), ["700123-O", "800456-R"])
+        self.assertEqual(self._search("kika"), ["800456-R"])
+        self.assertEqual(self._search("novak kika"), [])
+
+    def test_documents_follow_related_changes(self):
+        self.other.name = "Marie Černá"
+        self.other.save()
+        self.assertEqual(self._search("cerna"), ["800456-R"])
+        self.assertEqual(self._search("svoboda"), [])
+
+        self.team.name = "Tým Zelený"
+        self.team.save()
+        self.assertEqual(self._search("zeleny"), ["700123-O"])
+
+        Order.objects.get(order_number="700123-O").delete()
+        self.assertEqual(self._search("novak"), [])
+
+    def test_search_does_not_join_related_tables(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._search("novak")
+        count_sql = ctx.captured_queries[0]["sql"]
+        self.assertNotIn("LIKE", count_sql)
+        self.assertNotIn("JOIN", count_sql)
+
+
+class ClientBlindIndexTest(TestCase):
+    """Hledání v šifrovaném telefonu / e-mailu / ulici přes blind index."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = reverse("api_v1:client-list")
+
+        self.novak = Client.objects.create(
+            name="Jiří Novák",
+            zip_code="10000",
+            phone="777 123 456",
+            email="Jiri.Novak@Example.com",
+            street="Náměstí Míru 12",
+        )
+        Client.objects.create(
+            name="Petr Svoboda",
+            zip_code="10000",
+            phone="+420 605 111 222",
+            email="petr@example.com",
+            street="Dlouhá 5",
+        )
+        Client.objects.create(name="Bez kontaktu", zip_code="10000")
+
+    def _names(self, params):
+        response = self.api.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row["name"] for row in response.data["results"])
+
+    def test_columns_store_no_plaintext(self):
+        self.novak.refresh_from_db()
+        self.assertEqual(len(self.novak.phone_bidx), 32)
+        self.assertNotIn("777", self.novak.phone_bidx)
+        self.assertEqual(self.novak.street_tokens.count(), 3)
+
+    def test_filter_exact_match(self):
+        self.assertEqual(self._names({"phone": "+420777123456"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"phone": "777123456"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"email": "JIRI.NOVAK@example.com"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"email": "novak@example.com"}), [])
+        self.assertEqual(self._names({"street": "miru"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"street": "Míru 12"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"street": "miru 5"}), [])
+
+    def test_search_covers_encrypted_fields(self):
+        self.assertEqual(self._names({"search": "777 123 456"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"search": "petr@example.com"}), ["Petr Svoboda"])
+        self.assertEqual(self._names({"search": "dlouha"}), ["Petr Svoboda"])
+        self.assertEqual(self._names({"search": "novák míru"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"search": "kontaktu"}), ["Bez kontaktu"])
+
+    def test_index_follows_updates(self):
+        self.novak.street = "Krátká 7"
+        self.novak.save(update_fields=["street"])
+        self.assertEqual(self._names({"street": "kratka"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"street": "miru"}), [])
+
+    def test_backfill_command(self):
+        Client.objects.update(phone_bidx="", email_bidx="", street_bidx="")
+        ClientStreetToken.objects.all().delete()
+        self.assertEqual(self._names({"phone": "777123456"}), [])
+
+        call_command("backfill_client_blind_index", batch_size=1, stdout=StringIO())
+        self.assertEqual(self._names({"phone": "777123456"}), ["Jiří Novák"])
+        self.assertEqual(self._names({"street": "dlouha"}), ["Petr Svoboda"])
+
+
+@override_settings(MEDIA_ROOT="/tmp/ams_test_media")
+class ImportJobApiTest(TestCase):
+    """Import CSV jako job — 202 + worker + stav přes /api/v1/import/<id>/."""
+
+    HEADER = (
+        "Místo určení;Číslo zakázky;Mandant;Příjmení;Křestní jméno;PSČ;Montáž;"
+        "Avizovaný termín;Erfassungstermin;Poznámka mandanta"
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user("importer", password="pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = reverse("api_v1:csv-import")
+        DistribHub.objects.create(code="626", city="Chrastany")
+
+    def _post(self, lines: list[str]):
+        content = "\n".join([self.HEADER, *lines]) + "\n"
+        upload = SimpleUploadedFile("import.csv", content.encode("cp1250"), "text/csv")
+        return self.api.post(self.url, {"file": upload}, format="multipart")
+
+    def test_post_enqueues_job(self):
+        response = self._post(["626;800001-O;SCCZ;Novák;Jan;10000;1;;01.01.2025;"])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], ImportStatus.PENDING)
+        self.assertTrue(response["Location"].endswith(f"/import/{response.data['id']}/"))
+        # --- request na import nečeká
+        self.assertFalse(Order.objects.exists())
+
+    def test_worker_runs_job_and_detail_reports_counters(self):
+        job = self._post(
+            [
+                "626;800001-O;SCCZ;Novák;Jan;10000;1;;01.01.2025;",
+                "626;800002-R;SCCZ;Dvořák;Petr;11000;0;;01.01.2025;",
+                "626;800002-R;SCCZ;Dvořák;Petr;11000;0;;01.01.2025;",
+            ]
+        ).data
+        call_command("run_import_worker", once=True, chunk_size=2, stdout=StringIO())
+        response = self.api.get(reverse("api_v1:csv-import-detail", kwargs={"pk": job["id"]}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], ImportStatus.DONE)
+        self.assertEqual(response.data["rows_done"], 3)
+        self.assertEqual(response.data["rows_total"], 3)
+        self.assertEqual(response.data["progress"], 100.0)
+        self.assertEqual(
+            response.data["counters"],
+            {
+                "by_assembly_crew_count": 1,
+                "by_customer_count": 1,
+                "client_count": 2,
+                "duplicit_count": 1,
+            },
+        )
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_worker_records_error(self):
+        job = self._post(["999;800003-O;SCCZ;Novák;Jan;10000;1;;01.01.2025;"]).data
+        call_command("run_import_worker", once=True, stdout=StringIO())
+        response = self.api.get(reverse("api_v1:csv-import-detail", kwargs={"pk": job["id"]}))
+        self.assertEqual(response.data["status"], ImportStatus.FAILED)
+        self.assertIn("Chybné místo určení", response.data["error"])
+        self.assertFalse(Order.objects.exists())
+
+    def test_claim_next_takes_stale_running_job_once(self):
+        fresh = Upload.objects.create(file="uploads/a.csv", import_status=ImportStatus.RUNNING)
+        stale = Upload.objects.create(file="uploads/b.csv", import_status=ImportStatus.RUNNING)
+        Upload.objects.filter(pk=fresh.pk).update(updated=timezone.now())
+        Upload.objects.filter(pk=stale.pk).update(updated=timezone.now() - timedelta(hours=1))
+        self.assertEqual(Upload.claim_next(timedelta(minutes=15)), stale)
+        # --- převzetí obnoví `updated` — druhý worker ho už nedostane
+        self.assertIsNone(Upload.claim_next(timedelta(minutes=15)))
+
+    def test_preview_reports_diff_without_writing(self):
+        client = Client.objects.create(name="Novák Jan", zip_code="10000")
+        hub = DistribHub.objects.get(code="626")
+        Order.objects.create(
+            order_number="800001-O",
+            distrib_hub=hub,
+            mandant="SCCZ",
+            client=client,
+            evidence_termin=date(2025, 1, 1),
+        )
+        lines = [
+            "626;800001-O;SCCZ;Novák;Jan;10000;1;;01.01.2025;",
+            "626;800002-O;SCCZ;Novák;Jan;10000;1;2.1.2025;01.01.2025;",
+            "626;800002-O;SCCZ;Novák;Jan;10000;1;;01.01.2025;",
+            "999;800003-R;SCCZ;Dvořák;Petr;11000;0;31.02.2025;01.01.2025;",
+            "626;800004-O;SCCZ;Dvořák;Petr;11000;1;;;",
+            "626;800005-O;SCCZ;Dvořák;Petr;11000;0;;01.01.2025;bez montáže",
+        ]
+        content = "\n".join([self.HEADER, *lines]) + "\n"
+        upload = SimpleUploadedFile("import.csv", content.encode("cp1250"), "text/csv")
+        response = self.api.post(
+            reverse("api_v1:csv-import-preview"), {"file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        data = response.data
+        self.assertEqual(data["rows"], 6)
+        self.assertEqual(data["skipped"], 1)
+        self.assertEqual(data["new"], 3)
+        self.assertEqual(
+            data["new_by_team_type"], {"By_assembly_crew": 2, "By_customer": 1}
+        )
+        self.assertEqual(data["duplicates"], {"existing": 1, "in_file": 1})
+        self.assertEqual(data["unknown_hubs"], {"999": 1})
+        self.assertEqual(data["invalid_dates"], {"erfassungstermin": 1, "avizovany-termin": 1})
+        self.assertFalse(data["valid"])
+        self.assertIn(
+            {
+                "row": 4,
+                "order_number": "800003-R",
+                "column": "avizovany-termin",
+                "value": "31.02.2025",
+                "error": "chybné datum",
+            },
+            data["errors"],
+        )
+        # --- dry-run: nic se neuložilo
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(Upload.objects.exists())
+
+    def test_preview_missing_columns(self):
+        upload = SimpleUploadedFile("import.csv", b"a;b\n1;2\n", "text/csv")
+        response = self.api.post(
+            reverse("api_v1:csv-import-preview"), {"file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT="/tmp/ams_test_media")
+class BulkProtocolApiTest(TestCase):
+    """Hromadné generování protokolů — filtr jako seznam, výsledek po zakázkách."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("dispecer", "d@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = reverse("api_v1:order-generate-pdfs")
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        self.team = Team.objects.create(name="Tým A", city="Praha", phone="777111222")
+        other = Team.objects.create(name="Tým B", city="Brno", phone="777333444")
+        # --- týden 2025-W14 = 31.3.–6.4.2025
+        montage = timezone.make_aware(timezone.datetime(2025, 4, 2, 9, 0))
+        for i, (team, status, termin) in enumerate(
+            [
+                (self.team, Status.ADVICED, montage),
+                (self.team, Status.ADVICED, montage + timedelta(days=3)),
+                (self.team, Status.ADVICED, montage + timedelta(days=7)),  # --- jiný týden
+                (self.team, Status.REALIZED, montage),
+                (other, Status.ADVICED, montage),
+            ]
+        ):
+            Order.objects.create(
+                order_number=f"{710000 + i}-O",
+                distrib_hub=hub,
+                mandant="SCCZ" if i % 2 else "KIKA",
+                client=Client.objects.create(name=f"Zákazník {i}", zip_code="10000"),
+                team=team,
+                status=status,
+                evidence_termin=date(2025, 3, 1),
+                montage_termin=termin,
+            )
+
+    def generate(self, query: str) -> dict:
+        """POST generate-pdfs + worker; vrací stav jobu jako API"""
+        response = self.api.post(f"{self.url}?{query}")
+        self.assertEqual(response.status_code, 202)
+        call_command("run_protocol_worker", once=True, workers=1)
+        job = self.api.get(response["Location"])
+        self.assertEqual(job.status_code, 200)
+        return job.data
+
+    def test_post_enqueues_job(self):
+        response = self.api.post(f"{self.url}?status=Adviced&team_id={self.team.pk}")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], ImportStatus.PENDING)
+        self.assertEqual(response.data["summary"]["requested"], 3)
+        self.assertEqual(response.data["progress"], 0.0)
+        self.assertTrue(response["Location"].endswith(f"/protocol-jobs/{response.data['id']}/"))
+        self.assertFalse(OrderPDFStorage.objects.exists())
+
+    def test_generates_filtered_orders(self):
+        query = f"status=Adviced&team_id={self.team.pk}&montage_week=2025-W14"
+        job = self.generate(query)
+        self.assertEqual(job["status"], ImportStatus.DONE)
+        self.assertEqual(job["progress"], 100.0)
+        self.assertEqual(job["summary"]["requested"], 2)
+        self.assertEqual(job["summary"]["generated"], 2)
+        self.assertEqual(job["summary"]["failed"], 0)
+        numbers = {result["order_number"] for result in job["results"]}
+        self.assertEqual(numbers, {"710000-O", "710001-O"})
+        self.assertTrue(all(result["created"] for result in job["results"]))
+        self.assertEqual(
+            set(OrderPDFStorage.objects.values_list("order__order_number", flat=True)), numbers
+        )
+
+        # --- podruhé jsou protokoly aktuální (stejný otisk) — přeskočí se
+        with patch("app_sprava_montazi.protocol_batch.render_protocol") as render:
+            job = self.generate(query)
+        render.assert_not_called()
+        self.assertEqual(job["summary"]["skipped"], 2)
+        self.assertEqual(job["summary"]["generated"], 0)
+
+        # --- force=true je přegeneruje
+        job = self.generate(f"{query}&force=true")
+        self.assertEqual(job["summary"]["generated"], 2)
+        self.assertFalse(any(result["created"] for result in job["results"]))
+        self.assertEqual(OrderPDFStorage.objects.count(), 2)
+
+    def test_worker_checkpoints_chunks(self):
+        response = self.api.post(f"{self.url}?team_id={self.team.pk}")
+        worker = "app_sprava_montazi.management.commands.run_protocol_worker"
+        with patch(f"{worker}.JOB_CHUNK_SIZE", 2):
+            call_command("run_protocol_worker", once=True, workers=1)
+        job = ProtocolJob.objects.get(pk=response.data["id"])
+        self.assertEqual((job.status, job.done, len(job.results)), (ImportStatus.DONE, 4, 4))
+
+    def test_claim_next_resumes_stale_job_from_checkpoint(self):
+        orders = list(Order.objects.filter(team=self.team).values_list("pk", flat=True))
+        job = ProtocolJob.objects.create(orders=orders, status=ImportStatus.RUNNING)
+        first = {
+            "order_id": orders[0],
+            "order_number": "x",
+            "ok": True,
+            "created": True,
+            "skipped": False,
+            "error": "",
+            "size": 1,
+        }
+        ProtocolJob.objects.filter(pk=job.pk).update(
+            done=1, results=[first], updated=timezone.now() - timedelta(hours=1)
+        )
+        call_command("run_protocol_worker", once=True, workers=1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportStatus.DONE)
+        self.assertEqual(job.results[0], first)
+        self.assertEqual(len(job.results), 4)
+        # --- první zakázka patřila checkpointu, znovu se negenerovala
+        self.assertFalse(OrderPDFStorage.objects.filter(order_id=orders[0]).exists())
+
+    def test_single_protocol_skips_unchanged_order(self):
+        order = Order.objects.get(order_number="710001-O")
+        url = reverse("api_v1:order-generate-pdf", args=[order.pk])
+        self.assertFalse(self.api.post(url).data["skipped"])
+        self.assertTrue(self.api.post(url).data["skipped"])
+
+        Article.objects.create(order=order, name="Skříň", quantity=1)
+        self.assertFalse(self.api.post(url).data["skipped"])
+        self.assertTrue(self.api.post(url).data["skipped"])
+        self.assertFalse(self.api.post(f"{url}?force=1").data["skipped"])
+
+    def test_stale_protocols(self):
+        url = reverse("api_v1:order-stale-protocols")
+        self.generate(f"team_id={self.team.pk}")
+        self.assertEqual(self.api.get(url).data["count"], 0)
+
+        # --- změna stavu protokol nemění, změna termínu ano
+        Order.objects.filter(order_number="710000-O").update(status=Status.REALIZED)
+        order = Order.objects.get(order_number="710001-O")
+        order.montage_termin += timedelta(hours=2)
+        order.save()
+        response = self.api.get(url)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["order_number"], "710001-O")
+        self.assertEqual(self.api.get(f"{url}?mandant=KIKA").data["count"], 0)
+
+        self.generate(f"team_id={self.team.pk}")
+        self.assertEqual(self.api.get(url).data["count"], 0)
+
+    def test_stale_protocols_limit(self):
+        url = reverse("api_v1:order-stale-protocols")
+        self.generate(f"team_id={self.team.pk}")
+        with patch("api_v1.views.BULK_PROTOCOL_LIMIT", 2):
+            with patch("api_v1.views.stale_protocols") as stale:
+                self.assertEqual(self.api.get(url).status_code, 400)  # --- 4 protokoly
+            stale.assert_not_called()
+            # --- užší filtr (2 zakázky s protokolem) projde
+            response = self.api.get(f"{url}?mandant=SCCZ")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 0)
+
+    def test_per_order_failure_is_reported(self):
+        def render(order, profile=None):
+            if order.order_number == "710001-O":
+                raise ValueError("chybí data")
+            return b"%PDF-1.4"
+
+        with patch("app_sprava_montazi.protocol_batch.render_protocol", side_effect=render):
+            job = self.generate(f"team_id={self.team.pk}&montage_week=2025-W14")
+        self.assertEqual(job["status"], ImportStatus.DONE)
+        self.assertEqual(job["summary"]["requested"], 3)
+        self.assertEqual(job["summary"]["generated"], 2)
+        failed = [result for result in job["results"] if not result["ok"]]
+        self.assertEqual(
+            failed, [{"order_id": failed[0]["order_id"], "order_number": "710001-O",
+                      "ok": False, "created": False, "skipped": False,
+                      "error": "chybí data", "size": 0}]
+        )
+        self.assertFalse(OrderPDFStorage.objects.filter(order__order_number="710001-O").exists())
+
+    def test_requires_filter_and_limit(self):
+        self.assertEqual(self.api.post(self.url).status_code, 400)
+        self.assertEqual(self.api.post(f"{self.url}?montage_week=2025-X1").status_code, 400)
+        with patch("api_v1.views.BULK_PROTOCOL_LIMIT", 2):
+            response = self.api.post(f"{self.url}?status=Adviced")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ProtocolJob.objects.exists())
+
+
+@override_settings(MEDIA_ROOT="/tmp/ams_test_media")
+class SendMailOutboxApiTest(TestCase):
+    """send-mail jen zařadí email do fronty — odešle ho run_mail_worker."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("dispecer", "d@example.com", "pass")
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        self.team = Team.objects.create(
+            name="Tým A", city="Praha", phone="777111222", email="tym@example.cz"
+        )
+        self.order = Order.objects.create(
+            order_number="750000-O",
+            distrib_hub=hub,
+            mandant="SCCZ",
+            client=Client.objects.create(name="Zákazník", zip_code="10000"),
+            team=self.team,
+            status=Status.ADVICED,
+            evidence_termin=date(2025, 3, 1),
+            montage_termin=timezone.now(),
+        )
+        self.url = reverse("api_v1:order-send-mail", kwargs={"pk": self.order.pk})
+
+    def test_enqueues_without_sending(self):
+        from django.core import mail
+
+        self.api.post(reverse("api_v1:order-generate-pdf", kwargs={"pk": self.order.pk}))
+        response = self.api.post(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], MailStatus.PENDING)
+        self.assertNotIn("token", response.data)
+        self.assertEqual(mail.outbox, [])
+        job = EmailOutbox.objects.get(pk=response.data["id"])
+        self.assertEqual(job.requested_by, self.user)
+        self.assertTrue(job.back_url.endswith(f"back-protocol?token={job.token}"))
+        self.order.refresh_from_db()
+        self.assertIsNone(self.order.mail_datum_sended)
+        # --- odkaz z dříve odeslaného emailu platí, dokud nový email neodejde
+        OrderBackProtocolToken.objects.create(order=self.order, token="stary")
+        self.assertFalse(OrderBackProtocolToken.objects.filter(token=job.token).exists())
+
+        # --- opakované odeslání nahradí čekající email
+        response = self.api.post(self.url)
+        job = EmailOutbox.objects.get()
+        self.assertEqual(job.pk, response.data["id"])
+
+        call_command("run_mail_worker", once=True, stdout=StringIO())
+        self.assertEqual(mail.outbox[0].to, ["tym@example.cz"])
+        self.assertIn(job.back_url, mail.outbox[0].body)
+        self.order.refresh_from_db()
+        self.assertIsNotNone(self.order.mail_datum_sended)
+        self.assertEqual(self.order.mail_team_sended, "Tým A")
+        self.assertEqual(
+            OrderBackProtocolToken.objects.get(order=self.order).token, job.token
+        )
+
+        # --- stav pro polling FE (Location z 202)
+        status_response = self.api.get(response["Location"])
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(status_response.data["status"], MailStatus.SENT)
+        self.assertEqual(status_response.data["recipient"], "tym@example.cz")
+
+    def test_requires_protocol_and_team_email(self):
+        response = self.api.post(self.url)
+        self.assertEqual(response.status_code, 400)
+        Team.objects.filter(pk=self.team.pk).update(email="")
+        self.api.post(reverse("api_v1:order-generate-pdf", kwargs={"pk": self.order.pk}))
+        self.assertEqual(self.api.post(self.url).status_code, 400)
+        self.assertFalse(EmailOutbox.objects.exists())
@@ -1,23 +1,44 @@
 """Test functions"""
 
-from datetime import date, datetime
+import socketserver
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from datetime import date, datetime, timedelta
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+from pypdf import PdfReader
 from rich.console import Console
 
 # --- django
 from django.conf import settings
-from django.test import TestCase, RequestFactory
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, RequestFactory, override_settings
 from django.utils import timezone
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen.canvas import Canvas
 from django.db.models import QuerySet
 from django.contrib.auth.models import User
 from app_sprava_montazi.OOP_protokols import PdfConfig, Section, Utility
+from app_sprava_montazi.OOP_protokols import (
+    DefaultPdfGenerator,
+    PageTemplate,
+    PdfResources,
+    SCCZPdfGenerator,
+    get_pdf_profile,
+)
+from app_sprava_montazi.management.commands import import_data
 
 # --- utils
 from app_sprava_montazi.utils import call_errors_adviced, check_order_error_adviced
+from app_sprava_montazi import protocol_batch, reportlab_compat
 
 # --- models
-from ..models import Order, Client, DistribHub, Team, Status, TeamType
+from ..models import Article, Order, Client, DistribHub, Team, Status, TeamType
+from ..models import EmailOutbox, MailStatus, OrderBackProtocolToken, OrderPDFStorage
+from ..models import ImportStatus, OrderMonthlyStats, OrderSearchDocument, Upload
 
 # ---
 cons: Console = Console()
@@ -281,3 +302,684 @@ class OrderErrorFunctions(TestCase):
             order = Order.objects.get(order_number=f"ADVICED-MAIL-{i:05}-R")
             error_exists = check_order_error_adviced(order.pk)
             self.assertFalse(error_exists)
+
+
+class ImportDataBulkTest(TestCase):
+    """import_data — set-based zápis, počítadla jako při zpracování po řádcích."""
+
+    HEADER = (
+        "Místo určení;Číslo zakázky;Mandant;Příjmení;Křestní jméno;PSČ;Montáž;"
+        "Avizovaný termín;Erfassungstermin;Poznámka mandanta"
+    )
+
+    def setUp(self):
+        self.hub = DistribHub.objects.create(code="626", city="Chrastany")
+        self.existing_client = Client.objects.create(name="Novák Jan", zip_code="10000")
+        Order.objects.create(
+            order_number="700000-O",
+            distrib_hub=self.hub,
+            mandant="SCCZ",
+            client=self.existing_client,
+            evidence_termin=date(2025, 1, 1),
+        )
+        self.path = Path(tempfile.mkdtemp()) / "import.csv"
+
+    def _write(self, lines: list[str]) -> None:
+        self.path.write_text("\n".join([self.HEADER, *lines]) + "\n", encoding="cp1250")
+
+    def _import(self) -> dict:
+        command = import_data.Command()
+        call_command(command, str(self.path))
+        return command.counter
+
+    def test_counters_and_records(self):
+        self._write(
+            [
+                "626;700000-O;SCCZ;Novák;Jan;10000;1;02.01.2025;01.01.2025;duplicita v DB",
+                "626;700001-O;SCCZ;Novák;Jan;10000;1;02.01.2025;01.01.2025;",
+                "626;700002-R;SCCZ;Dvořák;Petr;11000;0;;03.01.2025;zákazník sám",
+                "626;700003-O;SCCZ;Dvořák;Petr;11000;1;;04.01.2025;",
+                "626;700003-O;SCCZ;Svoboda;Jiří;12000;1;;04.01.2025;duplicita v souboru",
+                "626;700004-O;SCCZ;Černý;Karel;13000;0;;04.01.2025;bez montáže — vyfiltruje se",
+            ]
+        )
+        counter = self._import()
+        self.assertEqual(
+            counter,
+            {
+                "by_assembly_crew_count": 2,
+                "by_customer_count": 1,
+                "client_count": 2,  # --- Dvořák, Svoboda (Novák už existuje)
+                "duplicit_count": 2,
+            },
+        )
+        self.assertEqual(Order.objects.count(), 4)
+        self.assertEqual(Client.objects.filter(name="Dvořák Petr").count(), 1)
+        order = Order.objects.get(order_number="700001-O")
+        self.assertEqual(order.client, self.existing_client)
+        self.assertEqual(order.delivery_termin, date(2025, 1, 2))
+        self.assertEqual(order.team_type, TeamType.BY_ASSEMBLY_CREW)
+        self.assertEqual(Order.objects.get(order_number="700002-R").team_type, TeamType.BY_CUSTOMER)
+        # --- historie, rollup a fulltext i bez signálů
+        self.assertEqual(Order.history.filter(history_type="+").count(), 4)
+        self.assertEqual(Client.history.filter(name="Svoboda Jiří").count(), 1)
+        self.assertTrue(Client.objects.get(name="Svoboda Jiří").slug)
+        self.assertEqual(
+            OrderMonthlyStats.objects.aggregate(total=Sum("order_count"))["total"], 4
+        )
+        self.assertEqual(OrderSearchDocument.objects.count(), 4)
+
+    def test_unknown_hub_rolls_back(self):
+        self._write(
+            [
+                "626;700010-O;SCCZ;Novák;Petr;10000;1;;01.01.2025;",
+                "999;700011-O;SCCZ;Novák;Petr;10000;1;;01.01.2025;",
+            ]
+        )
+        with self.assertRaises(DistribHub.DoesNotExist):
+            self._import()
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(Client.objects.filter(name="Novák Petr").exists())
+
+    def test_streaming_matches_single_pass(self):
+        self._write(
+            [
+                "626;700000-O;SCCZ;Novák;Jan;10000;1;02.01.2025;01.01.2025;duplicita v DB",
+                "626;700001-O;SCCZ;Novák;Jan;10000;1;02.01.2025;01.01.2025;",
+                "626;700002-R;SCCZ;Dvořák;Petr;11000;0;;03.01.2025;zákazník sám",
+                "626;700003-O;SCCZ;Dvořák;Petr;11000;1;;04.01.2025;",
+                "626;700003-O;SCCZ;Svoboda;Jiří;12000;1;;04.01.2025;duplicita jiné dávky",
+            ]
+        )
+        command = import_data.Command()
+        call_command(command, str(self.path), chunk_size=2)
+        self.assertEqual(
+            command.counter,
+            {
+                "by_assembly_crew_count": 2,
+                "by_customer_count": 1,
+                "client_count": 2,
+                "duplicit_count": 2,
+            },
+        )
+        self.assertEqual(Order.objects.count(), 4)
+
+    def test_streaming_resumes_from_checkpoint(self):
+        self._write(
+            [
+                "626;700020-O;SCCZ;Novák;Petr;10000;1;;01.01.2025;",
+                "626;700021-O;SCCZ;Novák;Petr;10000;1;;01.01.2025;",
+                "626;700022-O;SCCZ;Dvořák;Petr;11000;1;;01.01.2025;",
+                ";;;;;;;;;",
+                "999;700023-O;SCCZ;Svoboda;Jiří;12000;1;;01.01.2025;",
+                "626;700024-O;SCCZ;Svoboda;Jiří;12000;1;;01.01.2025;",
+            ]
+        )
+        upload = Upload.objects.create(file="uploads/import.csv")
+        with self.assertRaises(DistribHub.DoesNotExist):
+            call_command(import_data.Command(), str(self.path), chunk_size=2, upload=upload.pk)
+        upload.refresh_from_db()
+        # --- první dvě dávky zůstaly uložené, checkpoint za nimi
+        self.assertEqual(upload.import_status, ImportStatus.FAILED)
+        self.assertEqual(upload.rows_done, 4)
+        self.assertEqual(upload.counters["client_count"], 2)
+        self.assertIn("700023-O", upload.import_error)
+        self.assertEqual(Order.objects.filter(order_number__startswith="70002").count(), 3)
+        # --- navázání (jiná velikost dávky) — hotové řádky se nezopakují
+        DistribHub.objects.create(code="999", city="Nový hub")
+        command = import_data.Command()
+        call_command(command, str(self.path), chunk_size=3, upload=upload.pk)
+        upload.refresh_from_db()
+        self.assertEqual(upload.import_status, ImportStatus.DONE)
+        self.assertEqual(upload.rows_done, 6)
+        self.assertEqual(
+            upload.counters,
+            {
+                "by_assembly_crew_count": 5,
+                "by_customer_count": 0,
+                "client_count": 3,
+                "duplicit_count": 0,
+            },
+        )
+        self.assertEqual(command.counter, upload.counters)
+        self.assertEqual(Order.objects.filter(order_number__startswith="70002").count(), 5)
+        self.assertFalse(Upload.history.filter(rows_done=4).exists())
+
+
+class PdfResourcesTest(TestCase):
+    """Fonty a logo protokolů se načítají jednou za proces"""
+
+    def setUp(self):
+        PdfResources.preload()
+        self.logo = PdfConfig.files / "rhenus_logo.png"
+
+    def test_fonts_registered_once(self):
+        fonts = {name: pdfmetrics.getFont(name) for name in PdfResources.FONTS}
+        with patch("app_sprava_montazi.OOP_protokols.TTFont") as ttfont:
+            PdfResources.register_fonts()
+            SCCZPdfGenerator()
+        ttfont.assert_not_called()
+        for name, font in fonts.items():
+            self.assertIs(pdfmetrics.getFont(name), font)
+
+    def test_logo_encoded_once(self):
+        cached = PdfResources.image(self.logo)
+        with (
+            patch("app_sprava_montazi.reportlab_compat.PDFImageXObject") as xobject,
+            patch("app_sprava_montazi.reportlab_compat.PngImageXObject") as png_xobject,
+        ):
+            pdf = DefaultPdfGenerator().generate_pdf_protocol()
+        xobject.assert_not_called()
+        png_xobject.assert_not_called()
+        self.assertIs(PdfResources.image(self.logo), cached)
+        # --- data loga jsou v PDF (jen jednou)
+        content = cached.streamContent
+        if isinstance(content, str):
+            content = content.encode("latin-1")
+        self.assertEqual(pdf.count(content), 1)
+
+    def test_output_same_as_plain_draw_image(self):
+        def plain_draw_image(cvs, path, width, height, x, y, profile=None):
+            cvs.drawImage(image=path, width=width, height=height, x=x, y=y)
+
+        with patch("reportlab.rl_config.invariant", 1):
+            cached = SCCZPdfGenerator().generate_pdf_protocol()
+            with patch.object(PdfResources, "draw_image", plain_draw_image):
+                plain = SCCZPdfGenerator().generate_pdf_protocol()
+        self.assertEqual(cached, plain)
+
+
+class PageTemplateTest(TestCase):
+    """Statická vrstva protokolu se kreslí jednou, zakázka jen přes data"""
+
+    def setUp(self):
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        team = Team.objects.create(name="Montáže Novák", city="Praha", phone="777123456")
+        client = Client.objects.create(
+            name="Jan Žluťoučký",
+            street="Dlouhá 12",
+            city="Plzeň",
+            zip_code="30100",
+            phone="602123456",
+            email="jan@example.cz",
+        )
+        self.order = Order.objects.create(
+            order_number="700123-o",
+            distrib_hub=hub,
+            mandant="SCCZ",
+            client=client,
+            team=team,
+            evidence_termin=date(2025, 3, 1),
+            montage_termin=timezone.now(),
+            notes="Třetí patro, bez výtahu",
+        )
+        Article.objects.create(order=self.order, name="Šatní skříň", quantity=2, note="bílá")
+
+    @staticmethod
+    def page(pdf: bytes):
+        return PdfReader(BytesIO(pdf)).pages[0]
+
+    def test_template_rendered_once_per_class(self):
+        template = PageTemplate.get(SCCZPdfGenerator)
+        with patch.object(SCCZPdfGenerator, "static_layer") as static_layer:
+            generator = SCCZPdfGenerator()
+            generator.generate_pdf_protocol(model=self.order)
+        static_layer.assert_not_called()
+        self.assertIs(generator.template, template)
+        self.assertIsNot(PageTemplate.get(DefaultPdfGenerator), template)
+
+    def test_same_text_as_direct_drawing(self):
+        for generator_class in (SCCZPdfGenerator, DefaultPdfGenerator):
+            with self.subTest(generator_class.__name__):
+                direct = generator_class(use_template=False)
+                text = self.page(direct.generate_pdf_protocol(self.order)).extract_text()
+                templated = generator_class().generate_pdf_protocol(self.order)
+                # --- pořadí textu se liší (vodoznak, form, data), obsah ne
+                self.assertEqual(
+                    sorted(self.page(templated).extract_text().split()), sorted(text.split())
+                )
+                self.assertIn("MONTÁŽ NÁBYTKU", text)
+
+    def test_page_uses_form(self):
+        page = self.page(SCCZPdfGenerator().generate_pdf_protocol(self.order))
+        self.assertIn("700123-O", page.extract_text())
+        xobjects = page["/Resources"]["/XObject"]
+        form = xobjects[f"/FormXob.{PageTemplate.NAME}"].get_object()
+        self.assertEqual(form["/Subtype"], "/Form")
+        # --- logo je ve formu, stránka kreslí jen vodoznak, form, QR a data
+        self.assertEqual(len(form["/Resources"]["/XObject"]), 1)
+        self.assertEqual(list(xobjects), [f"/FormXob.{PageTemplate.NAME}"])
+        self.assertIn(b"Do", page.get_contents().get_data())
+
+    def test_unsupported_reportlab_draws_per_page(self):
+        """Neověřená verze reportlabu — bez šablony a cache, veřejné API canvasu"""
+        templated = SCCZPdfGenerator().generate_pdf_protocol(self.order)
+        with (
+            patch.object(reportlab_compat, "INTERNALS_SUPPORTED", False),
+            patch.object(reportlab_compat, "add_form") as add_form,
+            patch.object(reportlab_compat, "add_image") as add_image,
+            patch.object(reportlab_compat, "flate_only_pages") as flate_only_pages,
+        ):
+            generator = SCCZPdfGenerator(profile=get_pdf_profile("flate"))
+            pdf = generator.generate_pdf_protocol(self.order)
+        self.assertIsNone(generator.template)
+        for internal in (add_form, add_image, flate_only_pages):
+            internal.assert_not_called()
+        page = self.page(pdf)
+        self.assertNotIn(f"/FormXob.{PageTemplate.NAME}", page["/Resources"]["/XObject"])
+        self.assertEqual(len(page.images), 1)  # --- logo
+        self.assertEqual(
+            sorted(page.extract_text().split()), sorted(self.page(templated).extract_text().split())
+        )
+
+
+class ReportlabInternalsTest(TestCase):
+    """Interní API reportlabu, na kterém stojí reportlab_compat.
+
+    Selže-li test po aktualizaci reportlabu, změnilo se interní API — pin
+    reportlab==4.4.1 v requirements.txt neuvolňovat bez úpravy reportlab_compat.
+    """
+
+    def test_installed_version_is_supported(self):
+        import reportlab
+
+        self.assertIn(reportlab.Version, reportlab_compat.SUPPORTED_VERSIONS)
+        self.assertTrue(reportlab_compat.INTERNALS_SUPPORTED)
+
+    def setUp(self):
+        PdfResources.register_fonts()
+        self.cvs = Canvas(BytesIO())
+        self.doc = self.cvs._doc
+
+    def test_document_registry(self):
+        for attr in ("idToObject", "fontMapping", "delayedFonts", "Pages"):
+            self.assertTrue(hasattr(self.doc, attr), f"PDFDocument.{attr}")
+        for method in ("getXObjectName", "Reference", "addForm", "xobjDict"):
+            self.assertTrue(callable(getattr(self.doc, method, None)), f"PDFDocument.{method}")
+        for attr in ("_setXObjects", "_formsinuse"):
+            self.assertTrue(hasattr(self.cvs, attr), f"Canvas.{attr}")
+
+    def test_draw_image_name_matches_digester(self):
+        path = PdfResources.FONT_DIR / "rhenus_logo.png"
+        self.cvs.drawImage(str(path), 0, 0, width=10, height=10)
+        name = reportlab_compat.image_name(path)
+        self.assertIn(self.doc.getXObjectName(name), self.doc.idToObject)
+        self.assertIn(name, self.cvs._formsinuse)
+
+    def test_font_subset_state(self):
+        self.cvs.setFont("Roboto-Regular", 10)
+        self.cvs.drawString(0, 0, "Žluťoučký")
+        font = pdfmetrics.getFont("Roboto-Regular")
+        self.assertIn(font, self.doc.delayedFonts)
+        state = font.state[self.doc]
+        for attr in ("assignments", "subsets", "internalName"):
+            self.assertTrue(hasattr(state, attr), f"TTFont.State.{attr}")
+        self.assertIsInstance(state.assignments, dict)
+        self.assertIsInstance(state.subsets, list)
+
+    def test_page_contents_hook(self):
+        self.cvs.drawString(0, 0, "x")
+        self.cvs.showPage()
+        page = self.doc.Pages.pages[0]
+        for attr in ("Contents", "stream", "compression"):
+            self.assertTrue(hasattr(page, attr), f"PDFPage.{attr}")
+
+
+class PdfProfileTest(TestCase):
+    """Výstupní profil flate — menší PDF se stejným obsahem"""
+
+    setUp = PageTemplateTest.setUp
+    page = staticmethod(PageTemplateTest.page)
+
+    def render(self, profile: str) -> bytes:
+        order = Order.objects.get(pk=self.order.pk)
+        return SCCZPdfGenerator(profile=get_pdf_profile(profile)).generate_pdf_protocol(order)
+
+    def test_flate_is_smaller_with_same_content(self):
+        standard, flate = self.render("standard"), self.render("flate")
+        self.assertLess(len(flate), len(standard) * 0.9)
+        self.assertEqual(self.page(flate).extract_text(), self.page(standard).extract_text())
+        self.assertNotIn(b"ASCII85Decode", flate)
+        # --- logo bezztrátově (PNG prediktor)
+        logo = [page.images[0].image.convert("RGB").tobytes() for page in
+                (self.page(standard), self.page(flate))]
+        self.assertEqual(logo[0], logo[1])
+
+    def test_profile_from_settings(self):
+        self.assertEqual(SCCZPdfGenerator().cfg.profile.name, "standard")  # --- výchozí
+        with self.settings(PDF_PROTOCOL_PROFILE="flate"):
+            self.assertEqual(SCCZPdfGenerator().cfg.profile.name, "flate")
+            fingerprint = SCCZPdfGenerator.fingerprint(self.order)
+        self.assertNotEqual(SCCZPdfGenerator.fingerprint(self.order), fingerprint)
+        with self.assertRaises(ValueError):
+            get_pdf_profile("tiny")
+
+
+@override_settings(MEDIA_ROOT="/tmp/ams_test_media")
+class ProtocolBatchTest(TestCase):
+    """Hromadné generování protokolů v poolu procesů"""
+
+    def setUp(self):
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        self.team = Team.objects.create(name="Montáže Novák", city="Praha", phone="777123456")
+        montage = timezone.make_aware(datetime(2025, 4, 2, 9, 0))
+        for i in range(4):
+            order = Order.objects.create(
+                order_number=f"{720000 + i}-O",
+                distrib_hub=hub,
+                mandant="SCCZ" if i % 2 else "KIKA",
+                client=Client.objects.create(name=f"Zákazník {i}", zip_code="30100"),
+                team=self.team,
+                status=Status.ADVICED,
+                evidence_termin=date(2025, 3, 1),
+                montage_termin=montage,
+            )
+            Article.objects.create(order=order, name=f"Artikl {i}", quantity=1, note="")
+        self.addCleanup(protocol_batch.shutdown_pool)
+
+    def test_week_range(self):
+        start, end = protocol_batch.week_range("2025-w14")
+        self.assertEqual(timezone.localtime(start), timezone.make_aware(datetime(2025, 3, 31)))
+        self.assertEqual(end - start, timedelta(days=7))
+        with self.assertRaises(ValueError):
+            protocol_batch.week_range("2025-W53")
+
+    def test_pool_renders_and_saves(self):
+        orders = Order.objects.filter(team=self.team).order_by("order_number")
+        results = protocol_batch.generate_protocols(orders, workers=2)
+        self.assertEqual([result.order_number for result in results], [f"{720000 + i}-O" for i in range(4)])
+        self.assertTrue(all(result.ok and result.created for result in results), results)
+        for storage in OrderPDFStorage.objects.all():
+            with storage.file.open("rb") as pdf:
+                text = PdfReader(pdf).pages[0].extract_text()
+            self.assertIn("MONTÁŽ NÁBYTKU", text)
+        # --- SCCZ protokol nese data zakázky (render ve workeru bez DB)
+        sccz = OrderPDFStorage.objects.get(order__order_number="720001-O")
+        with sccz.file.open("rb") as pdf:
+            self.assertIn("Artikl 1", PdfReader(pdf).pages[0].extract_text())
+        # --- pool zůstává teplý pro další volání
+        pool = protocol_batch.get_pool(2)
+        results = protocol_batch.generate_protocols(orders[:1], workers=2, force=True)
+        self.assertIs(protocol_batch.get_pool(2), pool)
+        self.assertFalse(results[0].created)
+        # --- beze změny dat se nic nerenderuje
+        results = protocol_batch.generate_protocols(orders, workers=2)
+        self.assertTrue(all(result.skipped for result in results))
+
+    def test_fingerprint_matches_render_profile(self):
+        orders = Order.objects.filter(team=self.team)
+        with self.settings(PDF_PROTOCOL_PROFILE="standard"):
+            protocol_batch.generate_protocols(orders, workers=1)
+            self.assertFalse(protocol_batch.stale_protocols(orders).exists())
+        order = protocol_batch.protocol_queryset(orders).get(order_number="720001-O")  # --- SCCZ
+        standard, flate = get_pdf_profile("standard"), get_pdf_profile("flate")
+        self.assertEqual(order.pdf.fingerprint, SCCZPdfGenerator.fingerprint(order, standard))
+        self.assertNotEqual(
+            SCCZPdfGenerator.fingerprint(order, standard),
+            SCCZPdfGenerator.fingerprint(order, flate),
+        )
+        # --- jiný výchozí profil → uložené protokoly jsou zastaralé
+        with self.settings(PDF_PROTOCOL_PROFILE="flate"):
+            self.assertEqual(protocol_batch.stale_protocols(orders).count(), 4)
+
+    def test_fingerprint(self):
+        order = Order.objects.filter(team=self.team).first()
+        fingerprint = SCCZPdfGenerator.fingerprint(order)
+        self.assertEqual(len(fingerprint), 64)
+        self.assertEqual(SCCZPdfGenerator.fingerprint(order), fingerprint)
+        self.assertNotEqual(DefaultPdfGenerator.fingerprint(order), fingerprint)
+        with patch.object(SCCZPdfGenerator, "VERSION", SCCZPdfGenerator.VERSION + 1):
+            self.assertNotEqual(SCCZPdfGenerator.fingerprint(order), fingerprint)
+        order.client.phone = "+420602000000"
+        self.assertNotEqual(SCCZPdfGenerator.fingerprint(order), fingerprint)
+
+    def test_stale_protocols(self):
+        protocol_batch.generate_protocols(Order.objects.all(), workers=1)
+        self.assertFalse(protocol_batch.stale_protocols().exists())
+        article = Article.objects.get(order__order_number="720002-O")
+        article.quantity = 2
+        article.save()
+        Client.objects.filter(name="Zákazník 3").update(city="Brno")
+        stale = protocol_batch.stale_protocols().order_by("order_number")
+        self.assertEqual(
+            list(stale.values_list("order_number", flat=True)), ["720002-O", "720003-O"]
+        )
+
+        out = StringIO()
+        call_command("generate_protocols", stale=True, workers=1, stdout=out)
+        self.assertIn("2 hotovo, 0 beze změny, 0 chyb", out.getvalue())
+        self.assertFalse(protocol_batch.stale_protocols().exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            "generate_protocols",
+            team=self.team.pk,
+            week="2025-W14",
+            mandant="SCCZ",
+            workers=1,
+            stdout=out,
+        )
+        self.assertIn("720001-O: protokol založen (", out.getvalue())
+        self.assertIn(" kB, průměr ", out.getvalue())
+        self.assertIn("2 hotovo, 0 beze změny, 0 chyb", out.getvalue())
+        self.assertEqual(OrderPDFStorage.objects.count(), 2)
+
+
+@override_settings(MEDIA_ROOT="/tmp/ams_test_media")
+class EncryptedPdfEmailTest(TestCase):
+    """Zašifrovaná příloha emailu — v paměti, bez dočasného souboru v MEDIA_ROOT"""
+
+    def setUp(self):
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        team = Team.objects.create(
+            name="Montáže Novák", city="Praha", phone="777123456", email="tym@example.cz"
+        )
+        self.order = Order.objects.create(
+            order_number="730000-O",
+            distrib_hub=hub,
+            mandant="SCCZ",
+            client=Client.objects.create(name="Jan Novák", zip_code="30100"),
+            team=team,
+            evidence_termin=date(2025, 3, 1),
+            montage_termin=timezone.make_aware(datetime(2025, 4, 2, 9, 0)),
+        )
+        Article.objects.create(order=self.order, name="Skříň", quantity=1, note="")
+        self.user = User.objects.create_user("dispecer", "d@example.cz", "pass")
+        protocol_batch.generate_protocols(Order.objects.filter(pk=self.order.pk), workers=1)
+        self.stored = OrderPDFStorage.objects.get(order=self.order)
+
+    def send(self) -> tuple[str, bytes]:
+        from django.core import mail
+        from app_sprava_montazi.OOP_emails import CustomEmail
+
+        media = Path(self.stored.file.path).parent
+        before = set(media.iterdir())
+        email = CustomEmail(pk=self.order.pk, back_url="http://x/", user=self.user)
+        email.send_email_with_encrypted_pdf()
+        self.assertEqual(set(media.iterdir()), before)  # --- žádný *_encrypted.pdf na disku
+        message = mail.outbox[-1]
+        password = message.body.split("Heslo k PDF příloze: ")[1].split()[0]
+        (filename, pdf, mimetype), = message.attachments
+        self.assertEqual(mimetype, "application/pdf")
+        self.assertTrue(filename.endswith("_encrypted.pdf"))
+        return password, pdf
+
+    def test_attachment_is_encrypted_in_memory(self):
+        password, pdf = self.send()
+        reader = PdfReader(BytesIO(pdf))
+        self.assertTrue(reader.is_encrypted)
+        self.assertFalse(reader.decrypt("spatne-heslo"))
+        self.assertTrue(reader.decrypt(password))
+        text = reader.pages[0].extract_text()
+        self.assertIn("730000-O", text)
+        self.assertIn("Skříň", text)
+
+
+class LocalSmtpServer(socketserver.ThreadingTCPServer):
+    """Lokální SMTP server pro testy — přijme zprávy do `messages`,
+    prvních `fail_first` zpráv odmítne dočasnou chybou 451."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, fail_first: int = 0) -> None:
+        super().__init__(("127.0.0.1", 0), LocalSmtpHandler)
+        self.fail_first = fail_first
+        self.messages: list[tuple[list[str], bytes]] = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class LocalSmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        recipients: list[str] = []
+        self.reply("220 localhost ESMTP")
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip(" <>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = b"".join(iter(self.rfile.readline, b".\r\n"))
+                if self.server.fail_first > 0:
+                    self.server.fail_first -= 1
+                    self.reply("451 Try again later")
+                else:
+                    self.server.messages.append((recipients, data))
+                    self.reply("250 OK")
+            elif verb == "RSET":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+@override_settings(MEDIA_ROOT="/tmp/ams_test_media")
+class EmailOutboxWorkerTest(TestCase):
+    """Fronta emailů — run_mail_worker proti lokálnímu SMTP serveru"""
+
+    def setUp(self):
+        hub = DistribHub.objects.create(code="626", city="Chrastany")
+        self.team = Team.objects.create(
+            name="Montáže Novák", city="Praha", phone="777123456", email="tym@example.cz"
+        )
+        self.order = Order.objects.create(
+            order_number="740000-O",
+            distrib_hub=hub,
+            mandant="SCCZ",
+            client=Client.objects.create(name="Jan Novák", zip_code="30100"),
+            team=self.team,
+            evidence_termin=date(2025, 3, 1),
+            montage_termin=timezone.make_aware(datetime(2025, 4, 2, 9, 0)),
+        )
+        Article.objects.create(order=self.order, name="Skříň", quantity=1, note="")
+        self.user = User.objects.create_user("dispecer", "d@example.cz", "pass")
+        protocol_batch.generate_protocols(Order.objects.filter(pk=self.order.pk), workers=1)
+
+    def run_worker(self, server: LocalSmtpServer, **options) -> None:
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        ):
+            call_command("run_mail_worker", once=True, **options)
+
+    def test_sends_and_marks_order(self):
+        job = EmailOutbox.enqueue(self.order, "http://x/", self.user)
+        with LocalSmtpServer() as server:
+            self.run_worker(server)
+        (recipients, data), = server.messages
+        self.assertEqual(recipients, ["tym@example.cz"])
+        self.assertIn(b"740000-O", data)
+        self.assertIn(b"_encrypted.pdf", data)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, MailStatus.SENT)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.recipient, "tym@example.cz")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.mail_datum_sended, job.sent)
+        self.assertEqual(self.order.mail_team_sended, "Montáže Novák")
+        self.assertEqual(OrderBackProtocolToken.objects.get(order=self.order).token, job.token)
+
+    def test_mark_sent_keeps_concurrent_order_changes(self):
+        EmailOutbox.enqueue(self.order, "http://x/", self.user)
+        job = EmailOutbox.claim_next()
+        # --- dispečer zakázku upraví, zatímco email odchází
+        Order.objects.filter(pk=self.order.pk).update(
+            notes="Zavolat předem", status=Status.REALIZED
+        )
+        job.mark_sent("tym@example.cz")
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual(order.notes, "Zavolat předem")
+        self.assertEqual(order.status, Status.REALIZED)
+        self.assertEqual(order.mail_datum_sended, job.sent)
+        self.assertEqual(order.mail_team_sended, "Montáže Novák")
+
+    def test_retries_with_backoff(self):
+        job = EmailOutbox.enqueue(self.order, "http://x/", self.user)
+        with LocalSmtpServer(fail_first=1) as server:
+            self.run_worker(server, backoff=60)
+            job.refresh_from_db()
+            self.assertEqual(job.status, MailStatus.PENDING)
+            self.assertEqual(job.attempts, 1)
+            self.assertIn("451", job.last_error)
+            self.assertGreater(job.next_attempt, timezone.now() + timedelta(seconds=50))
+            self.assertIsNone(Order.objects.get(pk=self.order.pk).mail_datum_sended)
+
+            # --- před next_attempt se email nepřevezme
+            self.run_worker(server)
+            self.assertEqual(server.messages, [])
+
+            EmailOutbox.objects.filter(pk=job.pk).update(next_attempt=timezone.now())
+            self.run_worker(server)
+        self.assertEqual(len(server.messages), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, MailStatus.SENT)
+        self.assertEqual(job.attempts, 2)
+
+    def test_fails_after_max_attempts(self):
+        OrderBackProtocolToken.objects.create(order=self.order, token="stary")
+        job = EmailOutbox.enqueue(self.order, "http://x/", self.user)
+        with LocalSmtpServer(fail_first=5) as server:
+            for _ in range(2):
+                EmailOutbox.objects.filter(pk=job.pk).update(next_attempt=timezone.now())
+                self.run_worker(server, max_attempts=2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, MailStatus.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNone(Order.objects.get(pk=self.order.pk).mail_datum_sended)
+        # --- neodeslaný email nezneplatní odkaz z předchozího emailu
+        self.assertEqual(OrderBackProtocolToken.objects.get(order=self.order).token, "stary")
+
+    def test_enqueue_replaces_pending_email(self):
+        first = EmailOutbox.enqueue(self.order, "http://x/1", self.user)
+        second = EmailOutbox.enqueue(self.order, "http://x/2", None)
+        self.assertFalse(EmailOutbox.objects.filter(pk=first.pk).exists())
+        claimed = EmailOutbox.claim_next()
+        self.assertEqual(claimed.pk, second.pk)
+        self.assertEqual(claimed.status, MailStatus.SENDING)
+        self.assertIsNone(EmailOutbox.claim_next())
@@ -3,20 +3,40 @@
 from datetime import date, timedelta, datetime
 from decimal import Decimal
 import hashlib
+import json
+import tempfile
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from cryptography.fernet import Fernet
 
 # --- django
 from django.forms import ValidationError
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import Cast
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.db import models
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, OperationalError, connections, transaction
 from django.utils.text import slugify
 from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 
 # --- modely
 from ..models import DistribHub, Client, Order, Team, Status, TeamType
-from ..models import Article, CallLog, Upload, AdviceStatus
+from ..models import Article, CallLog, Upload, AdviceStatus, OrderMonthlyStats
+from ..utils import client_created
+from ..encryption import DecryptCache, LazyDecrypted, decrypt_scope, get_decrypt_cache
+from ..encryption import iter_decrypted
+from ..encryption import _derive_fernet_key, encrypt_str, get_primary_fernet
+from ..encryption import StoredCiphertext, has_valid_envelope, is_encrypted, is_sealed
+from ..encryption import key_id, looks_like_fernet_token
 
 User = get_user_model()
 
@@ -220,6 +240,24 @@ class ClientModelTests(TestCase):
         self.assertFalse(customer1.incomplete)
         self.assertFalse(customer2.incomplete)
 
+    def test_incomplete_saved_with_update_fields(self):
+        """
+        Testuje, že částečný save (update_fields) uloží i přepočítané pole 'incomplete'.
+        """
+        customer = Client.objects.create(
+            name="Customer 3", street="Ulice 3", city="Ostrava", zip_code="70000"
+        )
+        self.assertTrue(Client.objects.get(pk=customer.pk).incomplete)
+
+        customer.phone = "777123456"
+        customer.save(update_fields=["phone"])
+        self.assertFalse(customer.incomplete)
+        self.assertFalse(Client.objects.get(pk=customer.pk).incomplete)
+
+        customer.city = ""
+        customer.save(update_fields=["city"])
+        self.assertTrue(Client.objects.get(pk=customer.pk).incomplete)
+
     def test_first_15_short_name(self):
         """
         Testuje, zda metoda first_15 vrací správně zkrácené jméno klienta, pokud je jeho délka kratší nebo rovna 15 znakům.
@@ -1658,3 +1696,468 @@ class OrderModelStructuralTest(TestCase):
 
     def test_meta_ordering(self):
         self.assertEqual(Order._meta.ordering, ["-evidence_termin"])
+
+
+class OrderMonthlyStatsTest(TestCase):
+    """Rollup se průběžně drží shodný s přepočtem z Order."""
+
+    def setUp(self):
+        self.hub = DistribHub.objects.create(code="111", city="Praha")
+        self.other_hub = DistribHub.objects.create(code="222", city="Brno")
+
+    def _snapshot(self):
+        return sorted(
+            OrderMonthlyStats.objects.filter(order_count__gt=0).values_list(
+                "year", "month", "mandant", "distrib_hub_id", "status", "team_type",
+                "order_count", "no_montage_count", "vynos", "naklad",
+            )
+        )
+
+    def _assert_matches_rebuild(self):
+        incremental = self._snapshot()
+        OrderMonthlyStats.rebuild()
+        self.assertEqual(incremental, self._snapshot())
+
+    def _order(self, number, **kwargs):
+        data = {
+            "order_number": number,
+            "distrib_hub": self.hub,
+            "mandant": "SCCZ",
+            "evidence_termin": date(2025, 1, 15),
+            "vynos": Decimal("100.00"),
+        }
+        data.update(kwargs)
+        return Order.objects.create(**data)
+
+    def test_create_counts_bucket(self):
+        self._order("1-O")
+        self._order("2-O", naklad=Decimal("30.50"))
+        stats = OrderMonthlyStats.objects.get()
+        self.assertEqual((stats.year, stats.month), (2025, 1))
+        self.assertEqual(stats.order_count, 2)
+        self.assertEqual(stats.no_montage_count, 2)
+        self.assertEqual(stats.vynos, Decimal("200.00"))
+        self.assertEqual(stats.naklad, Decimal("30.50"))
+
+    def test_changes_move_between_buckets(self):
+        order = self._order("1-O")
+        self._order("2-O", evidence_termin=date(2025, 2, 1))
+        order.status = Status.BILLED
+        order.save()
+        order.evidence_termin = date(2024, 12, 31)
+        order.distrib_hub = self.other_hub
+        order.montage_termin = timezone.now()
+        order.vynos = None
+        order.save()
+        order.save(update_fields=["notes"])
+        self._assert_matches_rebuild()
+        self.assertFalse(
+            OrderMonthlyStats.objects.filter(year=2025, month=1, order_count__gt=0).exists()
+        )
+
+    def test_delete_removes_contribution(self):
+        order = self._order("1-O")
+        self._order("2-O")
+        order.delete()
+        self.assertEqual(OrderMonthlyStats.objects.get().order_count, 1)
+        self._assert_matches_rebuild()
+
+
+class DecryptCacheTest(TestCase):
+    """LRU cache dešifrování a dávkové dešifrování querysetu."""
+
+    def setUp(self):
+        for i in range(3):
+            Client.objects.create(
+                name=f"Zákazník {i}",
+                zip_code="10000",
+                street=f"Dlouhá {i}",
+                phone="777123456",
+                email=f"zakaznik{i}@example.com",
+            )
+
+    def test_lru_limits_and_stats(self):
+        cache = DecryptCache(maxsize=2, max_value=10)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        self.assertEqual(cache.get("a"), "1")
+        cache.set("c", "3")  # --- vyhodí "b" (nejdéle nepoužitý)
+        self.assertIsNone(cache.get("b"))
+        cache.set("d", "x" * 11)  # --- příliš dlouhý plaintext se necachuje
+        self.assertIsNone(cache.get("d"))
+        stats = cache.stats()
+        self.assertEqual((stats["size"], stats["hits"], stats["evictions"]), (2, 1, 1))
+        self.assertEqual(stats["hit_rate"], round(1 / 3, 4))
+
+    def test_repeated_load_hits_cache(self):
+        with decrypt_scope() as cache:
+            for _ in range(2):
+                clients = list(Client.objects.all())
+                values = [(c.street, c.phone, c.email) for c in clients]
+            self.assertEqual((cache.stats()["misses"], cache.stats()["hits"]), (9, 9))
+        self.assertEqual(values[0][0], "Dlouhá 0")
+
+    def test_iter_decrypted_matches_regular_load(self):
+        regular = {c.pk: (c.street, c.phone, c.email) for c in Client.objects.all()}
+        with decrypt_scope() as cache:
+            batched = {
+                c.pk: (c.street, c.phone, c.email)
+                for c in iter_decrypted(Client.objects.all(), chunk_size=2)
+            }
+            self.assertEqual(cache.stats()["size"], 9)
+        self.assertEqual(batched, regular)
+
+    def test_no_process_cache_outside_scope(self):
+        # --- výchozí scope "request": mimo request/příkaz nic v paměti nezůstane
+        self.assertIsNone(get_decrypt_cache())
+        with decrypt_scope() as cache:
+            self.assertIs(get_decrypt_cache(), cache)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_decorated_command_gets_own_cache(self):
+        @decrypt_scope()
+        def handle():
+            return get_decrypt_cache()
+
+        first, second = handle(), handle()
+        self.assertIsNotNone(first)
+        self.assertIsNot(first, second)
+        self.assertIsNone(get_decrypt_cache())
+
+
+class LazyDecryptionTest(TestCase):
+    """Šifrovaná pole se dešifrují až při prvním čtení."""
+
+    def setUp(self):
+        Client.objects.create(
+            name="Pavel Dvořák",
+            zip_code="10000",
+            street="Dlouhá 5",
+            phone="777123456",
+            email="pavel@example.com",
+        )
+
+    def test_untouched_fields_are_not_decrypted(self):
+        with decrypt_scope() as cache:
+            client = Client.objects.get()
+            self.assertEqual(client.name, "Pavel Dvořák")
+            self.assertEqual(cache.stats()["misses"], 0)
+            self.assertIsInstance(client.__dict__["phone"], LazyDecrypted)
+            self.assertIs(type(client.phone), str)
+            self.assertEqual(client.phone, "+420777123456")
+            self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_save_keeps_ciphertext_of_untouched_fields(self):
+        client = Client.objects.get()
+        ciphertext = client.__dict__["street"].ciphertext
+        with decrypt_scope() as cache:
+            client.name = "Pavel Novák"
+            # --- historický záznam kopíruje všechna pole (ty se dešifrují)
+            client.save_without_historical_record(update_fields=["name"])
+            self.assertEqual(cache.stats()["misses"], 0)
+        raw = Client.objects.values_list("street", flat=True).get()
+        self.assertEqual(raw.ciphertext, ciphertext)
+
+    def test_lazy_value_behaves_like_str(self):
+        street = Client.objects.values_list("street", flat=True).get()
+        self.assertIsInstance(street, LazyDecrypted)
+        self.assertEqual(street, "Dlouhá 5")
+        self.assertEqual(str(street), "Dlouhá 5")
+        self.assertTrue(street)
+        self.assertEqual(len(street), 8)
+        self.assertEqual(street.upper(), "DLOUHÁ 5")
+        self.assertEqual(hash(street), hash("Dlouhá 5"))
+        self.assertIn("Dlouhá", street)
+        self.assertEqual(
+            json.loads(json.dumps({"street": street}, cls=DjangoJSONEncoder)),
+            {"street": "Dlouhá 5"},
+        )
+
+
+class RotateEncryptionKeyTest(TestCase):
+    """rotate_encryption_key — přešifrování Client + HistoricalClient, checkpoint."""
+
+    NEW_KEY = "novy-klic-pro-rotaci"
+
+    def setUp(self):
+        self.old_key = settings.FIELD_ENCRYPTION_KEY
+        self.clients = [
+            Client.objects.create(
+                name=f"Zákazník {i}", zip_code="10000", street=f"Dlouhá {i}", phone="777123456"
+            )
+            for i in range(3)
+        ]
+        self.checkpoint = Path(tempfile.mkdtemp()) / "rotate.json"
+
+    def _raw(self, model, pk):
+        return (
+            model.objects.filter(pk=pk)
+            .annotate(raw=Cast("street", output_field=models.TextField()))
+            .values_list("raw", flat=True)
+            .get()
+        )
+
+    def _rotate(self):
+        with override_settings(
+            FIELD_ENCRYPTION_KEY=self.NEW_KEY,
+            FIELD_ENCRYPTION_OLD_KEYS=[self.old_key],
+            BLIND_INDEX_KEY=self.old_key,
+        ):
+            call_command(
+                "rotate_encryption_key", batch_size=2, checkpoint=self.checkpoint, stdout=StringIO()
+            )
+
+    def test_rotation_reencrypts_all_rows(self):
+        self._rotate()
+        new_fernet = Fernet(_derive_fernet_key(self.NEW_KEY))
+        history_pk = Client.history.model.objects.latest("history_id").pk
+        tokens = (self._raw(Client, self.clients[0].pk), self._raw(Client.history.model, history_pk))
+        for value in tokens:
+            prefix, kid, token = value.split(":", 2)
+            self.assertEqual((prefix, kid), ("enc1", key_id(_derive_fernet_key(self.NEW_KEY))))
+            self.assertEqual(new_fernet.decrypt(token.encode()).decode()[:6], "Dlouhá")
+        self.assertFalse(self.checkpoint.exists())
+
+        # --- starý klíč už není potřeba, blind indexy platí dál
+        with override_settings(FIELD_ENCRYPTION_KEY=self.NEW_KEY, BLIND_INDEX_KEY=self.old_key):
+            client = Client.objects.get(pk=self.clients[1].pk)
+            self.assertEqual(client.street, "Dlouhá 1")
+            self.assertEqual(Client.objects.filter(Client.phone_match("777123456")).count(), 3)
+
+    def test_resume_from_checkpoint(self):
+        first = self.clients[0]
+        before = self._raw(Client, first.pk)
+        self.checkpoint.write_text(json.dumps({"app_sprava_montazi.Client": first.pk}))
+        self._rotate()
+        self.assertEqual(self._raw(Client, first.pk), before)
+        self.assertNotEqual(self._raw(Client, self.clients[1].pk), before)
+
+    def test_requires_stable_blind_index_key(self):
+        with override_settings(
+            FIELD_ENCRYPTION_KEY=self.NEW_KEY, FIELD_ENCRYPTION_OLD_KEYS=[self.old_key]
+        ):
+            with self.assertRaises(CommandError):
+                call_command("rotate_encryption_key", checkpoint=self.checkpoint, stdout=StringIO())
+
+
+class CiphertextEnvelopeTest(TestCase):
+    """Obálka "enc1:<key id>:<token>" a převod holých tokenů."""
+
+    def setUp(self):
+        self.client_obj = Client.objects.create(
+            name="Pavel Dvořák", zip_code="10000", street="Dlouhá 5", phone="777123456"
+        )
+
+    def _raw_street(self):
+        return (
+            Client.objects.annotate(raw=Cast("street", output_field=models.TextField()))
+            .values_list("raw", flat=True)
+            .get()
+        )
+
+    def test_stored_value_has_envelope(self):
+        value = self._raw_street()
+        self.assertTrue(value.startswith("enc1:"))
+        self.assertTrue(is_sealed(value))
+        self.assertTrue(has_valid_envelope(value))
+        self.assertFalse(is_sealed(value.split(":", 2)[2]))
+        self.assertTrue(is_sealed(encrypt_str("x")))
+        # --- stabilní helper migrace 0005 pozná i holý token
+        self.assertTrue(is_encrypted(value.split(":", 2)[2]))
+
+    def test_token_like_plaintext_is_encrypted(self):
+        """Plaintext připomínající token se dřív uložil nešifrovaný."""
+        lookalike = "gAAAAA" + "B" * 90
+        self.assertTrue(looks_like_fernet_token(lookalike))
+        self.client_obj.street = lookalike
+        self.client_obj.save()
+        self.assertNotEqual(self._raw_street(), lookalike)
+        self.assertEqual(Client.objects.get().street, lookalike)
+
+    def test_envelope_like_plaintext_is_encrypted(self):
+        """Vstup s prefixem obálky se bez platného tokenu šifruje."""
+        _, kid, token = encrypt_str("x").split(":", 2)
+        forgeries = [
+            "enc1:x:y",  # --- neznámý key id
+            f"enc1:{kid}:gAAAAA{'B' * 90}",  # --- známý key id, neplatný podpis
+            f"enc1:deadbeef:{token}",  # --- platný token pod cizím key id
+        ]
+        for forged in forgeries:
+            self.assertFalse(has_valid_envelope(forged))
+            self.client_obj.street = forged
+            self.client_obj.save()
+            self.assertNotEqual(self._raw_street(), forged)
+            self.assertEqual(Client.objects.get().street, forged)
+
+    def test_seal_legacy_tokens(self):
+        legacy = get_primary_fernet().encrypt("Stará 1".encode()).decode()
+        Client.objects.update(street=StoredCiphertext(legacy))
+        self.assertEqual(self._raw_street(), legacy)
+        self.assertEqual(Client.objects.get().street, "Stará 1")
+
+        checkpoint = Path(tempfile.mkdtemp()) / "seal.json"
+        call_command("seal_encrypted_values", checkpoint=checkpoint, stdout=StringIO())
+        sealed = self._raw_street()
+        self.assertTrue(sealed.startswith("enc1:"))
+        self.assertTrue(sealed.endswith(legacy))  # --- token beze změny, jen obálka
+        self.assertEqual(Client.objects.get().street, "Stará 1")
+
+
+class ClientUpsertTest(TestCase):
+    """Client.upsert — INSERT ... ON CONFLICT (name, zip_code) DO NOTHING."""
+
+    def test_unique_name_zip(self):
+        Client.objects.create(name="Novák Jan", zip_code="10000")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Client.objects.bulk_create([Client(name="Novák Jan", zip_code="10000", slug="x")])
+
+    def test_inserts_missing_and_keeps_existing(self):
+        existing = Client.objects.create(
+            name="Novák Jan", zip_code="10000", phone="777123456", city="Praha"
+        )
+        clients, created = Client.upsert(
+            [
+                Client(name="Novák Jan", zip_code="10000", phone="601000000"),
+                Client(name=" Dvořák Petr ", zip_code="11000", street="Náměstí Míru 12"),
+                Client(name="Dvořák Petr", zip_code="11000", street="jiná — první vyhrává"),
+            ]
+        )
+        self.assertEqual(created, {("Dvořák Petr", "11000")})
+        self.assertEqual(clients[("Novák Jan", "10000")].pk, existing.pk)
+        # --- existující zůstává beze změny
+        self.assertEqual(Client.objects.get(pk=existing.pk).phone, "+420777123456")
+
+        new = Client.objects.get(name="Dvořák Petr")
+        self.assertEqual(clients[("Dvořák Petr", "11000")].pk, new.pk)
+        self.assertEqual(new.street, "Náměstí Míru 12")
+        self.assertTrue(new.slug)
+        self.assertTrue(new.incomplete)
+        self.assertTrue(Client.objects.filter(Client.street_match("miru 12")).exists())
+        self.assertEqual(Client.history.filter(id=new.pk, history_type="+").count(), 1)
+
+    def test_client_created_updates_existing(self):
+        existing = Client.objects.create(name="Novák Jan", zip_code="10000")
+        client, created = client_created("Novák Jan", "10000", {"city": "Brno", "phone": ""})
+        self.assertFalse(created)
+        self.assertEqual(client.pk, existing.pk)
+        self.assertEqual(Client.objects.get(pk=existing.pk).city, "Brno")
+        client, created = client_created("Nový Zákazník", "12000", {"city": "Plzeň"})
+        self.assertTrue(created)
+        self.assertEqual(client.city, "Plzeň")
+
+
+class MergeDuplicateClientsMigrationTest(TransactionTestCase):
+    """0013 — sloučení duplicit (name, zip_code) nepřijde o kontaktní údaje."""
+
+    app = "app_sprava_montazi"
+
+    def migrate(self, target: str | None = None):
+        """Migrace app na `target`; None = poslední migrace."""
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+
+        executor = MigrationExecutor(connection)
+        targets = (
+            [(self.app, target)] if target else executor.loader.graph.leaf_nodes(self.app)
+        )
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate()
+
+    def test_merge_fills_empty_contact_fields(self):
+        apps = self.migrate("0012_upload_import_job")
+        OldClient = apps.get_model(self.app, "Client")
+        OldToken = apps.get_model(self.app, "ClientStreetToken")
+        OldDistribHub = apps.get_model(self.app, "DistribHub")
+        OldOrder = apps.get_model(self.app, "Order")
+        same = {"name": "Jan Novák", "zip_code": "10000"}
+        keep = OldClient.objects.create(**same, slug="a", email="jan@example.com")
+        first = OldClient.objects.create(
+            **same,
+            slug="b",
+            phone="+420777111222",
+            phone_bidx="p1",
+            street="Dlouhá 1",
+            street_bidx="s1",
+            city="Praha",
+        )
+        second = OldClient.objects.create(
+            **same, slug="c", phone="+420777333444", phone_bidx="p2"
+        )
+        OldToken.objects.create(client=first, digest="t1")
+        hub = OldDistribHub.objects.create(code="626", city="Chrastany", slug="626")
+        order = OldOrder.objects.create(
+            order_number="600000-O",
+            distrib_hub=hub,
+            mandant="SCCZ",
+            client=second,
+            evidence_termin=date(2025, 1, 1),
+        )
+
+        with self.assertLogs("gdpr_audit") as logs:
+            self.migrate("0013_client_name_zip_unique")
+        self.assertIn(f"[{first.pk}, {second.pk}] slouceni do {keep.pk}", logs.output[0])
+
+        merged = Client.objects.get()
+        self.assertEqual(merged.pk, keep.pk)
+        self.assertEqual(merged.email, "jan@example.com")
+        self.assertEqual(merged.phone, "+420777111222")  # --- první duplicita
+        self.assertEqual((merged.phone_bidx, merged.street_bidx), ("p1", "s1"))
+        self.assertEqual((merged.street, merged.city), ("Dlouhá 1", "Praha"))
+        self.assertFalse(merged.incomplete)
+        self.assertEqual(list(merged.street_tokens.values_list("digest", flat=True)), ["t1"])
+        self.assertEqual(Order.objects.get(pk=order.pk).client_id, keep.pk)
+
+
+class ClientUpsertConcurrencyTest(TransactionTestCase):
+    """Souběžní zapisovatelé stejných zákazníků — žádné duplicity."""
+
+    WRITERS = 6
+    KEYS = [(f"Zákazník {i}", f"{10000 + i}") for i in range(40)]
+
+    def test_parallel_writers(self):
+        barrier = threading.Barrier(self.WRITERS)
+        results, errors = [], []
+
+        def writer(offset: int) -> None:
+            try:
+                barrier.wait()
+                # --- každý zapisovatel v jiném pořadí, ať se konflikty prolínají
+                keys = self.KEYS[offset:] + self.KEYS[:offset]
+                for start in range(0, len(keys), 5):
+                    batch = [
+                        Client(name=name, zip_code=zip_code)
+                        for name, zip_code in keys[start : start + 5]
+                    ]
+                    for attempt in range(50):
+                        try:
+                            clients, created = Client.upsert(batch)
+                            break
+                        except OperationalError:
+                            # --- SQLite shared-cache: tabulka zamčená jiným zapisovatelem
+                            time.sleep(0.01 * (attempt + 1))
+                    else:
+                        raise AssertionError("upsert se nepodařil")
+                    results.append((clients, created))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer, args=(i * 7,)) for i in range(self.WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Client.objects.count(), len(self.KEYS))
+        # --- každý klíč založil právě jeden zapisovatel, ostatní dostali stejné pk
+        self.assertEqual(sum(len(created) for _, created in results), len(self.KEYS))
+        pks = {}
+        for clients, _ in results:
+            for key, client in clients.items():
+                self.assertEqual(pks.setdefault(key, client.pk), client.pk)
+        self.assertEqual(Client.history.filter(history_type="+").count(), len(self.KEYS))
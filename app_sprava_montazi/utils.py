@@ -98,29 +98,33 @@ def client_cons_log_zakazka_nenalezena(order_number) -> None:
 
 
 def client_created(name: str, zip_code: str, data) -> tuple[Client, bool]:
+    """Zákazník podle (name, zip_code) — upsert bez závodu souběžných zápisů.
+
+    Nový se založí s údaji z `data`, existujícímu se doplní / přepíšou
+    neprázdné údaje.
+    """
+    fields = ["street", "city", "phone", "email"]
+    candidate = Client(
+        name=name, zip_code=zip_code, **{field: data.get(field, "") for field in fields}
+    )
+    clients, created = Client.upsert([candidate])
+    key = Client.identity(name, zip_code)
+    if key in created:
+        return clients[key], True
+
     with transaction.atomic():
-        client, created = Client.objects.get_or_create(
-            name=name,
-            zip_code=zip_code,
-            defaults={
-                "street": data.get("street", ""),
-                "city": data.get("city", ""),
-                "phone": data.get("phone", ""),
-                "email": data.get("email", ""),
-            },
-        )
+        client = Client.objects.select_for_update().get(pk=clients[key].pk)
         # Pokud už existuje, ale má staré/neúplné údaje → aktualizuj
-        if not created:
-            updated = False
-            for field in ["street", "city", "phone", "email"]:
-                value = data.get(field, "")
-                if value and getattr(client, field) != value:
-                    setattr(client, field, value)
-                    updated = True
-            if updated:
-                client.save()
-
-    return client, created
+        updated = False
+        for field in fields:
+            value = data.get(field, "")
+            if value and getattr(client, field) != value:
+                setattr(client, field, value)
+                updated = True
+        if updated:
+            client.save()
+
+    return client, False
 
 
 def update_customers(updates: list) -> None:
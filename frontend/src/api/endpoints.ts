@@ -18,6 +18,8 @@ import type {
   FinanceCostItem,
   HistoryRecord,
   CallLog,
+  ImportJob,
+  MailOutbox,
   User,
 } from "../types";
 
@@ -78,7 +80,9 @@ export const ordersApi = {
   downloadMontageZip: (id: number) =>
     api.get(`/orders/${id}/download-montage-zip/`, { responseType: "blob" }),
 
-  sendMail: (id: number) => api.post(`/orders/${id}/send-mail/`),
+  sendMail: (id: number) => api.post<MailOutbox>(`/orders/${id}/send-mail/`),
+
+  outbox: (outboxId: number) => api.get<MailOutbox>(`/outbox/${outboxId}/`),
 
   history: (id: number) => api.get<HistoryRecord[]>(`/orders/${id}/history/`),
 
@@ -199,10 +203,12 @@ export const callLogsApi = {
 // ── CSV Import ──
 export const importApi = {
   upload: (formData: FormData) =>
-    api.post("/import/", formData, {
+    api.post<ImportJob>("/import/", formData, {
       headers: { "Content-Type": "multipart/form-data" },
     }),
 
+  job: (id: number) => api.get<ImportJob>(`/import/${id}/`),
+
   botTokenInfo: () => api.get("/bot-token-info/"),
 };
 
@@ -1,7 +1,8 @@
 /**
- * Import CSV — upload souboru na server.
+ * Import CSV — upload souboru na server, import běží na pozadí
+ * (server vrátí job, stav se polluje přes /import/<id>/).
  */
-import { useState, useCallback, type ChangeEvent, type FormEvent } from "react";
+import { useState, useCallback, useEffect, type ChangeEvent, type FormEvent } from "react";
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { importApi } from "../../api";
 import { Upload, CheckCircle, AlertTriangle, FileText, Bot } from "lucide-react";
@@ -23,11 +24,29 @@ export default function ImportPage() {
       fd.append("file", f);
       return importApi.upload(fd);
     },
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ["orders"] });
-      queryClient.invalidateQueries({ queryKey: ["dashboard"] });
+  });
+
+  const jobId = mutation.data?.data?.id;
+  const { data: job } = useQuery({
+    queryKey: ["import-job", jobId],
+    queryFn: () => importApi.job(jobId!),
+    select: (res) => res.data,
+    enabled: jobId !== undefined,
+    refetchInterval: (query) => {
+      const status = query.state.data?.data?.status;
+      return status === "Done" || status === "Failed" ? false : 1_000;
     },
   });
+  const running =
+    mutation.isPending ||
+    (job !== undefined && (job.status === "Pending" || job.status === "Running"));
+
+  useEffect(() => {
+    if (job?.status === "Done") {
+      queryClient.invalidateQueries({ queryKey: ["orders"] });
+      queryClient.invalidateQueries({ queryKey: ["dashboard"] });
+    }
+  }, [job?.status, queryClient]);
 
   const handleFile = useCallback((f: File | null) => {
     if (f && !f.name.endsWith(".csv")) {
@@ -104,27 +123,52 @@ export default function ImportPage() {
         <button
           type="submit"
           className="btn btn--primary btn--lg"
-          disabled={!file || mutation.isPending}
+          disabled={!file || running}
         >
-          {mutation.isPending ? "Nahrávám..." : "Importovat"}
+          {mutation.isPending ? "Nahrávám..." : running ? "Importuji..." : "Importovat"}
         </button>
       </form>
 
       {/* Výsledek */}
-      {mutation.isSuccess && (
+      {job && running && (
+        <div className="alert alert--info">
+          <Upload size={20} />
+          <div>
+            <strong>Import probíhá…</strong>
+            <p>
+              Zpracováno řádků: {job.rows_done}
+              {job.rows_total !== null && ` z ${job.rows_total}`}
+              {job.progress !== null && ` (${job.progress} %)`}
+            </p>
+          </div>
+        </div>
+      )}
+
+      {job?.status === "Done" && (
         <div className="alert alert--success">
           <CheckCircle size={20} />
           <div>
             <strong>Import úspěšný!</strong>
             <p>
-              Vytvořeno: {mutation.data?.data?.created ?? "?"}, Aktualizováno:{" "}
-              {mutation.data?.data?.updated ?? "?"}, Přeskočeno:{" "}
-              {mutation.data?.data?.skipped ?? "?"}
+              Zakázek pro montáž: {job.counters.by_assembly_crew_count ?? 0}, Nerozhodnuto:{" "}
+              {job.counters.by_customer_count ?? 0}, Nových klientů:{" "}
+              {job.counters.client_count ?? 0}, Duplicit přeskočeno:{" "}
+              {job.counters.duplicit_count ?? 0}
             </p>
           </div>
         </div>
       )}
 
+      {job?.status === "Failed" && (
+        <div className="alert alert--danger">
+          <AlertTriangle size={20} />
+          <div>
+            <strong>Chyba importu</strong>
+            <p>{job.error || "Import se nepodařil."}</p>
+          </div>
+        </div>
+      )}
+
       {mutation.isError && (
         <div className="alert alert--danger">
           <AlertTriangle size={20} />
@@ -8,6 +8,7 @@ import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { ordersApi } from "../../api";
 import type { OrderStatus } from "../../types";
 import { useToast } from "../../components/Toast";
+import { useMailOutbox } from "./useMailOutbox";
 import {
   ArrowLeft,
   FileText,
@@ -86,11 +87,7 @@ export default function OrderDetailPage() {
     onError: () => addToast("error", "Chyba při generování PDF."),
   });
 
-  const sendMailMutation = useMutation({
-    mutationFn: () => ordersApi.sendMail(orderId),
-    onSuccess: () => { invalidateOrder(); addToast("success", "Email odeslán."); },
-    onError: () => addToast("error", "Chyba při odesílání emailu."),
-  });
+  const { sendMail: sendMailMutation, outbox, pending: mailPending } = useMailOutbox(orderId);
 
   const handleDownloadPdf = async () => {
     try {
@@ -399,11 +396,22 @@ export default function OrderDetailPage() {
           {order.team_detail && (
             <button className="btn btn--success"
               onClick={() => sendMailMutation.mutate()}
-              disabled={sendMailMutation.isPending || !canSendMail}>
-              <Mail size={16} /> Poslat email
+              disabled={sendMailMutation.isPending || mailPending || !canSendMail}>
+              <Mail size={16} /> {mailPending ? "Odesílám email..." : "Poslat email"}
             </button>
           )}
         </div>
+        {outbox && mailPending && (
+          <p className="text-muted" style={{ marginTop: "0.5rem" }}>
+            Email čeká na odeslání
+            {outbox.attempts > 0 && ` — pokus ${outbox.attempts} selhal (${outbox.last_error})`}…
+          </p>
+        )}
+        {outbox?.status === "Failed" && (
+          <p className="text-danger" style={{ marginTop: "0.5rem" }}>
+            Email se nepodařilo odeslat: {outbox.last_error || "odeslání selhalo"}
+          </p>
+        )}
         {order.mail_datum_sended && (
           <p className="text-muted" style={{ marginTop: "0.5rem" }}>
             Email odeslán: {new Date(order.mail_datum_sended).toLocaleString("cs-CZ")}{" "}
@@ -6,6 +6,7 @@ import { useParams, useNavigate, Link } from "react-router-dom";
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { ordersApi } from "../../api";
 import { useToast } from "../../components/Toast";
+import { useMailOutbox } from "./useMailOutbox";
 import {
   ArrowLeft,
   FileText,
@@ -47,11 +48,7 @@ export default function ProtocolPage() {
     onError: () => addToast("error", "Chyba při generování PDF."),
   });
 
-  const sendMail = useMutation({
-    mutationFn: () => ordersApi.sendMail(orderId),
-    onSuccess: () => { invalidate(); addToast("success", "Email s protokolem odeslán."); },
-    onError: () => addToast("error", "Chyba při odesílání emailu."),
-  });
+  const { sendMail, outbox, pending: mailPending } = useMailOutbox(orderId);
 
   const uploadBackProtocol = useMutation({
     mutationFn: (file: File) => {
@@ -172,12 +169,38 @@ export default function ProtocolPage() {
             </button>
           )}
           <button className="btn btn--success" onClick={() => sendMail.mutate()}
-            disabled={sendMail.isPending || !canSendMail}>
-            <Mail size={16} /> Odeslat email
+            disabled={sendMail.isPending || mailPending || !canSendMail}>
+            <Mail size={16} /> {mailPending ? "Odesílám email..." : "Odeslat email"}
           </button>
         </div>
       </div>
 
+      {/* Stav emailu ve frontě */}
+      {outbox && mailPending && (
+        <div className="alert alert--info">
+          <Mail size={20} />
+          <div>
+            <strong>Email čeká na odeslání…</strong>
+            {outbox.attempts > 0 && (
+              <p>
+                Pokus {outbox.attempts} selhal ({outbox.last_error}), další v{" "}
+                {new Date(outbox.next_attempt).toLocaleTimeString("cs-CZ")}.
+              </p>
+            )}
+          </div>
+        </div>
+      )}
+
+      {outbox?.status === "Failed" && (
+        <div className="alert alert--danger">
+          <AlertTriangle size={20} />
+          <div>
+            <strong>Email se nepodařilo odeslat</strong>
+            <p>{outbox.last_error || "Odeslání selhalo."}</p>
+          </div>
+        </div>
+      )}
+
       {/* Email info */}
       {order.mail_datum_sended && (
         <div className="detail-card">
@@ -0,0 +1,45 @@
+/**
+ * Odeslání emailu s protokolem — server email jen zařadí do fronty
+ * (202 + outbox job), stav se polluje přes /outbox/<id>/ jako u importu.
+ */
+import { useEffect } from "react";
+import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import { ordersApi } from "../../api";
+import { useToast } from "../../components/Toast";
+
+export function useMailOutbox(orderId: number) {
+  const queryClient = useQueryClient();
+  const { addToast } = useToast();
+
+  const sendMail = useMutation({
+    mutationFn: () => ordersApi.sendMail(orderId),
+    onSuccess: () => addToast("success", "Email zařazen k odeslání."),
+    onError: () => addToast("error", "Chyba při odesílání emailu."),
+  });
+
+  const outboxId = sendMail.data?.data?.id;
+  const { data: outbox } = useQuery({
+    queryKey: ["mail-outbox", outboxId],
+    queryFn: () => ordersApi.outbox(outboxId!),
+    select: (res) => res.data,
+    enabled: outboxId !== undefined,
+    refetchInterval: (query) => {
+      const status = query.state.data?.data?.status;
+      return status === "Sent" || status === "Failed" ? false : 2_000;
+    },
+  });
+  const pending =
+    outbox !== undefined && (outbox.status === "Pending" || outbox.status === "Sending");
+
+  useEffect(() => {
+    if (outbox?.status === "Sent") {
+      queryClient.invalidateQueries({ queryKey: ["order", orderId] });
+      addToast("success", `Email odeslán (${outbox.recipient}).`);
+    } else if (outbox?.status === "Failed") {
+      addToast("error", "Email se nepodařilo odeslat.");
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [outbox?.status]);
+
+  return { sendMail, outbox, pending };
+}
@@ -254,6 +254,42 @@ export interface CallLog {
   was_successful: string;
 }
 
+// ── CSV Import ──
+export type ImportStatus = "Pending" | "Running" | "Done" | "Failed";
+
+export interface ImportJob {
+  id: number;
+  file: string;
+  created: string;
+  status: ImportStatus;
+  rows_done: number;
+  rows_total: number | null;
+  progress: number | null;
+  counters: Partial<{
+    by_assembly_crew_count: number;
+    by_customer_count: number;
+    client_count: number;
+    duplicit_count: number;
+  }>;
+  error: string;
+  updated: string | null;
+}
+
+// ── Fronta emailů ──
+export type MailStatus = "Pending" | "Sending" | "Sent" | "Failed";
+
+export interface MailOutbox {
+  id: number;
+  order: number;
+  created: string;
+  status: MailStatus;
+  attempts: number;
+  next_attempt: string;
+  last_error: string;
+  recipient: string;
+  sent: string | null;
+}
+
 // ── Order write ──
 export interface OrderWrite {
   order_number: string;
@@ -0,0 +1,25 @@
+"""
+Decrypt Cache Middleware.
+
+Při FIELD_DECRYPT_CACHE_SCOPE = "request" (výchozí) dostane každý request vlastní
+cache dešifrovaných hodnot (viz app_sprava_montazi.encryption), která
+se po odpovědi zahodí — plaintexty nezůstávají v paměti procesu.
+Jinak middleware nic nedělá.
+"""
+
+from django.conf import settings
+
+from app_sprava_montazi.encryption import decrypt_scope
+
+
+class DecryptCacheMiddleware:
+    """Request-scoped cache dešifrování osobních údajů."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if getattr(settings, "FIELD_DECRYPT_CACHE_SCOPE", "request") != "request":
+            return self.get_response(request)
+        with decrypt_scope():
+            return self.get_response(request)
@@ -0,0 +1,117 @@
+"""
+Benchmark dešifrování Client (EncryptedTextField) — cena na 10k zákazníků.
+
+Vytvoří testovací databázi (produkční DB se nedotkne), naseeduje
+zákazníky a změří načtení všech zákazníků:
+ - bez cache (FIELD_DECRYPT_CACHE_SCOPE="off") — stav před cache
+ - procesní LRU cache, studená a zahřátá
+ - iter_decrypted() — dávkové dešifrování
+
+  python scripts/benchmark_decrypt.py --clients 20000 --repeat 3
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from app_sprava_montazi import encryption  # noqa: E402
+from app_sprava_montazi.models import Client  # noqa: E402
+
+cons: Console = Console()
+
+
+def seed(count: int, batch: int = 5000) -> None:
+    for offset in range(0, count, batch):
+        Client.objects.bulk_create(
+            Client(
+                name=f"Zákazník {i}",
+                zip_code="10000",
+                street=f"Dlouhá {i}",
+                phone=f"+420777{i:06d}",
+                email=f"zakaznik{i}@example.com",
+                slug=f"zakaznik-{i}",
+            )
+            for i in range(offset, min(offset + batch, count))
+        )
+    cons.log(f"naseedováno {count} zákazníků", style="blue")
+
+
+def use_cache(scope: str) -> None:
+    settings.FIELD_DECRYPT_CACHE_SCOPE = scope
+    settings.FIELD_DECRYPT_CACHE_SIZE = 10**7  # --- ať se vejdou všichni
+    encryption._process_cache = None
+
+
+def timed(run, repeat: int, reset=None) -> float:
+    timings = []
+    for _ in range(repeat):
+        if reset:
+            reset()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.clients)
+        load = lambda: list(Client.objects.all())  # noqa: E731
+        batched = lambda: list(encryption.iter_decrypted(Client.objects.all()))  # noqa: E731
+        plain = lambda: list(Client.objects.only("pk", "name"))  # noqa: E731
+
+        results = {"bez dešifrování (only name)": timed(plain, args.repeat)}
+        use_cache("off")
+        results["bez cache (před)"] = timed(load, args.repeat)
+        results["iter_decrypted bez cache"] = timed(batched, args.repeat)
+        use_cache("process")
+        results["LRU cache — studená"] = timed(load, args.repeat, lambda: use_cache("process"))
+        load()
+        results["LRU cache — zahřátá"] = timed(load, args.repeat)
+        stats = encryption.decrypt_cache_stats()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    per_10k = 10_000 / args.clients
+    baseline = results["bez cache (před)"]
+    table = Table(title=f"Dešifrování Client — {args.clients} zákazníků ({connection.vendor})")
+    table.add_column("varianta")
+    table.add_column("celkem [ms]", justify="right")
+    table.add_column("na 10k [ms]", justify="right")
+    table.add_column("vs. před", justify="right")
+    for name, seconds in results.items():
+        table.add_row(
+            name,
+            f"{seconds * 1000:.1f}",
+            f"{seconds * 1000 * per_10k:.1f}",
+            f"{baseline / seconds:.1f}×",
+        )
+    cons.print(table)
+    cons.print(f"cache: {stats}")
+
+
+if __name__ == "__main__":
+    main()
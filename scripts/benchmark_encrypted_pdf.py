@@ -0,0 +1,130 @@
+"""
+Benchmark zašifrované přílohy emailu s protokolem (send-mail).
+
+Porovná dvě cesty k zašifrovanému PDF:
+ - pypdf + soubor: původní postup — PdfReader z MEDIA_ROOT, kopie stránek,
+   zápis *_encrypted.pdf, zpětné čtení a smazání
+ - pypdf v paměti: Utility.encrypt_pdf nad uloženými bajty
+Zakázka se vytvoří v testovací databázi, produkční DB se nedotkne.
+
+  python scripts/benchmark_encrypted_pdf.py --count 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from pypdf import PdfReader, PdfWriter  # noqa: E402
+
+from app_sprava_montazi.models import Article, Client, DistribHub, Order, Team  # noqa: E402
+from app_sprava_montazi.OOP_emails import Utility  # noqa: E402
+from app_sprava_montazi.OOP_protokols import PdfResources  # noqa: E402
+from app_sprava_montazi.protocol_batch import generate_protocols  # noqa: E402
+
+cons: Console = Console()
+PASSWORD = "Heslo123abcd"
+
+
+def seed() -> Order:
+    hub = DistribHub.objects.create(code="626", city="Chrastany")
+    team = Team.objects.create(name="Montáže Novák", city="Praha", phone="777123456")
+    client = Client.objects.create(name="Jan Novák", city="Plzeň", zip_code="30100")
+    order = Order.objects.create(
+        order_number="700123-O",
+        distrib_hub=hub,
+        mandant="SCCZ",
+        client=client,
+        team=team,
+        evidence_termin=date.today(),
+        montage_termin=timezone.now(),
+    )
+    Article.objects.bulk_create(
+        [Article(order=order, name=f"Artikl {i}", quantity=1) for i in range(6)]
+    )
+    generate_protocols(Order.objects.filter(pk=order.pk), workers=1)
+    return Order.objects.select_related("client", "team", "pdf").get(pk=order.pk)
+
+
+def pypdf_file(order: Order) -> bytes:
+    """Původní Utility.encrypt_pdf + čtení a mazání dočasného souboru"""
+    input_path = Path(order.pdf.file.path)
+    reader = PdfReader(input_path)
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    writer.encrypt(PASSWORD)
+    encrypted_path = input_path.with_name(f"{input_path.stem}_encrypted{input_path.suffix}")
+    with open(encrypted_path, "wb") as f:
+        writer.write(f)
+    with open(encrypted_path, "rb") as f:
+        pdf = f.read()
+    os.remove(encrypted_path)
+    return pdf
+
+
+def pypdf_memory(order: Order) -> bytes:
+    with order.pdf.file.open("rb") as f:
+        return Utility.encrypt_pdf(f.read(), PASSWORD)
+
+
+MODES = {
+    "pypdf + soubor": pypdf_file,
+    "pypdf v paměti": pypdf_memory,
+}
+
+
+def measure(func, order: Order, count: int) -> tuple[float, int]:
+    size = len(func(order))  # --- zahřátí
+    started = time.perf_counter()
+    for _ in range(count):
+        func(order)
+    return (time.perf_counter() - started) * 1000 / count, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100, help="počet opakování")
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix="ams_bench_")
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        PdfResources.preload()
+        order = seed()
+        results = {mode: measure(func, order, args.count) for mode, func in MODES.items()}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    table = Table(title=f"Zašifrovaná příloha — {args.count}× na režim")
+    table.add_column("režim")
+    table.add_column("ms/příloha", justify="right")
+    table.add_column("zrychlení", justify="right")
+    table.add_column("velikost (B)", justify="right")
+    base, _ = results["pypdf + soubor"]
+    for mode, (ms, size) in results.items():
+        table.add_row(mode, f"{ms:.1f}", f"{base / ms:.1f}×", f"{size}")
+    cons.print(table)
+
+
+if __name__ == "__main__":
+    main()
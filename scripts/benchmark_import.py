@@ -0,0 +1,139 @@
+"""
+Benchmark importu CSV (manage.py import_data) — 100k řádků.
+
+Vygeneruje CSV fixture ve formátu exportu mandanta (cp1250, `;`), na
+testovací databázi (produkční DB se nedotkne) ho naimportuje současným
+set-based enginem (BulkRecords) a pro srovnání změří i původní zápis
+po řádcích (CreateRecords: get hub + get_or_create client + get_or_create
+order) na vzorku, extrapolovaný na celý soubor.
+
+  python scripts/benchmark_import.py --rows 100000 --legacy-rows 2000
+  python scripts/benchmark_import.py --fixture-only --out files/import_100k.csv
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from app_sprava_montazi.management.commands import import_data  # noqa: E402
+from app_sprava_montazi.models import Client, DistribHub, Order  # noqa: E402
+
+cons: Console = Console()
+
+HEADER = (
+    "Místo určení;Číslo zakázky;Mandant;Příjmení;Křestní jméno;PSČ;Montáž;"
+    "Avizovaný termín;Erfassungstermin;Poznámka mandanta"
+)
+HUBS = ("626", "652", "653")
+SURNAMES = ("Novák", "Svoboda", "Novotný", "Dvořák", "Černý", "Procházka", "Kučera", "Veselý")
+FIRST_NAMES = ("Jan", "Petr", "Jiří", "Pavel", "Marie", "Jana", "Eva", "Hana")
+
+
+def write_fixture(path: Path, rows: int, seed: int = 42) -> None:
+    """~2 % duplicitních čísel zakázek, zákazníci se opakují (víc zakázek na zákazníka)."""
+    rnd = random.Random(seed)
+    start = date(2024, 1, 1)
+    with path.open("w", encoding="cp1250") as file:
+        file.write(HEADER + "\n")
+        for i in range(rows):
+            number = rnd.randrange(i) if i and rnd.random() < 0.02 else i
+            montaz = 1 if rnd.random() < 0.8 else 0
+            suffix = "O" if montaz else rnd.choice("OR")
+            evidence = start + timedelta(days=rnd.randrange(365))
+            delivery = evidence + timedelta(days=rnd.randrange(30))
+            file.write(
+                f"{rnd.choice(HUBS)};{700000 + number}-{suffix};SCCZ;"
+                f"{rnd.choice(SURNAMES)};{rnd.choice(FIRST_NAMES)};{10000 + rnd.randrange(rows // 3 or 1):05d};"
+                f"{montaz};{delivery:%d.%m.%Y};{evidence:%d.%m.%Y};poznámka {i}\n"
+            )
+    cons.log(f"fixture: {path} ({rows} řádků)", style="blue")
+
+
+def run_bulk(path: Path) -> tuple[float, dict]:
+    command = import_data.Command()
+    command.stdout.write = lambda *args, **kwargs: None
+    started = time.perf_counter()
+    command.handle(file=str(path))
+    return time.perf_counter() - started, command.counter
+
+
+def run_legacy(path: Path, rows: int) -> float:
+    """Původní engine — řádek po řádku, na prvních `rows` řádcích."""
+    dataset = import_data.DatasetTools.create_dataset(path).head(rows)
+    items = import_data.DatasetTools.dataset_filter(dataset).to_dict(orient="records")
+    command = import_data.Command()
+    started = time.perf_counter()
+    with transaction.atomic():
+        for item in items:
+            hub = DistribHub.objects.get(code=item["misto-urceni"])
+            client = import_data.CreateRecords.create_client(
+                item["prijmeni"], item["krestni-jmeno"], item["psc"]
+            )
+            order = import_data.CreateRecords.create_order(item, hub, client["client"])
+            command.update_counters(client, order)
+        elapsed = time.perf_counter() - started
+        transaction.set_rollback(True)
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--legacy-rows", type=int, default=2000)
+    parser.add_argument("--out", type=Path, default=None, help="kam uložit CSV fixture")
+    parser.add_argument("--fixture-only", action="store_true")
+    args = parser.parse_args()
+
+    path = args.out or Path(tempfile.mkdtemp()) / f"import_{args.rows}.csv"
+    write_fixture(path, args.rows)
+    if args.fixture_only:
+        return
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        DistribHub.objects.bulk_create(
+            DistribHub(code=code, city=code, slug=f"hub-{code}") for code in HUBS
+        )
+        legacy = run_legacy(path, args.legacy_rows)
+        bulk, counter = run_bulk(path)
+        orders, clients = Order.objects.count(), Client.objects.count()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    legacy_total = legacy * args.rows / args.legacy_rows
+    table = Table(title=f"import_data — {args.rows} řádků ({connection.vendor})")
+    table.add_column("engine")
+    table.add_column("čas [s]", justify="right")
+    table.add_column("řádků/s", justify="right")
+    table.add_row(
+        f"po řádcích (extrapolace z {args.legacy_rows})",
+        f"{legacy_total:.1f}",
+        f"{args.legacy_rows / legacy:.0f}",
+    )
+    table.add_row("BulkRecords", f"{bulk:.1f}", f"{args.rows / bulk:.0f}")
+    cons.print(table)
+    cons.print(f"zrychlení {legacy_total / bulk:.0f}× — zakázek {orders}, zákazníků {clients}")
+    cons.print(f"počítadla: {counter}")
+
+
+if __name__ == "__main__":
+    main()
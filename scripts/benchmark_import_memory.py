@@ -0,0 +1,89 @@
+"""
+Benchmark paměti importu CSV — celý soubor vs. streamování po dávkách.
+
+Pro několik velikostí souboru změří tracemalloc špičku `import_data`
+v jednom průchodu (celý DataFrame + list slovníků) a ve streamovaném
+režimu (`--chunk-size`). U streamování má špička zůstat stejná bez
+ohledu na velikost souboru. Běží na testovací databázi.
+
+  python scripts/benchmark_import_memory.py --rows 10000 40000 --chunk-size 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from app_sprava_montazi.management.commands import import_data  # noqa: E402
+from app_sprava_montazi.models import DistribHub  # noqa: E402
+from benchmark_import import HUBS, write_fixture  # noqa: E402
+
+cons: Console = Console()
+
+
+def measure(path: Path, chunk_size: int | None) -> tuple[float, float]:
+    """(čas [s], špička [MB]); zápis se na konci vrátí, ať běhy začínají stejně."""
+    command = import_data.Command()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with transaction.atomic():
+        command.handle(file=str(path), chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        transaction.set_rollback(True)
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 40_000])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    results = []
+    try:
+        DistribHub.objects.bulk_create(
+            DistribHub(code=code, city=code, slug=f"hub-{code}") for code in HUBS
+        )
+        for rows in args.rows:
+            path = tmp / f"import_{rows}.csv"
+            write_fixture(path, rows)
+            results.append((rows, measure(path, None), measure(path, args.chunk_size)))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    table = Table(title=f"import_data — špička paměti (dávka {args.chunk_size})")
+    table.add_column("řádků", justify="right")
+    table.add_column("celý soubor [MB]", justify="right")
+    table.add_column("streamování [MB]", justify="right")
+    table.add_column("celý soubor [s]", justify="right")
+    table.add_column("streamování [s]", justify="right")
+    for rows, (single_s, single_mb), (stream_s, stream_mb) in results:
+        table.add_row(
+            str(rows), f"{single_mb:.1f}", f"{stream_mb:.1f}", f"{single_s:.1f}", f"{stream_s:.1f}"
+        )
+    cons.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark náhledu importu (POST /api/v1/import/preview/) — 100k řádků.
+
+Na testovací databázi s existujícími zakázkami (část čísel z CSV už
+v DB je) změří DatasetTools.create_dataset + preview a pro srovnání
+dřívější kontrolu po řádcích (slugify + create_datetime na řádek,
+dotaz na hub a zakázku na řádek) na vzorku, extrapolovanou.
+
+  python scripts/benchmark_import_preview.py --rows 100000 --existing 50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils.text import slugify  # noqa: E402
+
+from app_sprava_montazi.management.commands.import_data import DatasetTools  # noqa: E402
+from app_sprava_montazi.models import Client, DistribHub, Order  # noqa: E402
+from benchmark_import import HUBS, write_fixture  # noqa: E402
+
+cons: Console = Console()
+
+
+def seed(existing: int, batch: int = 5000) -> None:
+    hubs = DistribHub.objects.bulk_create(
+        DistribHub(code=code, city=code, slug=f"hub-{code}") for code in HUBS
+    )
+    client = Client.objects.create(name="Benchmark", zip_code="10000")
+    for offset in range(0, existing, batch):
+        Order.objects.bulk_create(
+            Order(
+                order_number=f"{700000 + i}-O",
+                distrib_hub=hubs[i % len(hubs)],
+                client=client,
+                mandant="SCCZ",
+                evidence_termin=date(2024, 1, 1),
+            )
+            for i in range(offset, min(offset + batch, existing))
+        )
+
+
+def run_preview(path: Path) -> tuple[float, float, dict]:
+    started = time.perf_counter()
+    dataset = DatasetTools.create_dataset(path)
+    parsed = time.perf_counter()
+    result = DatasetTools.preview(dataset)
+    return parsed - started, time.perf_counter() - parsed, result
+
+
+def run_rowwise(path: Path, rows: int) -> float:
+    """Kontrola po řádcích — to, co dřív šlo zjistit jen během importu."""
+    dataset = DatasetTools.create_dataset(path).head(rows)
+    started = time.perf_counter()
+    items = DatasetTools.dataset_filter(dataset).to_dict(orient="records")
+    for item in items:
+        slugify(item["cislo-zakazky"])
+        DatasetTools.create_datetime(item["erfassungstermin"])
+        DatasetTools.create_datetime(item["avizovany-termin"])
+        DistribHub.objects.filter(code=item["misto-urceni"]).exists()
+        Order.objects.filter(order_number=item["cislo-zakazky"]).exists()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--existing", type=int, default=50_000)
+    parser.add_argument("--rowwise-rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = Path(tempfile.mkdtemp()) / f"import_{args.rows}.csv"
+    write_fixture(path, args.rows)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.existing)
+        runs = [run_preview(path) for _ in range(args.repeat)]
+        rowwise = run_rowwise(path, args.rowwise_rows)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    parse_s, preview_s, result = min(runs, key=lambda run: run[0] + run[1])
+    rowwise_total = rowwise * args.rows / args.rowwise_rows
+    table = Table(title=f"import preview — {args.rows} řádků, {args.existing} zakázek v DB")
+    table.add_column("krok")
+    table.add_column("čas [ms]", justify="right")
+    table.add_row("create_dataset (read_csv + čištění)", f"{parse_s * 1000:.0f}")
+    table.add_row("preview (isin / duplicated / to_datetime)", f"{preview_s * 1000:.0f}")
+    table.add_row("celkem", f"{(parse_s + preview_s) * 1000:.0f}")
+    table.add_row(
+        f"po řádcích (extrapolace z {args.rowwise_rows})", f"{rowwise_total * 1000:.0f}"
+    )
+    cons.print(table)
+    cons.print({key: value for key, value in result.items() if key != "errors"})
+
+
+if __name__ == "__main__":
+    main()
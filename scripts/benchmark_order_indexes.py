@@ -0,0 +1,182 @@
+"""
+Benchmark indexů Order (migrace 0008_order_filter_indexes).
+
+Vytvoří testovací databázi (stejně jako `manage.py test`, produkční DB
+se nedotkne), naseeduje zakázky a pro hot-path dotazy porovná query plán
+(EXPLAIN) a časy bez indexů a s nimi.
+
+  python scripts/benchmark_order_indexes.py --orders 200000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from app_sprava_montazi.models import DistribHub, Order, Status, Team, TeamType  # noqa: E402
+from app_sprava_montazi.OOP_dashboard import Dashboard  # noqa: E402
+from app_sprava_montazi.utils import call_errors_adviced  # noqa: E402
+
+cons: Console = Console()
+
+# --- rozložení stavů zhruba jako v provozu: většina uzavřených
+STATUS_WEIGHTS = {
+    Status.BILLED: 55,
+    Status.REALIZED: 15,
+    Status.CANCELED: 8,
+    Status.HIDDEN: 7,
+    Status.ADVICED: 8,
+    Status.NEW: 7,
+}
+
+
+def seed(count: int, batch: int = 5000) -> None:
+    rnd = random.Random(42)
+    hubs = DistribHub.objects.bulk_create(
+        [DistribHub(code=f"{i:03d}", city=f"Hub {i}", slug=f"hub-{i}") for i in range(8)]
+    )
+    teams = Team.objects.bulk_create(
+        [
+            Team(name=f"Tým {i}", city="Praha", active=i % 7 != 0, slug=f"tym-{i}")
+            for i in range(40)
+        ]
+    )
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    start = date(2019, 1, 1)
+    for offset in range(0, count, batch):
+        orders = []
+        for i in range(offset, min(offset + batch, count)):
+            status = rnd.choices(statuses, weights)[0]
+            team = rnd.choice(teams)
+            sent = status != Status.NEW and rnd.random() < 0.9
+            orders.append(
+                Order(
+                    order_number=f"{700000 + i}-O",
+                    distrib_hub=rnd.choice(hubs),
+                    team=team if rnd.random() < 0.8 else None,
+                    mandant=rnd.choice(["SCCZ", "KIKA", "XXXL"]),
+                    status=status,
+                    team_type=rnd.choice(list(TeamType)),
+                    evidence_termin=start + timedelta(days=rnd.randrange(7 * 365)),
+                    montage_termin=None if rnd.random() < 0.3 else timezone.now(),
+                    mail_datum_sended=timezone.now() if sent else None,
+                    mail_team_sended=team.name if sent else "",
+                )
+            )
+        Order.objects.bulk_create(orders)
+    cons.log(f"naseedováno {count} zakázek", style="blue")
+
+
+def hot_queries() -> dict:
+    """Dotazy z hot paths — každá položka vrací (queryset pro EXPLAIN, funkce pro časování)."""
+    # --- order_by() — COUNT/aggregate neřadí, EXPLAIN má odpovídat měřenému dotazu
+    year_qs = Order.objects.filter(evidence_termin__year=2024).order_by()
+    hub_id = DistribHub.objects.values_list("pk", flat=True).first()
+    open_qs = Order.objects.filter(
+        status__in=[Status.NEW, Status.ADVICED, Status.REALIZED]
+    ).order_by()
+    adviced_assembly = Order.objects.filter(
+        status=Status.ADVICED, team_type=TeamType.BY_ASSEMBLY_CREW
+    ).filter(Q(mail_datum_sended__isnull=True) | Q(team__active=False))
+    adviced_delivery = Order.objects.filter(
+        status=Status.ADVICED, team_type=TeamType.BY_DELIVERY_CREW
+    )
+    no_montage = open_qs.filter(montage_termin__isnull=True)
+    list_page = year_qs.filter(mandant="SCCZ").order_by("-evidence_termin")[:25]
+    hub_month = year_qs.filter(
+        evidence_termin__month=6, mandant="SCCZ", distrib_hub_id=hub_id
+    )
+    adviced_assembly = adviced_assembly.order_by()
+    return {
+        "call_errors_adviced": (adviced_assembly, lambda: call_errors_adviced()),
+        "status_group=open": (open_qs, lambda: open_qs.count()),
+        "adviced_delivery (bot)": (adviced_delivery, lambda: list(adviced_delivery.all())),
+        "no_montage_term": (no_montage, lambda: no_montage.count()),
+        "seznam rok+mandant": (list_page, lambda: list(list_page.all())),
+        "měsíc+mandant+místo": (hub_month, lambda: hub_month.count()),
+        "dashboard aggregate rok": (year_qs, lambda: Dashboard.aggregate(year_qs)),
+    }
+
+
+def measure(repeat: int) -> dict:
+    results = {}
+    for name, (qs, run) in hot_queries().items():
+        run()  # --- zahřátí cache stránek
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        results[name] = (min(timings) * 1000, qs.explain())
+    return results
+
+
+def set_indexes(enabled: bool) -> None:
+    with connection.schema_editor() as editor:
+        for index in Order._meta.indexes:
+            if enabled:
+                editor.add_index(Order, index)
+            else:
+                editor.remove_index(Order, index)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--plans", action="store_true", help="vypsat celé query plány")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.orders)
+        set_indexes(False)
+        before = measure(args.repeat)
+        set_indexes(True)
+        after = measure(args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    table = Table(title=f"Order indexy — {args.orders} zakázek ({connection.vendor})")
+    table.add_column("dotaz")
+    table.add_column("bez indexů [ms]", justify="right")
+    table.add_column("s indexy [ms]", justify="right")
+    table.add_column("zrychlení", justify="right")
+    for name, (slow, _) in before.items():
+        fast = after[name][0]
+        table.add_row(name, f"{slow:.2f}", f"{fast:.2f}", f"{slow / fast:.1f}×")
+    cons.print(table)
+
+    for name in before:
+        if args.plans:
+            cons.rule(name)
+            cons.print("[red]před:[/red]", before[name][1])
+            cons.print("[green]po:[/green]", after[name][1])
+        else:
+            cons.print(f"[bold]{name}[/bold]: {after[name][1].splitlines()[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark líného dešifrování na /api/v1/orders/.
+
+Seznam zakázek zobrazuje jen client.name / client.incomplete, přesto se
+dřív u každého řádku dešifrovala ulice, telefon i e-mail zákazníka.
+Skript na testovací databázi (produkční DB se nedotkne) projde všechny
+stránky seznamu a řádky exportu do Excelu s FIELD_DECRYPT_LAZY = False (dřív)
+a True (teď), bez cache dešifrování, a vypíše čas a počet Fernet
+dešifrování. (Seznam s `only()` ze sparse fieldsets šifrované sloupce
+nenačítá vůbec; export a detail je načítají celé.)
+
+  python scripts/benchmark_order_list_decrypt.py --orders 5000 --page-size 100
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from app_sprava_montazi import encryption  # noqa: E402
+from app_sprava_montazi.models import Client, DistribHub, Order  # noqa: E402
+
+cons: Console = Console()
+
+
+def seed(count: int, batch: int = 2000) -> None:
+    hub = DistribHub.objects.create(code="626", city="Chrastany")
+    start = date(2024, 1, 1)
+    for offset in range(0, count, batch):
+        clients = Client.objects.bulk_create(
+            Client(
+                name=f"Zákazník {i}",
+                zip_code="10000",
+                street=f"Dlouhá {i}",
+                city="Praha",
+                phone=f"+420777{i:06d}",
+                email=f"zakaznik{i}@example.com",
+                incomplete=False,
+                slug=f"zakaznik-{i}",
+            )
+            for i in range(offset, min(offset + batch, count))
+        )
+        Order.objects.bulk_create(
+            Order(
+                order_number=f"{700000 + offset + n}-O",
+                distrib_hub=hub,
+                mandant="SCCZ",
+                client=client,
+                evidence_termin=start + timedelta(days=(offset + n) % 365),
+            )
+            for n, client in enumerate(clients)
+        )
+    cons.log(f"naseedováno {count} zakázek", style="blue")
+
+
+class DecryptCounter:
+    """Počítá skutečná Fernet dešifrování (obal encryption._decrypt)."""
+
+    def __init__(self):
+        self.calls = 0
+        self._original = encryption._decrypt
+
+    def __call__(self, ciphertext):
+        self.calls += 1
+        return self._original(ciphertext)
+
+
+def export_rows(api: APIClient, page_size: int) -> int:
+    """Řádky jako v OrderViewSet.export_excel (bez openpyxl) — celý select_related client."""
+    rows = [
+        (order.order_number, str(order.client), str(order.distrib_hub))
+        for order in Order.objects.select_related("client", "distrib_hub", "team")
+    ]
+    return len(rows)
+
+
+def walk_pages(api: APIClient, page_size: int) -> int:
+    url, params, rows = "/api/v1/orders/", {"page_size": page_size}, 0
+    while url:
+        cache.clear()  # --- UserRateThrottle (120/min) by benchmark zastavil
+        response = api.get(url, params)
+        assert response.status_code == 200, response.status_code
+        rows += len(response.data["results"])
+        url, params = response.data.get("next"), None
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.FIELD_DECRYPT_CACHE_SCOPE = "off"  # --- měří se čisté dešifrování
+    old_name = connection.creation.create_test_db(verbosity=0)
+    results = {}
+    try:
+        seed(args.orders)
+        user = get_user_model().objects.create_superuser("bench", "bench@example.com", "x")
+        api = APIClient()
+        api.force_authenticate(user=user)
+        for endpoint, run in (("seznam", walk_pages), ("export řádky", export_rows)):
+            for mode, lazy in (("eager (dřív)", False), ("lazy (teď)", True)):
+                settings.FIELD_DECRYPT_LAZY = lazy
+                counter = DecryptCounter()
+                encryption._decrypt = counter
+                try:
+                    timings = []
+                    for _ in range(args.repeat):
+                        counter.calls = 0
+                        started = time.perf_counter()
+                        rows = run(api, args.page_size)
+                        timings.append(time.perf_counter() - started)
+                finally:
+                    encryption._decrypt = counter._original
+                results[(endpoint, mode)] = (min(timings), counter.calls, rows)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    table = Table(title=f"/api/v1/orders/ — {args.orders} zakázek, page_size={args.page_size}")
+    table.add_column("endpoint")
+    table.add_column("režim")
+    table.add_column("čas [ms]", justify="right")
+    table.add_column("ms / 1000 řádků", justify="right")
+    table.add_column("dešifrování", justify="right")
+    for (endpoint, mode), (seconds, calls, rows) in results.items():
+        table.add_row(
+            endpoint, mode, f"{seconds * 1000:.0f}", f"{seconds * 1e6 / rows:.1f}", str(calls)
+        )
+    cons.print(table)
+    for endpoint in ("seznam", "export řádky"):
+        eager = results[(endpoint, "eager (dřív)")][0]
+        lazy = results[(endpoint, "lazy (teď)")][0]
+        cons.print(f"{endpoint}: ušetřeno {(1 - lazy / eager) * 100:.0f} % času")
+
+
+if __name__ == "__main__":
+    main()
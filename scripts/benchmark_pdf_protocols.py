@@ -0,0 +1,162 @@
+"""
+Benchmark generování PDF protokolů (protokoly za sekundu).
+
+Porovná SCCZPdfGenerator a DefaultPdfGenerator ve třech režimech:
+ - bez registru: fonty a logo se načítají a kódují pro každý protokol
+ - PdfResources: zdroje načtené jednou za proces, stránka kreslená celá
+ - PageTemplate: navíc statická vrstva předrenderovaná jako form XObject
+Zakázka se vytvoří v testovací databázi, produkční DB se nedotkne.
+
+  python scripts/benchmark_pdf_protocols.py --count 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from reportlab.pdfbase import pdfmetrics  # noqa: E402
+from reportlab.pdfbase.ttfonts import TTFont  # noqa: E402
+
+from app_sprava_montazi.models import Article, Client, DistribHub, Order, Team  # noqa: E402
+from app_sprava_montazi.OOP_protokols import (  # noqa: E402
+    DefaultPdfGenerator,
+    PdfResources,
+    SCCZPdfGenerator,
+)
+
+cons: Console = Console()
+
+
+def seed() -> Order:
+    hub = DistribHub.objects.create(code="626", city="Chrastany")
+    team = Team.objects.create(name="Montáže Novák", city="Praha", phone="777123456")
+    client = Client.objects.create(
+        name="Jan Novák",
+        street="Dlouhá 12",
+        city="Plzeň",
+        zip_code="30100",
+        phone="602123456",
+        email="jan.novak@example.cz",
+    )
+    order = Order.objects.create(
+        order_number="700123-O",
+        distrib_hub=hub,
+        mandant="SCCZ",
+        client=client,
+        team=team,
+        evidence_termin=date.today(),
+        montage_termin=timezone.now(),
+    )
+    Article.objects.bulk_create(
+        [Article(order=order, name=f"Artikl {i}", quantity=1 + i % 3) for i in range(6)]
+    )
+    return Order.objects.select_related("client", "team").get(pk=order.pk)
+
+
+def uncached():
+    """Chování před registrem — TTF a logo pro každý protokol znovu."""
+
+    def register_fonts() -> None:
+        for name, path in PdfResources.FONTS.items():
+            pdfmetrics.registerFont(TTFont(name, str(path)))
+
+    def draw_image(cvs, path, width, height, x, y, profile=None) -> None:
+        cvs.drawImage(image=path, width=width, height=height, x=x, y=y)
+
+    patches = (
+        patch.object(PdfResources, "register_fonts", register_fonts),
+        patch.object(PdfResources, "draw_image", draw_image),
+    )
+    for p in patches:
+        p.start()
+    return patches
+
+
+MODES: dict[str, tuple[bool, bool]] = {
+    # --- režim: (PdfResources, PageTemplate)
+    "bez registru": (False, False),
+    "PdfResources": (True, False),
+    "PageTemplate": (True, True),
+}
+
+
+def generate(generator_class, order: Order, template: bool) -> bytes:
+    # --- stejně jako OrderViewSet.generate_pdf (Default bez self.data)
+    return generator_class(use_template=template).generate_pdf_protocol(model=order)
+
+
+def measure(generator_class, order: Order, count: int, mode: str) -> tuple[float, int]:
+    cached, template = MODES[mode]
+    patches = () if cached else uncached()
+    try:
+        size = len(generate(generator_class, order, template))  # --- zahřátí
+        started = time.perf_counter()
+        for _ in range(count):
+            generate(generator_class, order, template)
+        elapsed = time.perf_counter() - started
+    finally:
+        for p in patches:
+            p.stop()
+    return count / elapsed, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100, help="počet protokolů na měření")
+    args = parser.parse_args()
+
+    settings.DEBUG = False  # --- bez logu každého protokolu
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    results = {}
+    try:
+        order = seed()
+        PdfResources.preload()  # --- šablony PageTemplate (render nesmí běžet pod patchi)
+        for generator_class in (SCCZPdfGenerator, DefaultPdfGenerator):
+            results[generator_class.__name__] = {
+                mode: measure(generator_class, order, args.count, mode) for mode in MODES
+            }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    table = Table(title=f"PDF protokoly — {args.count}× na generátor")
+    table.add_column("generátor")
+    table.add_column("režim")
+    table.add_column("protokolů/s", justify="right")
+    table.add_column("ms/protokol", justify="right")
+    table.add_column("zrychlení", justify="right")
+    table.add_column("velikost [B]", justify="right")
+    for name, modes in results.items():
+        base, _ = modes["bez registru"]
+        for mode, (rate, size) in modes.items():
+            table.add_row(
+                name if mode == "bez registru" else "",
+                mode,
+                f"{rate:.1f}",
+                f"{1000 / rate:.1f}",
+                f"{rate / base:.1f}×",
+                f"{size}",
+            )
+    cons.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark velikosti PDF protokolů podle výstupního profilu (PdfProfile).
+
+Vygeneruje protokoly vzorku zakázek v profilech "standard" (výstup
+reportlabu) a "flate" a porovná velikosti souborů — to, co se ukládá
+do OrderPDFStorage a posílá emailem. Ukáže i rozpad úspor profilu flate
+a pro srovnání výstup bez komprese stránek (tu mají oba profily).
+Zakázky se vytvoří v testovací databázi, produkční DB se nedotkne.
+
+  python scripts/benchmark_pdf_size.py --orders 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from dataclasses import replace
+from datetime import date, timedelta
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from app_sprava_montazi.models import Article, Client, DistribHub, Order, Team  # noqa: E402
+from app_sprava_montazi.OOP_protokols import (  # noqa: E402
+    PDF_PROFILES,
+    PdfProfile,
+    PdfResources,
+    get_generator_class,
+)
+from app_sprava_montazi.protocol_batch import protocol_queryset  # noqa: E402
+
+cons: Console = Console()
+
+NAMES = ["Jan Novák", "Petra Šťastná", "Jiří Dvořák", "Zdeňka Čermáková", "Ľubomír Kráľ"]
+ARTICLES = ["Šatní skříň", "Postel 180×200", "Komoda", "Kuchyňská linka", "Sedačka rohová"]
+
+
+def seed(count: int) -> None:
+    rnd = random.Random(42)
+    hub = DistribHub.objects.create(code="626", city="Chrastany")
+    team = Team.objects.create(name="Montáže Novák", city="Praha", phone="777123456")
+    for i in range(count):
+        client = Client.objects.create(
+            name=f"{rnd.choice(NAMES)} {i}",
+            street=f"Dlouhá {rnd.randint(1, 200)}",
+            city=rnd.choice(["Plzeň", "Brno", "Ústí nad Labem", "České Budějovice"]),
+            zip_code=f"{rnd.randint(10000, 79999)}",
+            phone=f"+420602{rnd.randint(100000, 999999)}",
+            email=f"zakaznik{i}@example.cz",
+        )
+        order = Order.objects.create(
+            order_number=f"{700000 + i}-O",
+            distrib_hub=hub,
+            mandant=rnd.choice(["SCCZ", "SCCZ", "KIKA", "XXXL"]),
+            client=client,
+            team=team,
+            evidence_termin=date.today(),
+            montage_termin=timezone.now() + timedelta(days=rnd.randint(1, 30)),
+            notes=rnd.choice(["", "Třetí patro, bez výtahu", "Volat 30 min předem"]),
+        )
+        Article.objects.bulk_create(
+            [
+                Article(order=order, name=rnd.choice(ARTICLES), quantity=rnd.randint(1, 3))
+                for _ in range(rnd.randint(1, 8))
+            ]
+        )
+
+
+def measure(orders: list[Order], profile: PdfProfile) -> tuple[list[int], float]:
+    sizes = []
+    started = time.perf_counter()
+    for order in orders:
+        generator = get_generator_class(order)(profile=profile)
+        sizes.append(len(generator.generate_pdf_protocol(model=order)))
+    return sizes, (time.perf_counter() - started) * 1000 / len(orders)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=100, help="počet zakázek ve vzorku")
+    args = parser.parse_args()
+
+    standard = PDF_PROFILES["standard"]
+    # --- rozpad: standard + jednotlivé volby profilu flate
+    profiles: dict[str, PdfProfile] = {
+        "bez komprese stránek": replace(standard, page_compression=False),
+        "standard": standard,
+        "bez ASCII85": replace(standard, ascii85=False),
+        "flate": PDF_PROFILES["flate"],
+    }
+
+    settings.DEBUG = False
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.orders)
+        PdfResources.preload()
+        orders = list(protocol_queryset(Order.objects.order_by("order_number")))
+        results = {name: measure(orders, profile) for name, profile in profiles.items()}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    table = Table(title=f"Velikost PDF protokolů — vzorek {args.orders} zakázek")
+    table.add_column("profil")
+    table.add_column("průměr (kB)", justify="right")
+    table.add_column("min–max (kB)", justify="right")
+    table.add_column("celkem (MB)", justify="right")
+    table.add_column("úspora", justify="right")
+    table.add_column("ms/protokol", justify="right")
+    base = sum(results["standard"][0])
+    for name, (sizes, ms) in results.items():
+        table.add_row(
+            name,
+            f"{sum(sizes) / len(sizes) / 1024:.1f}",
+            f"{min(sizes) / 1024:.1f}–{max(sizes) / 1024:.1f}",
+            f"{sum(sizes) / 1024 / 1024:.2f}",
+            f"{1 - sum(sizes) / base:.0%}",
+            f"{ms:.1f}",
+        )
+    cons.print(table)
+
+
+if __name__ == "__main__":
+    main()
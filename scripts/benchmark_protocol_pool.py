@@ -0,0 +1,120 @@
+"""
+Benchmark hromadného generování protokolů (protocol_batch).
+
+Vygeneruje --count protokolů sériově (workers=1) a v poolu procesů pro
+2..--max-workers workerů; měří protokoly za sekundu včetně uložení do DB.
+Start poolu (spawn + django.setup + PdfResources.preload ve workerech) se
+měří zvlášť — v provozu je pool teplý a platí se jen jednou za proces.
+Zakázky se vytvoří v testovací databázi, produkční DB se nedotkne.
+
+  python scripts/benchmark_protocol_pool.py --count 200 --max-workers 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import django
+from rich.console import Console
+from rich.table import Table
+
+root_path = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_path))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMS.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from app_sprava_montazi.models import Article, Client, DistribHub, Order, Team  # noqa: E402
+from app_sprava_montazi.OOP_protokols import PdfResources  # noqa: E402
+from app_sprava_montazi.protocol_batch import (  # noqa: E402
+    generate_protocols,
+    get_pool,
+    shutdown_pool,
+)
+
+cons: Console = Console()
+
+
+def seed(count: int) -> None:
+    hub = DistribHub.objects.create(code="626", city="Chrastany")
+    team = Team.objects.create(name="Montáže Novák", city="Praha", phone="777123456")
+    for i in range(count):
+        client = Client.objects.create(name=f"Zákazník {i}", city="Plzeň", zip_code="30100")
+        order = Order.objects.create(
+            order_number=f"{700000 + i}-O",
+            distrib_hub=hub,
+            mandant="SCCZ" if i % 2 else "KIKA",
+            client=client,
+            team=team,
+            evidence_termin=date.today(),
+            montage_termin=timezone.now(),
+        )
+        Article.objects.bulk_create(
+            [Article(order=order, name=f"Artikl {j}", quantity=1) for j in range(4)]
+        )
+
+
+def measure(workers: int) -> tuple[float, float]:
+    """(start poolu [s], protokolů/s) — start se měří zvlášť"""
+    started = time.perf_counter()
+    if workers > 1:
+        pool = get_pool(workers)
+        # --- initializer běží až s první úlohou — zahřát všechny workery
+        list(pool.map(abs, range(workers * 4)))
+    startup = time.perf_counter() - started
+
+    orders = Order.objects.all()
+    started = time.perf_counter()
+    results = generate_protocols(orders, workers=workers)
+    elapsed = time.perf_counter() - started
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise RuntimeError(f"{len(failed)} protokolů selhalo: {failed[0].error}")
+    return startup, len(results) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100, help="počet zakázek")
+    parser.add_argument("--max-workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix="ams_bench_")
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    results = {}
+    try:
+        seed(args.count)
+        PdfResources.preload()
+        results["sériově"] = measure(1)
+        for workers in range(2, args.max_workers + 1):
+            results[f"pool {workers}"] = measure(workers)
+    finally:
+        shutdown_pool()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    table = Table(
+        title=f"Hromadné protokoly — {args.count} zakázek, {os.cpu_count()} CPU"
+    )
+    table.add_column("režim")
+    table.add_column("start poolu (s)", justify="right")
+    table.add_column("protokolů/s", justify="right")
+    table.add_column("zrychlení", justify="right")
+    _, base = results["sériově"]
+    for mode, (startup, rate) in results.items():
+        table.add_row(mode, f"{startup:.2f}", f"{rate:.1f}", f"{rate / base:.2f}×")
+    cons.print(table)
+
+
+if __name__ == "__main__":
+    main()